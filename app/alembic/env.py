@@ -23,7 +23,8 @@ from himalia_api.models import Base  # noqa: E402
 
 
 def get_url() -> str:
-    return os.getenv("HIMALIA_DB_URL", config.get_main_option("sqlalchemy.url"))
+    # himalia_api.migrate passes the URL programmatically; the alembic CLI uses the env.
+    return config.attributes.get("db_url") or os.getenv("HIMALIA_DB_URL", config.get_main_option("sqlalchemy.url"))
 
 
 target_metadata = Base.metadata
@@ -53,6 +54,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # Only effective on a new, empty file; a no-op for existing databases.
+            connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
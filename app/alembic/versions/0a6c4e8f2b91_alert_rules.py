@@ -0,0 +1,56 @@
+"""alert rules and events
+
+Revision ID: 0a6c4e8f2b91
+Revises: f5b2d9e4a716
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0a6c4e8f2b91"
+down_revision = "f5b2d9e4a716"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alert_rules",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("tag", sa.String(length=200), nullable=True),
+        sa.Column("operator", sa.String(length=2), nullable=True),
+        sa.Column("threshold", sa.Float(), nullable=True),
+        sa.Column("stale_s", sa.Integer(), nullable=True),
+        sa.Column("streak", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_table(
+        "alert_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("rule_id", sa.Integer(), sa.ForeignKey("alert_rules.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("state", sa.String(length=16), nullable=False),
+        sa.Column("at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("value", sa.Text(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "ix_alert_events_rule_id_device_id_id", "alert_events", ["rule_id", "device_id", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_events_rule_id_device_id_id", table_name="alert_events")
+    op.drop_table("alert_events")
+    op.drop_table("alert_rules")
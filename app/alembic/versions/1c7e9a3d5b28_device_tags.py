@@ -0,0 +1,40 @@
+"""device tags inverted index
+
+Revision ID: 1c7e9a3d5b28
+Revises: 0a6c4e8f2b91
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "1c7e9a3d5b28"
+down_revision = "0a6c4e8f2b91"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "device_tags",
+        sa.Column("tag", sa.String(length=200), nullable=False),
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), nullable=False),
+        sa.PrimaryKeyConstraint("tag", "device_id"),
+    )
+    op.create_index("ix_device_tags_device_id", "device_tags", ["device_id"], unique=False)
+    # Backfill from the JSON lists; duplicates within one device collapse.
+    op.execute(
+        "INSERT OR IGNORE INTO device_tags (tag, device_id) "
+        "SELECT j.value, d.id FROM devices AS d, json_each(d.tags) AS j "
+        "WHERE d.tags IS NOT NULL AND j.type = 'text'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_device_tags_device_id", table_name="device_tags")
+    op.drop_table("device_tags")
@@ -0,0 +1,41 @@
+"""poller workers and device leases
+
+Revision ID: 3e5f7b9c1a64
+Revises: 1c7e9a3d5b28
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3e5f7b9c1a64"
+down_revision = "1c7e9a3d5b28"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "poller_workers",
+        sa.Column("id", sa.String(length=128), primary_key=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("heartbeat_ms", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "device_leases",
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("worker_id", sa.String(length=128), nullable=False),
+        sa.Column("expires_ms", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_device_leases_worker_id", "device_leases", ["worker_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_device_leases_worker_id", table_name="device_leases")
+    op.drop_table("device_leases")
+    op.drop_table("poller_workers")
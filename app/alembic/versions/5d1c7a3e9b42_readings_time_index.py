@@ -0,0 +1,27 @@
+"""readings fleet-wide time index
+
+Revision ID: 5d1c7a3e9b42
+Revises: 2b9e8f0a9f1a
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5d1c7a3e9b42"
+down_revision = "2b9e8f0a9f1a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset pagination over all devices orders by (captured_at, id).
+    op.create_index("ix_readings_captured_at_id", "readings", ["captured_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_readings_captured_at_id", table_name="readings")
@@ -0,0 +1,47 @@
+"""readings.id AUTOINCREMENT
+
+Revision ID: 6b8d0f2a4c57
+Revises: 3e5f7b9c1a64
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6b8d0f2a4c57"
+down_revision = "3e5f7b9c1a64"
+branch_labels = None
+depends_on = None
+
+_INDEXES = (
+    ("ix_readings_device_id_captured_ms", ["device_id", "captured_ms"], {}),
+    ("ix_readings_captured_ms", ["captured_ms"], {}),
+    ("ix_readings_image_path", ["image_path"], {"sqlite_where": sa.text("image_path IS NOT NULL")}),
+)
+
+
+def _rebuild(autoincrement: bool) -> None:
+    # The rollup watermark and the stream tailer read readings.id as a
+    # monotonic cursor; a plain rowid PK reuses the highest ids once the
+    # newest rows are deleted. The copy seeds sqlite_sequence with MAX(id).
+    for name, _, _ in _INDEXES:
+        op.drop_index(name, table_name="readings")
+    with op.batch_alter_table(
+        "readings", recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}
+    ):
+        pass
+    for name, columns, kw in _INDEXES:
+        op.create_index(name, "readings", columns, unique=False, **kw)
+
+
+def upgrade() -> None:
+    _rebuild(True)
+
+
+def downgrade() -> None:
+    _rebuild(False)
@@ -0,0 +1,39 @@
+"""alert_events.id AUTOINCREMENT
+
+Revision ID: 7e1f3a5c9d22
+Revises: 6b8d0f2a4c57
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "7e1f3a5c9d22"
+down_revision = "6b8d0f2a4c57"
+branch_labels = None
+depends_on = None
+
+
+def _rebuild(autoincrement: bool) -> None:
+    # The stream tailer and /alerts/events pagination use the id as a cursor;
+    # rule and device deletes cascade here and would free the newest ids.
+    op.drop_index("ix_alert_events_rule_id_device_id_id", table_name="alert_events")
+    with op.batch_alter_table(
+        "alert_events", recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}
+    ):
+        pass
+    op.create_index(
+        "ix_alert_events_rule_id_device_id_id", "alert_events", ["rule_id", "device_id", "id"], unique=False
+    )
+
+
+def upgrade() -> None:
+    _rebuild(True)
+
+
+def downgrade() -> None:
+    _rebuild(False)
@@ -0,0 +1,29 @@
+"""device listing indexes
+
+Revision ID: 8f3e2b6c1d07
+Revises: 5d1c7a3e9b42
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8f3e2b6c1d07"
+down_revision = "5d1c7a3e9b42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Device listing pages by (created_at, id), optionally within one type.
+    op.create_index("ix_devices_created_at_id", "devices", ["created_at", "id"], unique=False)
+    op.create_index("ix_devices_type_created_at_id", "devices", ["type", "created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_devices_type_created_at_id", table_name="devices")
+    op.drop_index("ix_devices_created_at_id", table_name="devices")
@@ -0,0 +1,47 @@
+"""reading rollups
+
+Revision ID: a41f0c9d2e18
+Revises: 8f3e2b6c1d07
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a41f0c9d2e18"
+down_revision = "8f3e2b6c1d07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reading_rollups",
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("resolution", sa.String(length=8), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("success_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("num_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("num_min", sa.Float(), nullable=True),
+        sa.Column("num_max", sa.Float(), nullable=True),
+        sa.Column("num_sum", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("device_id", "resolution", "bucket_start"),
+    )
+
+    op.create_table(
+        "rollup_state",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("last_reading_id", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_state")
+    op.drop_table("reading_rollups")
@@ -0,0 +1,45 @@
+"""retention policies and image index
+
+Revision ID: c7d2e5f81a36
+Revises: a41f0c9d2e18
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d2e5f81a36"
+down_revision = "a41f0c9d2e18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "retention_policies",
+        sa.Column("device_id", sa.String(length=36), sa.ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("raw_days", sa.Integer(), nullable=True),
+        sa.Column("rollup_days", sa.Integer(), nullable=True),
+        sa.Column("images", sa.String(length=16), nullable=True),
+        sa.Column("image_days", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    # Retention checks whether an image file is still referenced before unlinking it.
+    op.create_index(
+        "ix_readings_image_path",
+        "readings",
+        ["image_path"],
+        unique=False,
+        sqlite_where=sa.text("image_path IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_readings_image_path", table_name="readings")
+    op.drop_table("retention_policies")
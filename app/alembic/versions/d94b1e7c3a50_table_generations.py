@@ -0,0 +1,37 @@
+"""table generation counters
+
+Revision ID: d94b1e7c3a50
+Revises: c7d2e5f81a36
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d94b1e7c3a50"
+down_revision = "c7d2e5f81a36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "table_generations",
+        sa.Column("name", sa.String(length=32), primary_key=True),
+        sa.Column("generation", sa.Integer(), nullable=False),
+    )
+    # Start from the clock rather than 0 so a recreated database never hands out
+    # ETags that match responses cached against the old one.
+    start = int(time.time() * 1000)
+    op.bulk_insert(table, [{"name": "devices", "generation": start}, {"name": "readings", "generation": start}])
+
+
+def downgrade() -> None:
+    op.drop_table("table_generations")
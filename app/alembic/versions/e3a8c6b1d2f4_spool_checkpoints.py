@@ -0,0 +1,31 @@
+"""poller spool replay checkpoints
+
+Revision ID: e3a8c6b1d2f4
+Revises: d94b1e7c3a50
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3a8c6b1d2f4"
+down_revision = "d94b1e7c3a50"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spool_checkpoints",
+        sa.Column("segment", sa.String(length=64), primary_key=True),
+        sa.Column("offset", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("spool_checkpoints")
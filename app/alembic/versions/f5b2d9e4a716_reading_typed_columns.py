@@ -0,0 +1,105 @@
+"""typed reading columns: value_num and captured_ms
+
+Revision ID: f5b2d9e4a716
+Revises: e3a8c6b1d2f4
+Create Date: 2026-10-18
+
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f5b2d9e4a716"
+down_revision = "e3a8c6b1d2f4"
+branch_labels = None
+depends_on = None
+
+_CHUNK = 5000
+_EPOCH = dt.datetime(1970, 1, 1)
+_MS = dt.timedelta(milliseconds=1)
+
+# Frozen copies of the model helpers: the migration must not change if they do.
+_readings = sa.table(
+    "readings",
+    sa.column("id", sa.Integer()),
+    sa.column("captured_at", sa.DateTime(timezone=True)),
+    sa.column("captured_ms", sa.Integer()),
+    sa.column("value", sa.Text()),
+    sa.column("value_num", sa.Float()),
+)
+
+
+def _epoch_ms(value: dt.datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MS
+
+
+def _parse_number(value):
+    if value is None:
+        return None
+    try:
+        n = float(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    return n if math.isfinite(n) else None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Resumable: an interrupted run leaves the columns behind but not the revision stamp.
+    existing = {c["name"] for c in sa.inspect(bind).get_columns("readings")}
+    if "captured_ms" not in existing:
+        op.add_column("readings", sa.Column("captured_ms", sa.Integer(), nullable=True))
+    if "value_num" not in existing:
+        op.add_column("readings", sa.Column("value_num", sa.Float(), nullable=True))
+
+    # Backfill in id ranges, one transaction per chunk, so memory, the write
+    # lock and WAL growth stay bounded on large tables.
+    update = (
+        sa.update(_readings)
+        .where(_readings.c.id == sa.bindparam("rid"))
+        .values(captured_ms=sa.bindparam("ms"), value_num=sa.bindparam("num"))
+    )
+    last_id = 0
+    with op.get_context().autocommit_block():
+        while True:
+            bind.exec_driver_sql("BEGIN IMMEDIATE")
+            rows = bind.execute(
+                sa.select(_readings.c.id, _readings.c.captured_at, _readings.c.value)
+                .where(_readings.c.id > last_id, _readings.c.captured_ms.is_(None))
+                .order_by(_readings.c.id)
+                .limit(_CHUNK)
+            ).all()
+            if rows:
+                bind.execute(
+                    update,
+                    [{"rid": r.id, "ms": _epoch_ms(r.captured_at), "num": _parse_number(r.value)} for r in rows],
+                )
+            bind.exec_driver_sql("COMMIT")
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+    # Integer keys replace the ISO-string keys of the old time indexes.
+    op.create_index("ix_readings_device_id_captured_ms", "readings", ["device_id", "captured_ms"], unique=False)
+    op.create_index("ix_readings_captured_ms", "readings", ["captured_ms"], unique=False)
+    op.drop_index("ix_readings_device_id_captured_at", table_name="readings")
+    op.drop_index("ix_readings_captured_at_id", table_name="readings")
+
+
+def downgrade() -> None:
+    op.create_index("ix_readings_captured_at_id", "readings", ["captured_at", "id"], unique=False)
+    op.create_index("ix_readings_device_id_captured_at", "readings", ["device_id", "captured_at"], unique=False)
+    op.drop_index("ix_readings_captured_ms", table_name="readings")
+    op.drop_index("ix_readings_device_id_captured_ms", table_name="readings")
+    with op.batch_alter_table("readings") as batch:
+        batch.drop_column("value_num")
+        batch.drop_column("captured_ms")
@@ -0,0 +1,78 @@
+"""gunicorn settings for the Himalia API (``gunicorn -c gunicorn.conf.py wsgi:app``).
+
+Every knob is an ``HIMALIA_API_*`` environment variable so the s6 run script and
+compose files stay free of gunicorn flags.
+
+- ``HIMALIA_API_WORKERS``       processes (default: 2 per CPU, at most 8)
+- ``HIMALIA_API_WORKER_CLASS``  ``gthread`` (default), ``sync`` or ``gevent`` (if installed)
+- ``HIMALIA_API_THREADS``       threads per gthread worker (default 4)
+- ``HIMALIA_API_PRELOAD``       import ``wsgi:app`` once in the master (default true)
+- ``HIMALIA_API_MAX_REQUESTS``  recycle a worker after this many requests (default 1000, 0 = never)
+"""
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+import os
+
+
+def _int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.getenv(name, "").strip()
+    try:
+        return max(minimum, int(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+def _bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in {"0", "false", "no"}
+
+
+bind = os.getenv("HIMALIA_API_BIND", "0.0.0.0:5000")
+
+workers = _int("HIMALIA_API_WORKERS", min(8, 2 * multiprocessing.cpu_count()), minimum=1)
+worker_class = os.getenv("HIMALIA_API_WORKER_CLASS", "gthread").strip().lower() or "gthread"
+if worker_class == "gevent" and importlib.util.find_spec("gevent") is None:
+    print("[gunicorn.conf] gevent is not installed; using gthread workers")
+    worker_class = "gthread"
+threads = _int("HIMALIA_API_THREADS", 4, minimum=1) if worker_class == "gthread" else 1
+
+# Import the app once in the master: workers share its pages copy-on-write and
+# create_app() (including the startup migration step) runs a single time.
+preload_app = _bool("HIMALIA_API_PRELOAD", True)
+if not preload_app:
+    # Each worker builds its own app; migrate once from the master instead.
+    os.environ["HIMALIA_MIGRATIONS_ON_STARTUP"] = "false"
+
+# Recycle workers periodically to bound slow leaks; jitter avoids restarting all at once.
+max_requests = _int("HIMALIA_API_MAX_REQUESTS", 1000)
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+timeout = _int("HIMALIA_API_TIMEOUT_S", 30, minimum=1)
+graceful_timeout = timeout
+keepalive = 5
+accesslog = os.getenv("HIMALIA_API_ACCESS_LOG") or None
+
+
+def on_starting(server):
+    if preload_app:
+        return
+    from himalia_api.config import load_settings
+    from himalia_api.migrate import ensure_schema
+
+    try:
+        ensure_schema(load_settings().db_url)
+    except Exception as e:  # same policy as create_app: never block startup
+        server.log.warning(f"DB migration step failed: {e}")
+
+
+def post_fork(server, worker):
+    # The master may have opened pooled SQLite connections while preloading; a
+    # connection must never be shared across processes, so each worker starts
+    # with empty pools (without closing the parent's handles).
+    from himalia_api.db import dispose_engines
+
+    dispose_engines(close=False)
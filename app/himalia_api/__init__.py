@@ -5,37 +5,54 @@ import os
 from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 
+from .cache import EXTENSION_KEY, ResponseCache
 from .config import load_settings
-from .db import init_db, get_session, ping_db
+from .db import init_db, get_read_session, get_session, ping_db
 from .openapi import build_openapi
-from .migrate import upgrade_head
+from .stream import EXTENSION_KEY as STREAM_KEY, Broker
+from .migrate import ensure_schema
 
 
 def create_app() -> Flask:
     settings = load_settings()
 
     app = Flask(__name__)
+    app.config["HIMALIA_SETTINGS"] = settings
     CORS(app)
 
     # Initialize DB engine/session factory
     init_db(settings)
 
-    # Auto-migrate schema on startup for dev/test.
-    # This is idempotent for SQLite and keeps local runs simple.
+    # Auto-migrate schema on startup for dev/test. A database already at head
+    # (the container case, after cont-init.d/15-db-migrate) costs one version
+    # lookup; alembic is only imported when there is something to upgrade.
     if os.getenv("HIMALIA_MIGRATIONS_ON_STARTUP", "true").strip().lower() not in {"0", "false", "no"}:
         try:
-            upgrade_head(settings.db_url)
+            ensure_schema(settings.db_url)
         except Exception as e:
             # Do not prevent app start; health will show DB error if schema is unusable.
             app.logger.warning(f"DB migration step failed: {e}")
 
+    if settings.response_cache_enabled:
+        app.extensions[EXTENSION_KEY] = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes,
+        )
+
+    app.extensions[STREAM_KEY] = Broker(
+        poll_ms=settings.stream_poll_ms,
+        max_buffer=settings.stream_max_buffer,
+        max_clients=settings.stream_max_clients,
+    )
+
     # ---------------------------
     # Request lifecycle
     # ---------------------------
     @app.before_request
     def _auth_guard_and_db_session():
-        # DB session per request
-        g.db = get_session()
+        # DB session per request; reads go to the read-only pool so they never
+        # queue behind the single writer connection.
+        g.db = get_read_session() if request.method in {"GET", "HEAD", "OPTIONS"} else get_session()
 
         # Auth
         if request.path.startswith("/api/v1/"):
@@ -73,9 +90,23 @@ def create_app() -> Flask:
         def openapi():
             return build_openapi(), 200
 
+    from .routes.alerts import bp as alerts_bp
+    from .routes.cache import bp as cache_bp
     from .routes.devices import bp as devices_bp
+    from .routes.poller import bp as poller_bp
+    from .routes.readings import bp as readings_bp
+    from .routes.retention import bp as retention_bp
+    from .routes.rollups import bp as rollups_bp
+    from .routes.stream import bp as stream_bp
 
     app.register_blueprint(devices_bp)
+    app.register_blueprint(readings_bp)
+    app.register_blueprint(rollups_bp)
+    app.register_blueprint(retention_bp)
+    app.register_blueprint(alerts_bp)
+    app.register_blueprint(poller_bp)
+    app.register_blueprint(cache_bp)
+    app.register_blueprint(stream_bp)
 
     # JSON 404
     @app.errorhandler(404)
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import logging
+import operator
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from .cache import bump, generations
+from .config import Settings
+from .db import read_session_scope, session_scope
+from .models import AlertEvent, AlertRule, Device, epoch_ms, from_epoch_ms, parse_number, utcnow
+
+log = logging.getLogger(__name__)
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+FIRING = "firing"
+RESOLVED = "resolved"
+
+# Generations that invalidate the compiled rule index. ``device_config`` moves on
+# device create/update/delete (tags, existence), not on every poll status write.
+INDEX_GENERATIONS = ("alert_rules", "device_config")
+
+_Key = Tuple[int, str]  # (rule id, device id)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    kind: str
+    test: Optional[Callable[[float, float], bool]] = None
+    operator: Optional[str] = None
+    threshold: Optional[float] = None
+    stale_ms: int = 0
+    streak: int = 0
+
+    @classmethod
+    def from_row(cls, row: Any) -> "CompiledRule":
+        return cls(
+            id=row.id,
+            kind=row.kind,
+            test=OPERATORS.get(row.operator or ""),
+            operator=row.operator,
+            threshold=row.threshold,
+            stale_ms=(row.stale_s or 0) * 1000,
+            streak=row.streak or 0,
+        )
+
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) ``schedule``; ``advance`` only visits elapsed slots.
+
+    Entries land in slot ``(deadline // slot_ms) % slots``; an entry more than one
+    revolution out stays in its slot until its deadline has actually passed.
+    """
+
+    def __init__(self, *, slot_ms: int = 1000, slots: int = 512) -> None:
+        self._slot_ms = slot_ms
+        self._slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self._tick: Optional[int] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, deadline_ms: int, item: Any) -> None:
+        tick = deadline_ms // self._slot_ms
+        if self._tick is not None and tick < self._tick:
+            tick = self._tick
+        self._slots[tick % len(self._slots)].append((deadline_ms, item))
+        self._size += 1
+
+    def advance(self, now_ms: int) -> List[Any]:
+        """Pop every entry whose deadline is ``<= now_ms``."""
+        now_tick = now_ms // self._slot_ms
+        if self._tick is None:
+            self._tick = now_tick
+        first = self._tick
+        # After a long pause every slot is due once; no need to spin through revolutions.
+        last = min(now_tick, first + len(self._slots) - 1)
+        expired: List[Any] = []
+        for tick in range(first, last + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            keep = [e for e in slot if e[0] > now_ms]
+            if len(keep) != len(slot):
+                expired.extend(item for deadline, item in slot if deadline <= now_ms)
+                self._slots[tick % len(self._slots)] = keep
+        self._size -= len(expired)
+        self._tick = now_tick
+        return expired
+
+
+@dataclass
+class _Pending:
+    """State changes of one evaluation, applied to the engine only after commit."""
+
+    firing: Dict[_Key, bool] = field(default_factory=dict)
+    streaks: Dict[_Key, int] = field(default_factory=dict)
+    seen: Dict[str, int] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    expired: List[Tuple[int, Tuple[int, str, int]]] = field(default_factory=list)
+
+
+class _Transaction:
+    def __init__(self, engine: "AlertEngine") -> None:
+        self._engine = engine
+        self.pending = _Pending()
+
+    def observe(self, s: Session, batch: Sequence[Any]) -> None:
+        """Evaluate a batch of poll results and stage its events in ``s``."""
+        self._engine._refresh(s)
+        self._engine._evaluate(batch, self.pending)
+        self.write(s)
+
+    def write(self, s: Session) -> None:
+        if self.pending.events:
+            s.execute(insert(AlertEvent.__table__), self.pending.events)
+            bump(s, "alerts")
+
+
+class AlertEngine:
+    """Per-device alert rules evaluated in the ingest path.
+
+    Enabled rules are compiled into an index keyed by device id (tag and global
+    rules are expanded per device), so a reading costs one dict lookup plus the
+    rules of its device. Per-(rule, device) state is kept in memory: whether it
+    is firing, the current error streak and the device's last successful
+    reading. Staleness deadlines sit in a ``TimerWheel`` that a background
+    thread advances every ``tick_ms``.
+
+    Evaluation runs inside the writer's transaction (``transaction()``): the
+    only DB work per batch is one read of the generation counters and, when a
+    rule changes state, an INSERT into ``alert_events``. State changes are
+    applied to memory only after the transaction commits, so a failed and
+    retried batch is evaluated again from the same state.
+    """
+
+    def __init__(self, *, tick_ms: int = 1000, wheel_slots: int = 512, refresh_s: float = 5.0) -> None:
+        self._tick_s = tick_ms / 1000.0
+        self._refresh_s = refresh_s
+        self._wheel = TimerWheel(slot_ms=tick_ms, slots=wheel_slots)
+        self._lock = threading.RLock()
+        self._gens: Optional[Dict[str, int]] = None
+        self._by_device: Dict[str, Tuple[CompiledRule, ...]] = {}
+        self._firing: Dict[_Key, bool] = {}
+        self._streaks: Dict[_Key, int] = {}
+        self._last_seen: Dict[str, int] = {}
+        self._owned: Optional[FrozenSet[str]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_refresh = 0.0
+        self._evaluated = 0
+        self._events = 0
+        self._reloads = 0
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="himalia-alerts", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    # ---------------------------
+    # Evaluation
+    # ---------------------------
+    @contextmanager
+    def transaction(self) -> Iterator[_Transaction]:
+        """Hold the engine for one DB transaction; apply its state changes on success.
+
+        Open it around ``session_scope()`` so the commit happens inside.
+        """
+        with self._lock:
+            tx = _Transaction(self)
+            try:
+                yield tx
+            except BaseException:
+                # Put expired timers back so the next tick tries again.
+                for deadline, item in tx.pending.expired:
+                    self._wheel.schedule(deadline, item)
+                raise
+            self._apply(tx.pending)
+
+    def restrict(self, device_ids: Iterable[str]) -> None:
+        """Evaluate only these devices (the ones this sharded poller owns).
+
+        A change forces a reload, so devices taken over from another worker
+        start from the firing state it recorded.
+        """
+        owned = frozenset(device_ids)
+        with self._lock:
+            if owned != self._owned:
+                self._owned = owned
+                self._gens = None
+
+    def tick(self, now_ms: Optional[int] = None) -> int:
+        """Advance the timer wheel; returns how many alert events it wrote."""
+        now_ms = epoch_ms(utcnow()) if now_ms is None else now_ms
+        if time.monotonic() - self._last_refresh >= self._refresh_s:
+            with self._lock, read_session_scope() as s:
+                self._refresh(s)
+        with self.transaction() as tx:
+            self._expire_due(now_ms, tx)
+        return len(tx.pending.events)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "devices": len(self._by_device),
+                "rules": len({r.id for rules in self._by_device.values() for r in rules}),
+                "firing": sum(1 for v in self._firing.values() if v),
+                "timers": len(self._wheel),
+                "evaluated": self._evaluated,
+                "events": self._events,
+                "reloads": self._reloads,
+            }
+
+    # ---------------------------
+    # Internals (called with the lock held)
+    # ---------------------------
+    def _run(self) -> None:
+        while not self._stop.wait(self._tick_s):
+            try:
+                self.tick()
+            except Exception:
+                log.exception("alert tick failed")
+
+    def _expire_due(self, now_ms: int, tx: _Transaction) -> None:
+        self._expire(now_ms, tx.pending)
+        if tx.pending.events:
+            # Only open a write transaction when something actually went stale.
+            with session_scope() as s:
+                tx.write(s)
+
+    def _refresh(self, s: Session) -> None:
+        self._last_refresh = time.monotonic()
+        gens = generations(s, INDEX_GENERATIONS)
+        if gens == self._gens:
+            return
+        self._load(s)
+        self._gens = gens
+
+    def _load(self, s: Session) -> None:
+        rules = s.execute(select(AlertRule).where(AlertRule.enabled.is_(True))).scalars().all()
+        devices = s.execute(select(Device.id, Device.tags, Device.last_seen_at)).all()
+        latest = (
+            select(func.max(AlertEvent.id))
+            .group_by(AlertEvent.rule_id, AlertEvent.device_id)
+            .scalar_subquery()
+        )
+        firing = {
+            (r.rule_id, r.device_id): r.state == FIRING
+            for r in s.execute(
+                select(AlertEvent.rule_id, AlertEvent.device_id, AlertEvent.state).where(AlertEvent.id.in_(latest))
+            )
+        }
+
+        by_device: Dict[str, List[CompiledRule]] = {}
+        by_tag: Dict[str, List[CompiledRule]] = {}
+        global_rules: List[CompiledRule] = []
+        for row in rules:
+            rule = CompiledRule.from_row(row)
+            if row.device_id is not None:
+                by_device.setdefault(row.device_id, []).append(rule)
+            elif row.tag is not None:
+                by_tag.setdefault(row.tag, []).append(rule)
+            else:
+                global_rules.append(rule)
+
+        now_ms = epoch_ms(utcnow())
+        index: Dict[str, Tuple[CompiledRule, ...]] = {}
+        for dev in devices:
+            if self._owned is not None and dev.id not in self._owned:
+                continue
+            matched = list(by_device.get(dev.id, ())) + global_rules
+            for tag in dict.fromkeys(dev.tags or ()):
+                matched.extend(by_tag.get(tag, ()))
+            if not matched:
+                continue
+            index[dev.id] = tuple(matched)
+            if dev.id not in self._last_seen:
+                # Never seen: time staleness from now rather than firing at once.
+                self._last_seen[dev.id] = epoch_ms(dev.last_seen_at) if dev.last_seen_at else now_ms
+
+        keys = {(r.id, device_id) for device_id, rs in index.items() for r in rs}
+        self._by_device = index
+        self._firing = {k: v for k, v in firing.items() if k in keys}
+        self._streaks = {k: v for k, v in self._streaks.items() if k in keys}
+        self._last_seen = {k: v for k, v in self._last_seen.items() if k in index}
+        self._wheel = TimerWheel(slot_ms=self._wheel._slot_ms, slots=len(self._wheel._slots))
+        for device_id, rs in index.items():
+            seen = self._last_seen[device_id]
+            for r in rs:
+                if r.kind == "stale":
+                    self._wheel.schedule(seen + r.stale_ms, (r.id, device_id, seen))
+        self._reloads += 1
+
+    def _evaluate(self, batch: Sequence[Any], p: _Pending) -> None:
+        index = self._by_device
+        for r in batch:
+            rules = index.get(r.device_id)
+            if not rules:
+                continue
+            self._evaluated += 1
+            num = parse_number(r.value) if r.success else None
+            for rule in rules:
+                key = (rule.id, r.device_id)
+                message = None
+                if rule.kind == "threshold":
+                    if num is None:
+                        continue
+                    now_firing = rule.test(num, rule.threshold)
+                    message = f"value {num:g} {rule.operator} {rule.threshold:g}" if now_firing else None
+                elif rule.kind == "error_streak":
+                    streak = 0 if r.success else p.streaks.get(key, self._streaks.get(key, 0)) + 1
+                    p.streaks[key] = streak
+                    now_firing = streak >= rule.streak
+                    message = f"{streak} failed polls in a row: {r.error}" if now_firing else None
+                elif rule.kind == "stale":
+                    if not r.success:
+                        continue
+                    p.seen[r.device_id] = epoch_ms(r.captured_at)
+                    now_firing = False
+                else:
+                    continue
+                self._transition(p, key, now_firing, r.captured_at, r.value, message)
+
+    def _expire(self, now_ms: int, p: _Pending) -> None:
+        for rule_id, device_id, seen_ms in self._wheel.advance(now_ms):
+            if self._last_seen.get(device_id) != seen_ms:
+                continue  # a newer reading rescheduled this device
+            rule = next((r for r in self._by_device.get(device_id, ()) if r.id == rule_id), None)
+            if rule is None:
+                continue
+            p.expired.append((seen_ms + rule.stale_ms, (rule_id, device_id, seen_ms)))
+            message = f"no successful reading for {rule.stale_ms // 1000}s"
+            self._transition(p, (rule_id, device_id), True, from_epoch_ms(now_ms), None, message)
+
+    def _transition(self, p: _Pending, key: _Key, now_firing: bool, at: Any, value: Any, message: Any) -> None:
+        was = p.firing.get(key, self._firing.get(key, False))
+        if now_firing == was:
+            return
+        p.firing[key] = now_firing
+        p.events.append(
+            {
+                "rule_id": key[0],
+                "device_id": key[1],
+                "state": FIRING if now_firing else RESOLVED,
+                "at": at,
+                "value": value,
+                "message": message,
+            }
+        )
+
+    def _apply(self, p: _Pending) -> None:
+        self._firing.update(p.firing)
+        self._streaks.update(p.streaks)
+        for device_id, seen in p.seen.items():
+            if seen <= self._last_seen.get(device_id, -1):
+                continue
+            self._last_seen[device_id] = seen
+            for r in self._by_device.get(device_id, ()):
+                if r.kind == "stale":
+                    self._wheel.schedule(seen + r.stale_ms, (r.id, device_id, seen))
+        self._events += len(p.events)
+
+
+def build_alert_engine(settings: Settings) -> Optional[AlertEngine]:
+    """The poller's alert engine, or None when ``HIMALIA_ALERTS_ENABLED`` is off."""
+    if not settings.alerts_enabled:
+        return None
+    return AlertEngine(tick_ms=settings.alerts_tick_ms, refresh_s=settings.poller_refresh_s)
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .cache import bump
+from .models import Device, utcnow
+from .tags import set_device_tags
+from .validation import validate_device_payloads
+
+FORMATS = ("json", "ndjson", "csv", "xlsx")
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Columns of the tabular (CSV/XLSX) export, in order; all but the read-only tail
+# are accepted back by the importer.
+EXPORT_COLUMNS = (
+    "id",
+    "name",
+    "type",
+    "enabled",
+    "endpoint",
+    "auth_mode",
+    "auth_username",
+    "poll_interval_s",
+    "timeout_ms",
+    "tags",
+    "notes",
+    "created_at",
+    "updated_at",
+    "last_seen_at",
+    "last_poll_at",
+    "last_error",
+)
+
+# Output-only fields of device_to_dict; ignored on import so exports round-trip.
+READ_ONLY_FIELDS = {"has_auth_password", "created_at", "updated_at", "last_seen_at", "last_poll_at", "last_error"}
+
+TAG_SEPARATOR = ";"
+
+_TRUE = {"true", "1", "yes", "y", "on"}
+_FALSE = {"false", "0", "no", "n", "off"}
+_INT_FIELDS = {"poll_interval_s", "timeout_ms"}
+_STR_FIELDS = {"id", "name", "type", "endpoint", "auth_mode", "auth_username", "auth_password", "notes"}
+
+
+class BulkFormatError(ValueError):
+    """The upload could not be parsed as the requested format."""
+
+
+def detect_format(explicit: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    if explicit:
+        return explicit.lower() if explicit.lower() in FORMATS else None
+    mimetype = (content_type or "").split(";", 1)[0].strip().lower()
+    for fmt, ct in CONTENT_TYPES.items():
+        if mimetype == ct:
+            return fmt
+    if mimetype in {"application/ndjson", "application/jsonl"}:
+        return "ndjson"
+    return None
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def parse_rows(data: bytes, fmt: str) -> List[Dict[str, Any]]:
+    """Decode an upload into one dict per device row (tabular cells coerced to JSON types)."""
+    try:
+        if fmt == "json":
+            rows = json.loads(data or b"null")
+            if not isinstance(rows, list):
+                raise BulkFormatError("body must be a JSON array of device objects")
+            return rows
+        if fmt == "ndjson":
+            return [json.loads(line) for line in data.splitlines() if line.strip()]
+        if fmt == "csv":
+            reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+            return [_from_cells(row.items()) for row in reader]
+        if fmt == "xlsx":
+            return _parse_xlsx(data)
+    except BulkFormatError:
+        raise
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise BulkFormatError(f"could not parse {fmt}: {e}") from e
+    raise BulkFormatError(f"unsupported format: {fmt}")
+
+
+def _parse_xlsx(data: bytes) -> List[Dict[str, Any]]:
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    except Exception as e:  # openpyxl raises zipfile/KeyError/InvalidFileException
+        raise BulkFormatError(f"could not parse xlsx: {e}") from e
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return []
+        names = [str(h).strip() if h is not None else "" for h in header]
+        out = []
+        for values in rows:
+            if all(v is None or v == "" for v in values):
+                continue
+            out.append(_from_cells(zip(names, values)))
+        return out
+    finally:
+        wb.close()
+
+
+def _from_cells(cells: Iterable[Tuple[Optional[str], Any]]) -> Dict[str, Any]:
+    """Map a spreadsheet row to a payload; blank cells are treated as absent."""
+    row: Dict[str, Any] = {}
+    for name, value in cells:
+        if not name:
+            continue
+        name = name.strip()
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        row[name] = _coerce_cell(name, value)
+    return row
+
+
+def _coerce_cell(name: str, value: Any) -> Any:
+    if name == "enabled" and isinstance(value, (str, int)) and not isinstance(value, bool):
+        text = str(value).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        return value
+    if name in _INT_FIELDS:
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value.strip())
+        return value
+    if name == "tags":
+        return [t.strip() for t in str(value).split(TAG_SEPARATOR) if t.strip()]
+    if name in _STR_FIELDS and not isinstance(value, str):
+        return str(value)  # e.g. a numeric name typed into a spreadsheet
+    return value
+
+
+# ---------------------------
+# Import
+# ---------------------------
+@dataclass
+class BulkReport:
+    created: int = 0
+    updated: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+def validate_rows(rows: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validate every row in one pass; returns (clean rows with ``id``, per-row errors).
+
+    Row numbers in errors are 1-based positions in the upload.
+    """
+    valid: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    seen: Dict[str, int] = {}
+    payloads = [
+        {k: v for k, v in raw.items() if k not in READ_ONLY_FIELDS and k != "id"} if isinstance(raw, dict) else raw
+        for raw in rows
+    ]
+    results = validate_device_payloads(payloads, mode="create")
+    for n, (raw, payload, res) in enumerate(zip(rows, payloads, results), start=1):
+        if not isinstance(raw, dict):
+            errors.append({"row": n, "errors": ["row must be an object"]})
+            continue
+        row_errors = list(res.errors)
+
+        device_id = raw.get("id")
+        if device_id is not None:
+            if not isinstance(device_id, str) or not device_id.strip() or len(device_id.strip()) > 36:
+                row_errors.append("id must be a non-empty string of at most 36 characters")
+            else:
+                device_id = device_id.strip()
+                if device_id in seen:
+                    row_errors.append(f"duplicate id (also in row {seen[device_id]})")
+                seen.setdefault(device_id, n)
+
+        if row_errors:
+            errors.append({"row": n, "errors": row_errors})
+            continue
+        cleaned = dict(res.cleaned)
+        cleaned["id"] = device_id
+        cleaned["_row"] = n
+        cleaned["_has_password"] = "auth_password" in payload
+        valid.append(cleaned)
+    return valid, errors
+
+
+def import_devices(
+    session: Session,
+    rows: List[Any],
+    *,
+    upsert: bool = False,
+    atomic: bool = False,
+) -> BulkReport:
+    """Validate ``rows`` and write the valid ones in one transaction on ``session``.
+
+    Rows without ``id`` are created. Rows with an ``id`` that exists are replaced
+    (PUT semantics) when ``upsert`` is set and reported as errors otherwise; a
+    row that omits ``auth_password`` keeps the stored one, since exports never
+    contain passwords. With ``atomic`` nothing is written if any row fails.
+    The caller commits.
+    """
+    report = BulkReport()
+    valid, report.errors = validate_rows(rows)
+
+    given_ids = [r["id"] for r in valid if r["id"] is not None]
+    existing = set()
+    for start in range(0, len(given_ids), 500):
+        existing.update(session.scalars(select(Device.id).where(Device.id.in_(given_ids[start : start + 500]))))
+
+    to_create: List[Dict[str, Any]] = []
+    to_update: List[Dict[str, Any]] = []
+    for r in valid:
+        if r["id"] in existing:
+            if upsert:
+                to_update.append(r)
+            else:
+                report.errors.append({"row": r["_row"], "errors": [f"device {r['id']} already exists"]})
+        else:
+            to_create.append(r)
+    report.errors.sort(key=lambda e: e["row"])
+
+    if atomic and report.errors:
+        return report
+
+    now = utcnow()
+    written: Dict[str, Any] = {}
+    if to_create:
+        created = [_device_row(r, now, new=True) for r in to_create]
+        session.execute(insert(Device), created)
+        written.update((row["id"], row.get("tags")) for row in created)
+        report.created = len(to_create)
+    for with_password in (True, False):
+        batch = [_device_row(r, now, new=False) for r in to_update if r["_has_password"] is with_password]
+        if batch:
+            session.execute(_upsert_stmt(with_password), batch)
+            written.update((row["id"], row.get("tags")) for row in batch)
+            report.updated += len(batch)
+    if written:
+        set_device_tags(session, written)
+        bump(session, "devices", "device_config")
+    return report
+
+
+def _device_row(r: Dict[str, Any], now, *, new: bool) -> Dict[str, Any]:
+    row = {k: v for k, v in r.items() if not k.startswith("_")}
+    if row["id"] is None:
+        row["id"] = str(uuid.uuid4())
+    row["created_at"] = now
+    row["updated_at"] = now
+    if not new and not r["_has_password"]:
+        row.pop("auth_password", None)
+    return row
+
+
+_UPDATABLE = (
+    "name",
+    "type",
+    "enabled",
+    "endpoint",
+    "auth_mode",
+    "auth_username",
+    "poll_interval_s",
+    "timeout_ms",
+    "tags",
+    "notes",
+    "updated_at",
+)
+
+
+def _upsert_stmt(with_password: bool):
+    stmt = sqlite_insert(Device)
+    columns = _UPDATABLE + (("auth_password",) if with_password else ())
+    return stmt.on_conflict_do_update(
+        index_elements=[Device.id],
+        set_={c: stmt.excluded[c] for c in columns},
+    )
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def _tabular(d: Dict[str, Any]) -> List[Any]:
+    out = []
+    for c in EXPORT_COLUMNS:
+        v = d.get(c)
+        if c == "tags":
+            v = TAG_SEPARATOR.join(v or [])
+        out.append(v)
+    return out
+
+
+def export_chunks(devices: Iterable[Dict[str, Any]], fmt: str) -> Iterator[bytes]:
+    """Serialize device dicts incrementally in ``fmt``; memory stays flat for JSON/NDJSON/CSV."""
+    if fmt == "json":
+        yield b"["
+        first = True
+        for dev in devices:
+            yield (b"" if first else b",") + json.dumps(dev, separators=(",", ":")).encode("utf-8")
+            first = False
+        yield b"]"
+    elif fmt == "ndjson":
+        for dev in devices:
+            yield json.dumps(dev, separators=(",", ":")).encode("utf-8") + b"\n"
+    elif fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        for n, dev in enumerate(devices, start=1):
+            writer.writerow(_tabular(dev))
+            if n % 200 == 0:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue().encode("utf-8")
+    elif fmt == "xlsx":
+        yield from _export_xlsx(devices)
+    else:
+        raise ValueError(f"unsupported format: {fmt}")
+
+
+def _export_xlsx(devices: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    # A workbook is a zip that can only be finalized at the end; write-only mode
+    # keeps rows out of memory and the file spills to disk when large.
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("devices")
+    ws.append(list(EXPORT_COLUMNS))
+    for dev in devices:
+        ws.append(_tabular(dev))
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from flask import Response, current_app, g, request
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .models import TableGeneration
+
+EXTENSION_KEY = "himalia_response_cache"
+
+
+def bump(session: Session, *names: str) -> None:
+    """Advance the generation of ``names`` inside the caller's transaction."""
+    stmt = sqlite_insert(TableGeneration).values([{"name": n, "generation": 1} for n in names])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableGeneration.name],
+        set_={"generation": TableGeneration.generation + 1},
+    )
+    session.execute(stmt)
+
+
+def generations(session: Session, names: Sequence[str]) -> Dict[str, int]:
+    rows = session.execute(
+        select(TableGeneration.name, TableGeneration.generation).where(TableGeneration.name.in_(names))
+    ).all()
+    found = {r.name: r.generation for r in rows}
+    return {n: found.get(n, 0) for n in names}
+
+
+def make_etag(key: str, gens: Dict[str, int]) -> str:
+    """Strong validator for ``key`` (path + query) at the given table generations."""
+    state = ",".join(f"{name}={gens[name]}" for name in sorted(gens))
+    return hashlib.sha1(f"{key}|{state}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    etag: str
+    body: bytes
+    mimetype: str
+
+
+class ResponseCache:
+    """Bounded LRU of serialized 200 responses, keyed by request path and query.
+
+    An entry is only served while its ETag (which folds in the table generations)
+    still matches, so a bump anywhere invalidates it without explicit eviction.
+    Limits apply to both the entry count and the total body bytes.
+    """
+
+    def __init__(self, *, max_entries: int = 512, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._evictions = 0
+
+    def get(self, key: str, etag: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.etag != etag:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: str, etag: str, body: bytes, mimetype: str) -> None:
+        if len(body) > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = _Entry(etag=etag, body=body, mimetype=mimetype)
+            self._bytes += len(body)
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._evictions += 1
+
+    def not_modified(self) -> None:
+        with self._lock:
+            self._not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self._hits + self._not_modified
+            total = served + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "not_modified": self._not_modified,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(served / total, 4) if total else 0.0,
+            }
+
+
+def get_cache() -> Optional[ResponseCache]:
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def cached(*tables: str) -> Callable:
+    """Serve a GET view with ETag/If-None-Match, caching the body when it is not streamed.
+
+    The generations are read in the request's own session before the view runs.
+    They are not one snapshot with the view's query: pysqlite sends no ``BEGIN``
+    before a SELECT, so each is its own autocommit read, and a write committed in
+    between pairs a newer body with the older ETag. That lag is at most one write
+    and harmless: the write bumped the generations, so the next request computes
+    a new ETag, misses the entry stored under the old one and re-renders.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return view(*args, **kwargs)
+            session = g.db
+            try:
+                gens = generations(session, tables)
+            except SQLAlchemyError:
+                session.rollback()  # schema without generations: serve uncached
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            etag = make_etag(key, gens)
+            if request.if_none_match.contains(etag):
+                cache.not_modified()
+                return _with_etag(Response(status=304), etag)
+
+            entry = cache.get(key, etag)
+            if entry is not None:
+                return _with_etag(Response(entry.body, status=200, mimetype=entry.mimetype), etag)
+
+            resp = current_app.make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            if not resp.is_streamed:
+                cache.put(key, etag, resp.get_data(), resp.mimetype)
+            return _with_etag(resp, etag)
+
+        return wrapper
+
+    return decorator
+
+
+def _with_etag(resp: Response, etag: str) -> Response:
+    resp.set_etag(etag)
+    # Let clients keep the body but revalidate every time; unchanged data costs a 304.
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
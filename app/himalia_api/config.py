@@ -1,3 +1,4 @@
+import importlib.util
 import os
 from dataclasses import dataclass
 
@@ -9,31 +10,239 @@ class Settings:
     Contract defaults:
       - Persistent DB path: /data/db/himalia.sqlite3
       - API auth is enabled when HIMALIA_API_KEY is set (non-empty)
+      - Poller runs up to 16 concurrent fetches
     """
 
     api_key: str
     db_url: str
     openapi_enabled: bool
 
+    # SQLite connection tuning (applied on every new connection)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size: int = -20000  # negative = KiB, i.e. ~20 MB page cache
+    sqlite_mmap_size: int = 268435456
+    sqlite_temp_store: str = "MEMORY"
+    db_read_pool_size: int = 4
+
+    # Capture engine (app/poller.py)
+    poller_workers: int = 16
+    poller_tick_ms: int = 250
+    poller_refresh_s: int = 5
+    poller_backoff_max_s: int = 300
+    poller_stats_path: str = "/data/log/poller-stats.json"
+
+    # Sharding devices across poller processes/hosts sharing the database
+    poller_sharding: bool = False
+    poller_processes: int = 1  # >1 forks sharded workers inside one container
+    poller_lease_s: int = 30
+    poller_worker_id: str = ""  # default hostname:pid
+
+    # Write-behind reading ingestion
+    ingest_max_batch: int = 500
+    ingest_max_delay_ms: int = 1000
+    ingest_max_queue: int = 10000
+
+    # On-disk spool in front of the reading writer (empty dir = in-memory queue only)
+    spool_dir: str = "/data/spool"
+    spool_segment_bytes: int = 4 * 1024 * 1024
+    spool_max_bytes: int = 1024 * 1024 * 1024
+    spool_drain_timeout_s: int = 20
+
+    # Alert rules evaluated by the poller as readings are ingested
+    alerts_enabled: bool = True
+    alerts_tick_ms: int = 1000
+
+    # Snapshot HTTP connection pool
+    http_max_connections: int = 64
+    http_max_per_host: int = 4
+
+    # RTSP frame grabbers
+    rtsp_max_streams: int = 16
+    rtsp_idle_s: int = 120
+    rtsp_buffer_frames: int = 2
+
+    # Captured images (Reading.image_path is absolute or relative to this dir)
+    image_dir: str = "/data/images"
+    image_store_enabled: bool = True
+    image_dedupe_perceptual: bool = False
+    image_phash_threshold: int = 4  # max differing dHash bits for "unchanged"
+
+    # Change gate in front of value extraction (reuse the last value on unchanged frames)
+    change_gate_enabled: bool = True
+    change_gate_threshold: float = 3.0  # mean abs. grayscale difference, 0-255
+    change_gate_size: int = 32
+    change_gate_roi: str = ""  # "x0,y0,x1,y1" frame fractions; empty = full frame
+    change_gate_max_age_s: int = 900
+
+    # Value extraction (vision model) on a batching worker pool
+    inference_backend: str = "none"  # none | ollama | stub
+    inference_max_batch: int = 8
+    inference_max_wait_ms: int = 250
+    inference_max_queue: int = 256
+    inference_workers: int = 1
+    ollama_url: str = "http://ollama:11434"
+    ollama_model: str = "llava"
+    ollama_timeout_s: int = 120
+
+    # Per-process LRU of serialized GET responses, invalidated by table generations.
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+
+    # /api/v1/stream (SSE): tailer poll period and per-process subscriber limits.
+    # Each open stream pins a request thread, so the default client limit follows
+    # the gunicorn worker's thread count (see _default_stream_max_clients).
+    stream_poll_ms: int = 500
+    stream_max_buffer: int = 1000
+    stream_max_clients: int = 3
+    stream_keepalive_s: int = 15
+
+    bulk_max_rows: int = 50000
+
+    # Maintenance jobs (run inside the poller process)
+    rollup_interval_s: int = 60
+    rollup_chunk_size: int = 5000
+
+    # Global retention policy; 0 days = keep forever. Per-device overrides live
+    # in the retention_policies table.
+    retention_raw_days: int = 30
+    retention_rollup_days: int = 365
+    retention_images: str = "all"  # all | failed | none
+    retention_image_days: int = 7
+    retention_interval_s: int = 3600
+    retention_chunk_size: int = 500
+    retention_orphan_grace_s: int = 3600
+
     @property
     def auth_enabled(self) -> bool:
         return bool(self.api_key)
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in {"0", "false", "no"}
+
+
+def _env_int(name: str, default: int, *, minimum: int = 1) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, float(raw))
+    except ValueError:
+        return default
+
+
+def _default_stream_max_clients() -> int:
+    """Streams per API worker that still leave a thread for ordinary requests.
+
+    Mirrors gunicorn.conf.py: gthread workers (the default) keep one of their
+    ``HIMALIA_API_THREADS`` free, gevent workers are not thread-bound, and a sync
+    worker has no thread to spare.
+    """
+    worker_class = os.getenv("HIMALIA_API_WORKER_CLASS", "gthread").strip().lower() or "gthread"
+    if worker_class == "gevent" and importlib.util.find_spec("gevent") is not None:
+        return 100
+    if worker_class == "sync":
+        return 0
+    return max(1, _env_int("HIMALIA_API_THREADS", 4) - 1)
+
+
+def _env_choice(name: str, default: str, choices: set[str]) -> str:
+    raw = os.getenv(name, "").strip().upper()
+    return raw if raw in choices else default
+
+
 def load_settings() -> Settings:
     api_key = os.getenv("HIMALIA_API_KEY", "change-me").strip()
 
     # SQLite path per spec: /data/db/himalia.sqlite3
     db_url = os.getenv("HIMALIA_DB_URL", "sqlite:////data/db/himalia.sqlite3").strip()
 
-    openapi_enabled = os.getenv("HIMALIA_OPENAPI_ENABLED", "true").strip().lower() not in {
-        "0",
-        "false",
-        "no",
-    }
+    openapi_enabled = _env_bool("HIMALIA_OPENAPI_ENABLED", True)
 
     return Settings(
         api_key=api_key,
         db_url=db_url,
         openapi_enabled=openapi_enabled,
+        sqlite_journal_mode=_env_choice(
+            "HIMALIA_SQLITE_JOURNAL_MODE", "WAL", {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"}
+        ),
+        sqlite_synchronous=_env_choice("HIMALIA_SQLITE_SYNCHRONOUS", "NORMAL", {"OFF", "NORMAL", "FULL", "EXTRA"}),
+        sqlite_busy_timeout_ms=_env_int("HIMALIA_SQLITE_BUSY_TIMEOUT_MS", 5000, minimum=0),
+        sqlite_cache_size=_env_int("HIMALIA_SQLITE_CACHE_SIZE", -20000, minimum=-(2**31)),
+        sqlite_mmap_size=_env_int("HIMALIA_SQLITE_MMAP_SIZE", 268435456, minimum=0),
+        sqlite_temp_store=_env_choice("HIMALIA_SQLITE_TEMP_STORE", "MEMORY", {"DEFAULT", "FILE", "MEMORY"}),
+        db_read_pool_size=_env_int("HIMALIA_DB_READ_POOL_SIZE", 4),
+        poller_workers=_env_int("HIMALIA_POLLER_WORKERS", 16),
+        poller_tick_ms=_env_int("HIMALIA_POLLER_TICK_MS", 250, minimum=10),
+        poller_refresh_s=_env_int("HIMALIA_POLLER_REFRESH_S", 5),
+        poller_backoff_max_s=_env_int("HIMALIA_POLLER_BACKOFF_MAX_S", 300),
+        poller_stats_path=os.getenv("HIMALIA_POLLER_STATS_PATH", "/data/log/poller-stats.json").strip(),
+        poller_sharding=_env_bool("HIMALIA_POLLER_SHARDING", False),
+        poller_processes=_env_int("HIMALIA_POLLER_PROCESSES", 1),
+        poller_lease_s=_env_int("HIMALIA_POLLER_LEASE_S", 30, minimum=3),
+        poller_worker_id=os.getenv("HIMALIA_POLLER_WORKER_ID", "").strip(),
+        ingest_max_batch=_env_int("HIMALIA_INGEST_MAX_BATCH", 500),
+        ingest_max_delay_ms=_env_int("HIMALIA_INGEST_MAX_DELAY_MS", 1000),
+        ingest_max_queue=_env_int("HIMALIA_INGEST_MAX_QUEUE", 10000),
+        spool_dir=os.getenv("HIMALIA_SPOOL_DIR", "/data/spool").strip(),
+        spool_segment_bytes=_env_int("HIMALIA_SPOOL_SEGMENT_BYTES", 4 * 1024 * 1024, minimum=4096),
+        spool_max_bytes=_env_int("HIMALIA_SPOOL_MAX_BYTES", 1024 * 1024 * 1024, minimum=4096),
+        spool_drain_timeout_s=_env_int("HIMALIA_SPOOL_DRAIN_TIMEOUT_S", 20, minimum=0),
+        alerts_enabled=_env_bool("HIMALIA_ALERTS_ENABLED", True),
+        alerts_tick_ms=_env_int("HIMALIA_ALERTS_TICK_MS", 1000, minimum=50),
+        http_max_connections=_env_int("HIMALIA_HTTP_MAX_CONNECTIONS", 64),
+        http_max_per_host=_env_int("HIMALIA_HTTP_MAX_PER_HOST", 4),
+        rtsp_max_streams=_env_int("HIMALIA_RTSP_MAX_STREAMS", 16),
+        rtsp_idle_s=_env_int("HIMALIA_RTSP_IDLE_S", 120),
+        rtsp_buffer_frames=_env_int("HIMALIA_RTSP_BUFFER_FRAMES", 2),
+        image_dir=os.getenv("HIMALIA_IMAGE_DIR", "/data/images").strip(),
+        image_store_enabled=_env_bool("HIMALIA_IMAGE_STORE_ENABLED", True),
+        image_dedupe_perceptual=_env_bool("HIMALIA_IMAGE_DEDUPE_PERCEPTUAL", False),
+        image_phash_threshold=_env_int("HIMALIA_IMAGE_PHASH_THRESHOLD", 4, minimum=0),
+        change_gate_enabled=_env_bool("HIMALIA_CHANGE_GATE_ENABLED", True),
+        change_gate_threshold=_env_float("HIMALIA_CHANGE_GATE_THRESHOLD", 3.0),
+        change_gate_size=_env_int("HIMALIA_CHANGE_GATE_SIZE", 32, minimum=4),
+        change_gate_roi=os.getenv("HIMALIA_CHANGE_GATE_ROI", "").strip(),
+        change_gate_max_age_s=_env_int("HIMALIA_CHANGE_GATE_MAX_AGE_S", 900, minimum=0),
+        inference_backend=_env_choice("HIMALIA_INFERENCE_BACKEND", "NONE", {"NONE", "OLLAMA", "STUB"}).lower(),
+        inference_max_batch=_env_int("HIMALIA_INFERENCE_MAX_BATCH", 8),
+        inference_max_wait_ms=_env_int("HIMALIA_INFERENCE_MAX_WAIT_MS", 250, minimum=0),
+        inference_max_queue=_env_int("HIMALIA_INFERENCE_MAX_QUEUE", 256),
+        inference_workers=_env_int("HIMALIA_INFERENCE_WORKERS", 1),
+        ollama_url=os.getenv("HIMALIA_OLLAMA_URL", "http://ollama:11434").strip(),
+        ollama_model=os.getenv("HIMALIA_OLLAMA_MODEL", "llava").strip(),
+        ollama_timeout_s=_env_int("HIMALIA_OLLAMA_TIMEOUT_S", 120),
+        response_cache_enabled=_env_bool("HIMALIA_RESPONSE_CACHE_ENABLED", True),
+        response_cache_max_entries=_env_int("HIMALIA_RESPONSE_CACHE_MAX_ENTRIES", 512),
+        response_cache_max_bytes=_env_int("HIMALIA_RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024),
+        stream_poll_ms=_env_int("HIMALIA_STREAM_POLL_MS", 500, minimum=10),
+        stream_max_buffer=_env_int("HIMALIA_STREAM_MAX_BUFFER", 1000),
+        stream_max_clients=_env_int("HIMALIA_STREAM_MAX_CLIENTS", _default_stream_max_clients(), minimum=0),
+        stream_keepalive_s=_env_int("HIMALIA_STREAM_KEEPALIVE_S", 15),
+        bulk_max_rows=_env_int("HIMALIA_BULK_MAX_ROWS", 50000),
+        rollup_interval_s=_env_int("HIMALIA_ROLLUP_INTERVAL_S", 60),
+        rollup_chunk_size=_env_int("HIMALIA_ROLLUP_CHUNK_SIZE", 5000),
+        retention_raw_days=_env_int("HIMALIA_RETENTION_RAW_DAYS", 30, minimum=0),
+        retention_rollup_days=_env_int("HIMALIA_RETENTION_ROLLUP_DAYS", 365, minimum=0),
+        retention_images=_env_choice("HIMALIA_RETENTION_IMAGES", "ALL", {"ALL", "FAILED", "NONE"}).lower(),
+        retention_image_days=_env_int("HIMALIA_RETENTION_IMAGE_DAYS", 7, minimum=0),
+        retention_interval_s=_env_int("HIMALIA_RETENTION_INTERVAL_S", 3600),
+        retention_chunk_size=_env_int("HIMALIA_RETENTION_CHUNK_SIZE", 500),
+        retention_orphan_grace_s=_env_int("HIMALIA_RETENTION_ORPHAN_GRACE_S", 3600, minimum=0),
     )
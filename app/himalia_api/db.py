@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -11,25 +11,113 @@ from .config import Settings
 
 
 _engine: Optional[Engine] = None
+_read_engine: Optional[Engine] = None
 _SessionLocal: Optional[sessionmaker] = None
+_ReadSessionLocal: Optional[sessionmaker] = None
+
+
+def _is_memory_sqlite(db_url: str) -> bool:
+    return db_url in {"sqlite:", "sqlite://", "sqlite:///:memory:"} or "mode=memory" in db_url
+
+
+def sqlite_pragmas(settings: Settings, *, read_only: bool = False) -> List[str]:
+    """Connection-level PRAGMAs applied to every new SQLite connection.
+
+    WAL lets readers run alongside the single writer; synchronous=NORMAL is
+    durable across application crashes in WAL mode and only fsyncs at checkpoints.
+    auto_vacuum=INCREMENTAL only takes effect on a brand-new file (before the first
+    table), letting retention hand freed pages back with ``incremental_vacuum``.
+    """
+    pragmas = [] if read_only else ["PRAGMA auto_vacuum=INCREMENTAL"]
+    pragmas += [
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+        "PRAGMA foreign_keys=ON",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def _install_pragmas(engine: Engine, pragmas: List[str]) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cur.execute(pragma)
+        finally:
+            cur.close()
 
 
 def init_db(settings: Settings) -> None:
-    """Initialize global SQLAlchemy engine/session factory."""
-    global _engine, _SessionLocal
-
-    connect_args = {}
-    if settings.db_url.startswith("sqlite:"):
+    """Initialize global SQLAlchemy engines/session factories.
+
+    For file-backed SQLite there are two engines on the same file:
+      - writer: a single pooled connection, so writes in this process queue in
+        the pool instead of contending for the SQLite write lock;
+      - reader: a small pool of ``query_only`` connections used by GET requests,
+        which in WAL mode never wait on the writer.
+    Other databases (and in-memory SQLite) share one engine for both roles.
+    """
+    global _engine, _read_engine, _SessionLocal, _ReadSessionLocal
+
+    dispose_engines()
+
+    is_sqlite = settings.db_url.startswith("sqlite:")
+    connect_args: Dict[str, Any] = {}
+    if is_sqlite:
         # Needed for multithreaded Flask dev server access.
         connect_args = {"check_same_thread": False}
 
-    _engine = create_engine(
-        settings.db_url,
-        future=True,
-        pool_pre_ping=True,
-        connect_args=connect_args,
-    )
+    if is_sqlite and not _is_memory_sqlite(settings.db_url):
+        _engine = create_engine(
+            settings.db_url,
+            future=True,
+            pool_pre_ping=True,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=max(1.0, settings.sqlite_busy_timeout_ms / 1000.0),
+            connect_args=connect_args,
+        )
+        _install_pragmas(_engine, sqlite_pragmas(settings))
+
+        _read_engine = create_engine(
+            settings.db_url,
+            future=True,
+            pool_pre_ping=True,
+            pool_size=settings.db_read_pool_size,
+            max_overflow=settings.db_read_pool_size,
+            connect_args=connect_args,
+        )
+        _install_pragmas(_read_engine, sqlite_pragmas(settings, read_only=True))
+    else:
+        _engine = create_engine(
+            settings.db_url,
+            future=True,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+        )
+        if is_sqlite:
+            _install_pragmas(_engine, sqlite_pragmas(settings))
+        _read_engine = _engine
+
     _SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False, future=True)
+    _ReadSessionLocal = sessionmaker(bind=_read_engine, autoflush=False, autocommit=False, future=True)
+
+
+def dispose_engines(*, close: bool = True) -> None:
+    """Drop pooled connections.
+
+    After ``fork`` pass ``close=False``: the child must not close (or reuse) sockets
+    and file handles inherited from the parent; it simply starts a fresh pool.
+    """
+    for engine in {id(e): e for e in (_engine, _read_engine) if e is not None}.values():
+        engine.dispose(close=close)
 
 
 def get_engine() -> Engine:
@@ -38,12 +126,25 @@ def get_engine() -> Engine:
     return _engine
 
 
+def get_read_engine() -> Engine:
+    if _read_engine is None:
+        raise RuntimeError("DB engine not initialized")
+    return _read_engine
+
+
 def get_session() -> Session:
     if _SessionLocal is None:
         raise RuntimeError("DB session factory not initialized")
     return _SessionLocal()
 
 
+def get_read_session() -> Session:
+    """Session bound to the read-only engine; use for GET handlers and reports."""
+    if _ReadSessionLocal is None:
+        raise RuntimeError("DB session factory not initialized")
+    return _ReadSessionLocal()
+
+
 @contextmanager
 def session_scope() -> Iterator[Session]:
     """Provide a transactional scope around a series of operations."""
@@ -58,10 +159,21 @@ def session_scope() -> Iterator[Session]:
         session.close()
 
 
+@contextmanager
+def read_session_scope() -> Iterator[Session]:
+    """Read-only counterpart of ``session_scope`` (never commits)."""
+    session = get_read_session()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
 def ping_db() -> bool:
     """Lightweight connectivity check."""
     try:
-        engine = get_engine()
+        engine = get_read_engine()
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         return True
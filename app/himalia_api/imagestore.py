@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Decodes image bytes to a 2-D grayscale array (anything numpy can average).
+Decoder = Callable[[bytes], Any]
+
+_TMP_DIR = ".tmp"
+
+
+def _extension(data: bytes) -> str:
+    if data[:3] == b"\xff\xd8\xff":
+        return ".jpg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return ".png"
+    return ".bin"
+
+
+def decode_gray_cv2(data: bytes) -> Any:
+    """Decode to grayscale at 1/8 scale; the JPEG decoder skips most of the work."""
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        raise ValueError("undecodable image")
+    return img
+
+
+def dhash(gray: Any, size: int = 8) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 area-averaged grid."""
+    import numpy as np
+
+    a = np.asarray(gray, dtype=np.float32)
+    if a.ndim != 2 or a.shape[0] < size or a.shape[1] < size + 1:
+        raise ValueError("image too small to hash")
+    rows = np.array_split(a, size, axis=0)
+    grid = np.array([[block.mean() for block in np.array_split(r, size + 1, axis=1)] for r in rows])
+    bits = (grid[:, 1:] > grid[:, :-1]).flatten()
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    path: str  # relative to the store root, e.g. "ab/cd/abcd....jpg"
+    sha256: Optional[str]
+    written: bool  # False when deduplicated or skipped as visually unchanged
+
+
+class ImageStore:
+    """Content-addressed image files under ``root``.
+
+    Files are named by the SHA-256 of their bytes and sharded two levels deep
+    (``ab/cd/abcd….jpg``), so a static scene producing byte-identical frames is
+    stored once and referenced by many readings. Writes go to a temp file in the
+    same filesystem and are published with ``os.replace``, so a reader (or a
+    crash) never sees a partial file. Like the database's ``synchronous=NORMAL``,
+    files are not fsynced: a power cut may lose the newest image, never corrupt one.
+
+    With ``perceptual=True`` a frame whose dHash is within ``phash_threshold``
+    bits of the device's previous stored frame is not written at all; the reading
+    reuses the previous image.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        perceptual: bool = False,
+        phash_threshold: int = 4,
+        decoder: Decoder = decode_gray_cv2,
+    ) -> None:
+        self.root = Path(root).resolve()
+        self._perceptual = perceptual
+        self._threshold = phash_threshold
+        self._decoder = decoder
+        self._lock = threading.Lock()
+        self._last: Dict[str, tuple[int, str]] = {}  # device id -> (dhash, path)
+        self._stats = {"writes": 0, "deduplicated": 0, "unchanged": 0, "bytes_written": 0, "bytes_saved": 0}
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def put(self, data: bytes, *, device_id: Optional[str] = None) -> StoredImage:
+        phash = self._phash(data) if self._perceptual and device_id is not None else None
+        if phash is not None:
+            with self._lock:
+                last = self._last.get(device_id)
+            if last is not None and bin(phash ^ last[0]).count("1") <= self._threshold:
+                # Refresh mtime like a byte-level dedupe; a missing file was pruned by retention.
+                try:
+                    os.utime(self.root / last[1])
+                except FileNotFoundError:
+                    pass
+                else:
+                    self._count(unchanged=1, bytes_saved=len(data))
+                    return StoredImage(path=last[1], sha256=None, written=False)
+
+        digest = hashlib.sha256(data).hexdigest()
+        rel = f"{digest[:2]}/{digest[2:4]}/{digest}{_extension(data)}"
+        target = self.root / rel
+        written = False
+        if target.exists():
+            # Refresh mtime so the orphan sweep's grace period covers the new reference.
+            try:
+                os.utime(target)
+            except OSError:
+                pass
+            self._count(deduplicated=1, bytes_saved=len(data))
+        else:
+            self._write_atomic(target, data)
+            written = True
+            self._count(writes=1, bytes_written=len(data))
+
+        if phash is not None:
+            with self._lock:
+                self._last[device_id] = (phash, rel)
+        return StoredImage(path=rel, sha256=digest, written=written)
+
+    def forget(self, device_id: str) -> None:
+        with self._lock:
+            self._last.pop(device_id, None)
+
+    def _write_atomic(self, target: Path, data: bytes) -> None:
+        tmp_dir = self.root / _TMP_DIR
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _phash(self, data: bytes) -> Optional[int]:
+        try:
+            return dhash(self._decoder(data))
+        except ImportError:
+            log.warning("perceptual image dedupe disabled: opencv is not installed")
+            self._perceptual = False
+        except Exception:
+            log.debug("could not hash frame", exc_info=True)
+        return None
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self._stats[k] += v
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    # ---------------------------
+    # Paths (also used by retention)
+    # ---------------------------
+    def resolve(self, image_path: str) -> Optional[Path]:
+        """Absolute path for a stored ``Reading.image_path``; None if outside the store."""
+        p = Path(image_path)
+        if not p.is_absolute():
+            p = self.root / p
+        p = p.resolve()
+        return p if p.is_relative_to(self.root) else None
+
+    def stored_forms(self, path: Path) -> List[str]:
+        """Values a reading may hold for ``path``: absolute, or relative to the root."""
+        return [str(path), path.relative_to(self.root).as_posix()]
+
+    def walk(self) -> Iterator[Path]:
+        if not self.root.is_dir():
+            return
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                yield Path(dirpath) / name
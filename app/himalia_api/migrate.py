@@ -1,7 +1,60 @@
 from __future__ import annotations
 
-import os
+import re
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+APP_DIR = Path(__file__).resolve().parent.parent  # .../app
+VERSIONS_DIR = APP_DIR / "alembic" / "versions"
+
+_REVISION_RE = re.compile(r"""^revision\s*=\s*["']([0-9a-zA-Z_]+)["']""", re.M)
+_DOWN_REVISION_RE = re.compile(r"""^down_revision\s*=\s*(?:["']([0-9a-zA-Z_]+)["']|None)""", re.M)
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> Optional[str]:
+    """Head of the migration chain, read from the version files without importing alembic.
+
+    Returns None when the chain cannot be determined (missing files, or more than
+    one head), in which case callers fall back to a full upgrade.
+    """
+    revisions = set()
+    parents = set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        rev = _REVISION_RE.search(source)
+        if rev is None:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down is not None and down.group(1):
+            parents.add(down.group(1))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def current_revision(db_url: str) -> Optional[str]:
+    """Revision stamped in ``alembic_version``; None for an unmigrated database."""
+    engine = create_engine(db_url, poolclass=NullPool)
+    try:
+        with engine.connect() as conn:
+            has_table = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alembic_version'")
+            ).first()
+            if has_table is None:
+                return None
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    finally:
+        engine.dispose()
+
+
+def is_at_head(db_url: str) -> bool:
+    head = head_revision()
+    return head is not None and current_revision(db_url) == head
 
 
 def upgrade_head(db_url: str) -> None:
@@ -21,14 +74,30 @@ def upgrade_head(db_url: str) -> None:
     except Exception as e:
         raise RuntimeError("alembic is not installed") from e
 
-    app_dir = Path(__file__).resolve().parent.parent  # .../app
-    cfg_path = app_dir / "alembic.ini"
+    cfg_path = APP_DIR / "alembic.ini"
     if not cfg_path.exists():
         raise RuntimeError(f"Missing alembic.ini at {cfg_path}")
 
     cfg = Config(str(cfg_path))
 
-    # Ensure alembic uses the provided DB URL
-    os.environ["HIMALIA_DB_URL"] = db_url
+    # Hand the URL to env.py directly instead of through the process environment.
+    cfg.attributes["db_url"] = db_url
 
     command.upgrade(cfg, "head")
+
+
+def ensure_schema(db_url: str) -> bool:
+    """Upgrade to head unless the database is already there; True if alembic ran.
+
+    The version check reads one row and a directory of small files, so the
+    common restart (schema already current) never imports alembic.
+    """
+    if not db_url.startswith("sqlite:"):
+        raise RuntimeError(f"Refusing to auto-migrate non-sqlite DB URL: {db_url}")
+    try:
+        if is_at_head(db_url):
+            return False
+    except Exception:
+        pass  # unreadable version table: let alembic decide
+    upgrade_head(db_url)
+    return True
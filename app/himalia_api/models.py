@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import datetime as dt
+import math
+from typing import Any, Optional
 
 from sqlalchemy import (
     Boolean,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
@@ -23,8 +27,48 @@ def utcnow() -> dt.datetime:
     return dt.datetime.now(dt.timezone.utc)
 
 
+_EPOCH = dt.datetime(1970, 1, 1)
+_MS = dt.timedelta(milliseconds=1)
+
+
+def epoch_ms(value: dt.datetime) -> int:
+    """Milliseconds since the Unix epoch (floored); naive values are taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MS
+
+
+def from_epoch_ms(ms: int) -> dt.datetime:
+    """Naive UTC datetime for ``epoch_ms`` output."""
+    return _EPOCH + ms * _MS
+
+
+def parse_number(value: Optional[str]) -> Optional[float]:
+    """Numeric interpretation of a reading's text value, or None."""
+    if value is None:
+        return None
+    try:
+        n = float(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    return n if math.isfinite(n) else None
+
+
+def _default_captured_ms(ctx: Any) -> int:
+    captured_at = ctx.get_current_parameters().get("captured_at")
+    return epoch_ms(captured_at if captured_at is not None else utcnow())
+
+
+def _default_value_num(ctx: Any) -> Optional[float]:
+    return parse_number(ctx.get_current_parameters().get("value"))
+
+
 class Device(Base):
     __tablename__ = "devices"
+    __table_args__ = (
+        Index("ix_devices_created_at_id", "created_at", "id"),
+        Index("ix_devices_type_created_at_id", "type", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -57,15 +101,46 @@ class Device(Base):
     )
 
 
+class DeviceTag(Base):
+    """One row per (tag, device): the inverted index behind tag filters.
+
+    ``Device.tags`` stays the source of truth for API output; this table is
+    rewritten from it by every write path (see ``tags.set_device_tags``).
+    """
+
+    __tablename__ = "device_tags"
+
+    # Primary key leads with the tag, so "devices tagged X" is an index range scan.
+    tag: Mapped[str] = mapped_column(String(200), primary_key=True)
+    device_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
 class Reading(Base):
     __tablename__ = "readings"
+    __table_args__ = (
+        Index("ix_readings_device_id_captured_ms", "device_id", "captured_ms"),
+        Index("ix_readings_captured_ms", "captured_ms"),
+        Index(
+            "ix_readings_image_path",
+            "image_path",
+            sqlite_where=text("image_path IS NOT NULL"),
+        ),
+        # Ids are cursors (rollup watermark, stream tailer): never reuse them.
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     device_id: Mapped[str] = mapped_column(String(36), ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
 
     captured_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    # Integer time key for range scans and bucketing; ``captured_at`` stays for display.
+    # Both derived columns are filled from ``captured_at``/``value`` on every INSERT.
+    captured_ms: Mapped[int | None] = mapped_column(Integer, nullable=True, default=_default_captured_ms)
 
     value: Mapped[str | None] = mapped_column(Text, nullable=True)
+    value_num: Mapped[float | None] = mapped_column(Float, nullable=True, default=_default_value_num)
     unit: Mapped[str | None] = mapped_column(String(32), nullable=True)
     confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
 
@@ -76,3 +151,150 @@ class Reading(Base):
     image_path: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     device: Mapped[Device] = relationship(back_populates="readings")
+
+
+class ReadingRollup(Base):
+    """Per-device aggregate of readings over one time bucket (1m, 1h or 1d)."""
+
+    __tablename__ = "reading_rollups"
+
+    device_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    resolution: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket_start: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    success_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    num_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    num_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    num_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    num_sum: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class RollupState(Base):
+    """Watermark of the incremental rollup job (highest processed readings.id)."""
+
+    __tablename__ = "rollup_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_reading_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class RetentionPolicy(Base):
+    """Per-device retention override; NULL columns inherit the global policy."""
+
+    __tablename__ = "retention_policies"
+
+    device_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    raw_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    rollup_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    images: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    image_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class TableGeneration(Base):
+    """Change counter per logical table, bumped in the same transaction as the write.
+
+    Response caches and ETags key on these values, so every process (API workers,
+    poller) sees the same invalidation without any shared memory.
+    """
+
+    __tablename__ = "table_generations"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SpoolCheckpoint(Base):
+    """Byte offset of the poller spool segment replayed so far.
+
+    Written in the same transaction as the readings it covers, so a replay
+    interrupted between commit and unlinking the segment resumes past them
+    instead of inserting them twice.
+    """
+
+    __tablename__ = "spool_checkpoints"
+
+    segment: Mapped[str] = mapped_column(String(64), primary_key=True)
+    offset: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class AlertRule(Base):
+    """Condition evaluated by the poller's alert engine as readings are ingested.
+
+    Scope: one device (``device_id``), every device carrying ``tag``, or every
+    device when both are NULL. ``kind`` selects which parameter columns apply:
+    ``threshold`` (``operator``, ``threshold``), ``stale`` (``stale_s``) or
+    ``error_streak`` (``streak``).
+    """
+
+    __tablename__ = "alert_rules"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+
+    device_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("devices.id", ondelete="CASCADE"), nullable=True
+    )
+    tag: Mapped[str | None] = mapped_column(String(200), nullable=True)
+
+    operator: Mapped[str | None] = mapped_column(String(2), nullable=True)
+    threshold: Mapped[float | None] = mapped_column(Float, nullable=True)
+    stale_s: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    streak: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class AlertEvent(Base):
+    """A rule changing state (``firing`` or ``resolved``) for one device."""
+
+    __tablename__ = "alert_events"
+    __table_args__ = (
+        Index("ix_alert_events_rule_id_device_id_id", "rule_id", "device_id", "id"),
+        # Ids are cursors (stream tailer, event pagination): never reuse them.
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("alert_rules.id", ondelete="CASCADE"), nullable=False)
+    device_id: Mapped[str] = mapped_column(String(36), ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False)
+    at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    value: Mapped[str | None] = mapped_column(Text, nullable=True)
+    message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class PollerWorker(Base):
+    """A live poller process, kept alive by its heartbeat.
+
+    Workers whose ``heartbeat_ms`` is older than the lease length are treated
+    as dead and dropped from the consistent-hash ring by the others.
+    """
+
+    __tablename__ = "poller_workers"
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    started_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    heartbeat_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class DeviceLease(Base):
+    """Which poller worker may poll a device, until ``expires_ms`` (epoch ms)."""
+
+    __tablename__ = "device_leases"
+    __table_args__ = (Index("ix_device_leases_worker_id", "worker_id"),)
+
+    device_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    worker_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    expires_ms: Mapped[int] = mapped_column(Integer, nullable=False)
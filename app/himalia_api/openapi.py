@@ -1,5 +1,46 @@
 from __future__ import annotations
 
+from .validation import DEVICE_SCHEMA
+
+
+def _query(name: str, type_: str, description: str) -> dict:
+    return {"name": name, "in": "query", "required": False, "schema": {"type": type_}, "description": description}
+
+
+_READINGS_QUERY = [
+    _query("since", "string", "Inclusive lower bound on captured_at (ISO 8601)"),
+    _query("until", "string", "Exclusive upper bound on captured_at (ISO 8601)"),
+    _query("success", "boolean", "Filter on success"),
+    _query("source", "string", "Filter on source"),
+    _query("tag", "string", "Only devices with this tag (repeatable or comma-separated)"),
+    _query("tag_mode", "string", "all (default: every tag must match) or any"),
+    _query("order", "string", "desc (default) or asc"),
+    _query("limit", "integer", "Page size, 1-1000 (default 100)"),
+    _query("cursor", "string", "next_cursor from the previous page"),
+]
+
+
+def _json_body(schema: dict) -> dict:
+    return {"required": True, "content": {"application/json": {"schema": schema}}}
+
+
+def _bulk_body() -> dict:
+    row = DEVICE_SCHEMA.json_schema(mode="create")
+    row["properties"] = {"id": {"type": "string", "maxLength": 36, "description": "Existing or new device id"}, **row["properties"]}
+    # Exports carry read-only fields (created_at, last_error, ...); they are ignored.
+    row["additionalProperties"] = True
+    return {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": row}},
+            "application/x-ndjson": {"schema": {"type": "string", "description": "One device object per line"}},
+            "text/csv": {"schema": {"type": "string", "description": "Header row of field names; tags separated by ';'"}},
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {
+                "schema": {"type": "string", "format": "binary"}
+            },
+        },
+    }
+
 
 def build_openapi() -> dict:
     # Minimal draft; expand as endpoints are added.
@@ -17,14 +58,160 @@ def build_openapi() -> dict:
                 }
             },
             "/api/v1/devices": {
-                "get": {"summary": "List devices", "responses": {"200": {"description": "OK"}}},
-                "post": {"summary": "Create device", "responses": {"201": {"description": "Created"}}},
+                "get": {
+                    "summary": "List devices (keyset paginated, creation order)",
+                    "parameters": [
+                        _query("type", "string", "Filter on device type"),
+                        _query("enabled", "boolean", "Filter on enabled"),
+                        _query("tag", "string", "Only devices with this tag (repeatable or comma-separated)"),
+                        _query("tag_mode", "string", "all (default: every tag must match) or any"),
+                        _query("has_error", "boolean", "true: last_error is set; false: it is not"),
+                        _query("fields", "string", "Comma-separated output fields"),
+                        _query("limit", "integer", "Page size, 1-1000 (default 100)"),
+                        _query("cursor", "string", "next_cursor from the previous page"),
+                    ],
+                    "responses": {"200": {"description": "OK"}, "304": {"description": "Not modified (If-None-Match)"}, "400": {"description": "Invalid query"}},
+                },
+                "post": {
+                    "summary": "Create device",
+                    "requestBody": _json_body(DEVICE_SCHEMA.json_schema(mode="create")),
+                    "responses": {"201": {"description": "Created"}, "400": {"description": "Invalid body"}},
+                },
+            },
+            "/api/v1/devices:bulk": {
+                "post": {
+                    "summary": "Bulk create/upsert devices from JSON, NDJSON, CSV or XLSX",
+                    "requestBody": _bulk_body(),
+                    "parameters": [
+                        _query("format", "string", "json, ndjson, csv or xlsx (default: from Content-Type)"),
+                        _query("upsert", "boolean", "Replace devices whose id already exists (default false)"),
+                        _query("atomic", "boolean", "Write nothing if any row is invalid (default false)"),
+                    ],
+                    "responses": {"200": {"description": "Counts and per-row errors"}, "400": {"description": "Unparseable body, or invalid rows with atomic=true"}},
+                }
+            },
+            "/api/v1/devices:export": {
+                "get": {
+                    "summary": "Stream all devices as JSON, NDJSON, CSV or XLSX",
+                    "parameters": [_query("format", "string", "json (default), ndjson, csv or xlsx")],
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid query"}},
+                }
             },
             "/api/v1/devices/{id}": {
-                "get": {"summary": "Get device", "responses": {"200": {"description": "OK"}, "404": {"description": "Not found"}}},
-                "put": {"summary": "Replace device", "responses": {"200": {"description": "OK"}}},
-                "patch": {"summary": "Update device", "responses": {"200": {"description": "OK"}}},
+                "get": {"summary": "Get device", "responses": {"200": {"description": "OK"}, "304": {"description": "Not modified (If-None-Match)"}, "404": {"description": "Not found"}}},
+                "put": {
+                    "summary": "Replace device",
+                    "requestBody": _json_body(DEVICE_SCHEMA.json_schema(mode="put")),
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid body"}, "404": {"description": "Not found"}},
+                },
+                "patch": {
+                    "summary": "Update device",
+                    "requestBody": _json_body(DEVICE_SCHEMA.json_schema(mode="patch")),
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid body"}, "404": {"description": "Not found"}},
+                },
                 "delete": {"summary": "Delete device", "responses": {"204": {"description": "No content"}}},
             },
+            "/api/v1/devices/{id}/readings": {
+                "get": {
+                    "summary": "List a device's readings (keyset paginated, newest first)",
+                    "parameters": _READINGS_QUERY,
+                    "responses": {"200": {"description": "OK"}, "304": {"description": "Not modified (If-None-Match)"}, "400": {"description": "Invalid query"}, "404": {"description": "Not found"}},
+                }
+            },
+            "/api/v1/readings": {
+                "get": {
+                    "summary": "List readings across all devices (keyset paginated, newest first)",
+                    "parameters": [_query("device_id", "string", "Only this device")] + _READINGS_QUERY,
+                    "responses": {"200": {"description": "OK"}, "304": {"description": "Not modified (If-None-Match)"}, "400": {"description": "Invalid query"}},
+                }
+            },
+            "/api/v1/readings/export": {
+                "get": {
+                    "summary": "Stream readings as CSV, XLSX or Parquet (adds parsed value_num)",
+                    "parameters": [
+                        _query("format", "string", "csv (default), xlsx or parquet (needs pyarrow)"),
+                        _query("device_id", "string", "Only these devices (repeatable)"),
+                        _query("tag", "string", "Only devices with this tag (repeatable or comma-separated)"),
+                        _query("tag_mode", "string", "all (default: every tag must match) or any"),
+                        _query("since", "string", "Inclusive lower bound on captured_at (ISO 8601)"),
+                        _query("until", "string", "Exclusive upper bound on captured_at (ISO 8601)"),
+                        _query("success", "boolean", "Filter on success"),
+                    ],
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid query"}, "501": {"description": "Format not available in this build"}},
+                }
+            },
+            "/api/v1/devices/{id}/series": {
+                "get": {
+                    "summary": "Downsampled time series from the 1m/1h/1d reading rollups",
+                    "parameters": [
+                        _query("since", "string", "Inclusive lower bound (ISO 8601, default until - 24h)"),
+                        _query("until", "string", "Exclusive upper bound (ISO 8601, default now)"),
+                        _query("max_points", "integer", "Point budget, 1-10000 (default 500)"),
+                        _query("resolution", "string", "auto (default), 1m, 1h or 1d"),
+                    ],
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid query"}, "404": {"description": "Not found"}},
+                }
+            },
+            "/api/v1/devices/{id}/retention": {
+                "get": {"summary": "Device retention override and effective policy", "responses": {"200": {"description": "OK"}, "404": {"description": "Not found"}}},
+                "put": {"summary": "Set device retention override (null fields inherit)", "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid body"}, "404": {"description": "Not found"}}},
+                "delete": {"summary": "Remove device retention override", "responses": {"204": {"description": "No content"}, "404": {"description": "Not found"}}},
+            },
+            "/api/v1/retention": {
+                "get": {"summary": "Global retention policy", "responses": {"200": {"description": "OK"}}},
+            },
+            "/api/v1/alert-rules": {
+                "get": {"summary": "List alert rules", "responses": {"200": {"description": "OK"}}},
+                "post": {
+                    "summary": "Create an alert rule (threshold, stale or error_streak; per device, per tag or global)",
+                    "responses": {"201": {"description": "Created"}, "400": {"description": "Invalid body"}},
+                },
+            },
+            "/api/v1/alert-rules/{id}": {
+                "get": {"summary": "Get an alert rule", "responses": {"200": {"description": "OK"}, "404": {"description": "Not found"}}},
+                "put": {"summary": "Replace an alert rule", "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid body"}, "404": {"description": "Not found"}}},
+                "delete": {"summary": "Delete an alert rule and its events", "responses": {"204": {"description": "No content"}, "404": {"description": "Not found"}}},
+            },
+            "/api/v1/alerts/active": {
+                "get": {"summary": "Currently firing (rule, device) pairs", "responses": {"200": {"description": "OK"}}},
+            },
+            "/api/v1/alerts/events": {
+                "get": {
+                    "summary": "Alert state transitions, newest first (keyset pagination)",
+                    "parameters": [
+                        _query("rule_id", "integer", "Only this rule"),
+                        _query("device_id", "string", "Only this device"),
+                        _query("state", "string", "firing or resolved"),
+                        _query("limit", "integer", "Page size, 1-1000 (default 100)"),
+                        _query("cursor", "string", "next_cursor from the previous page"),
+                    ],
+                    "responses": {"200": {"description": "OK"}, "400": {"description": "Invalid query"}},
+                }
+            },
+            "/api/v1/poller/stats": {
+                "get": {
+                    "summary": "Poller and ingestion metrics",
+                    "responses": {"200": {"description": "OK"}, "503": {"description": "Poller not reporting"}},
+                }
+            },
+            "/api/v1/stream": {
+                "get": {
+                    "summary": "Server-Sent Events: new readings, device poll status and alert transitions as they are ingested",
+                    "parameters": [
+                        _query("device_id", "string", "Only this device (repeatable)"),
+                        _query("tag", "string", "Only devices with this tag (repeatable; any may match)"),
+                    ],
+                    "responses": {"200": {"description": "text/event-stream"}, "503": {"description": "Too many subscribers"}},
+                }
+            },
+            "/api/v1/stream/stats": {
+                "get": {"summary": "Stream subscribers and fan-out counters (for the worker that answers)", "responses": {"200": {"description": "OK"}}},
+            },
+            "/api/v1/cache/stats": {
+                "get": {
+                    "summary": "Response cache size and hit rate (for the worker that answers)",
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
         },
     }
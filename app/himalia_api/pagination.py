@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class QueryParams:
+    """Parse query-string parameters, collecting errors instead of raising.
+
+    Handlers call the typed getters, then return a 400 if ``errors`` is non-empty,
+    mirroring the ``validation_error`` shape used for request bodies.
+    """
+
+    def __init__(self, args: Mapping[str, str]) -> None:
+        self._args = args
+        self.errors: List[str] = []
+
+    def str(self, name: str) -> Optional[str]:
+        v = self._args.get(name)
+        if v is None:
+            return None
+        v = v.strip()
+        return v or None
+
+    def list(self, name: str) -> List[str]:
+        """Repeated (``?tag=a&tag=b``) and/or comma-separated (``?tag=a,b``) values."""
+        getlist = getattr(self._args, "getlist", None)
+        raw = getlist(name) if getlist is not None else [self._args.get(name) or ""]
+        out: List[str] = []
+        for item in raw:
+            out.extend(part.strip() for part in item.split(",") if part.strip())
+        return out
+
+    def bool(self, name: str) -> Optional[bool]:
+        v = self.str(name)
+        if v is None:
+            return None
+        lowered = v.lower()
+        if lowered in {"1", "true", "yes"}:
+            return True
+        if lowered in {"0", "false", "no"}:
+            return False
+        self.errors.append(f"{name} must be true or false")
+        return None
+
+    def int(self, name: str, default: int, *, minimum: int, maximum: int) -> int:
+        v = self.str(name)
+        if v is None:
+            return default
+        try:
+            n = int(v)
+        except ValueError:
+            self.errors.append(f"{name} must be an integer")
+            return default
+        if n < minimum or n > maximum:
+            self.errors.append(f"{name} must be between {minimum} and {maximum}")
+            return default
+        return n
+
+    def limit(self) -> int:
+        return self.int("limit", DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+
+    def datetime(self, name: str) -> Optional[dt.datetime]:
+        """ISO 8601 timestamp, normalized to naive UTC (how SQLite stores DateTime)."""
+        v = self.str(name)
+        if v is None:
+            return None
+        try:
+            parsed = dt.datetime.fromisoformat(v)
+        except ValueError:
+            self.errors.append(f"{name} must be an ISO 8601 timestamp")
+            return None
+        return to_naive_utc(parsed)
+
+    def cursor(self, size: int) -> Optional[List[Any]]:
+        v = self.str("cursor")
+        if v is None:
+            return None
+        try:
+            parts = decode_cursor(v)
+        except ValueError:
+            parts = None
+        if not isinstance(parts, list) or len(parts) != size:
+            self.errors.append("cursor is invalid")
+            return None
+        return parts
+
+
+def to_naive_utc(value: dt.datetime) -> dt.datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(parts: List[Any]) -> str:
+    raw = json.dumps(parts, separators=(",", ":"), default=_json_default).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Any:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def _json_default(v: Any) -> Any:
+    if isinstance(v, dt.datetime):
+        return v.isoformat()
+    raise TypeError(f"not JSON serializable: {type(v).__name__}")
+
+
+def stream_page(
+    rows: Iterable[Any],
+    *,
+    limit: int,
+    to_dict: Callable[[Any], Dict[str, Any]],
+    cursor_of: Callable[[Any], List[Any]],
+) -> Iterator[str]:
+    """Yield a ``{"items": [...], "count": n, "next_cursor": ...}`` JSON document.
+
+    ``rows`` should be the result of a query with ``LIMIT limit + 1``; the extra
+    row only signals that another page exists and is not emitted. Items are
+    serialized one at a time, so the page is never held in memory as a list.
+    """
+    yield '{"items":['
+    count = 0
+    last = None
+    has_more = False
+    for row in rows:
+        if count == limit:
+            has_more = True
+            break
+        if count:
+            yield ","
+        yield json.dumps(to_dict(row), separators=(",", ":"))
+        last = row
+        count += 1
+    next_cursor = encode_cursor(cursor_of(last)) if has_more and last is not None else None
+    yield "],"
+    yield f'"count":{count},"next_cursor":{json.dumps(next_cursor)}}}'
@@ -0,0 +1,7 @@
+"""Long-lived capture engine that polls enabled devices and records readings."""
+
+from .engine import CaptureEngine
+from .scheduler import PollScheduler
+from .specs import DeviceSpec, Extraction, PollResult
+
+__all__ = ["CaptureEngine", "DeviceSpec", "Extraction", "PollResult", "PollScheduler"]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..imagestore import Decoder, decode_gray_cv2
+from .specs import Extraction
+
+# Region of interest as fractions of the frame: (left, top, right, bottom).
+Roi = Tuple[float, float, float, float]
+FULL_FRAME: Roi = (0.0, 0.0, 1.0, 1.0)
+
+
+def parse_roi(raw: str) -> Roi:
+    """``"x0,y0,x1,y1"`` in 0..1 frame fractions; empty means the full frame."""
+    if not raw.strip():
+        return FULL_FRAME
+    parts = [float(p) for p in raw.split(",")]
+    if len(parts) != 4:
+        raise ValueError("roi must have four comma-separated fractions")
+    x0, y0, x1, y1 = parts
+    if not (0.0 <= x0 < x1 <= 1.0 and 0.0 <= y0 < y1 <= 1.0):
+        raise ValueError("roi must satisfy 0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1")
+    return x0, y0, x1, y1
+
+
+def thumbnail(gray: Any, roi: Roi = FULL_FRAME, size: int = 32) -> np.ndarray:
+    """Crop ``roi`` and area-average it down to at most ``size`` x ``size`` (float32)."""
+    a = np.asarray(gray, dtype=np.float32)
+    if a.ndim != 2:
+        raise ValueError("expected a 2-D grayscale frame")
+    h, w = a.shape
+    x0, y0, x1, y1 = roi
+    a = a[int(y0 * h) : max(int(y1 * h), int(y0 * h) + 1), int(x0 * w) : max(int(x1 * w), int(x0 * w) + 1)]
+    h, w = a.shape
+    th, tw = min(size, h), min(size, w)
+    # Trim to a multiple of the target grid, then mean each block in one reshape.
+    a = a[: (h // th) * th, : (w // tw) * tw]
+    return a.reshape(th, h // th, tw, w // tw).mean(axis=(1, 3))
+
+
+@dataclass
+class _Reference:
+    thumb: np.ndarray
+    extraction: Extraction
+    at: float
+
+
+class ChangeGate:
+    """Skip extraction for frames that match the last processed frame.
+
+    Each device keeps the thumbnail (downscaled grayscale ROI) of the last frame
+    that went through extraction, plus that extraction's result. A new frame whose
+    mean absolute pixel difference to the reference is below ``threshold`` (0-255
+    scale) reuses the stored result instead of calling the extractor. The
+    reference is refreshed at least every ``max_age_s`` so slow drift is caught.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 3.0,
+        size: int = 32,
+        roi: Roi = FULL_FRAME,
+        max_age_s: float = 900.0,
+        decoder: Decoder = decode_gray_cv2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = threshold
+        self._size = size
+        self._roi = roi
+        self._max_age_s = max_age_s
+        self._decoder = decoder
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refs: Dict[str, _Reference] = {}
+        self._processed = 0
+        self._skipped = 0
+
+    def lookup(self, device_id: str, frame: bytes) -> Tuple[Optional[np.ndarray], Optional[Extraction]]:
+        """Thumbnail ``frame``; return it with the reusable extraction if unchanged.
+
+        When the second element is None the caller must extract, then pass the
+        thumbnail and result to ``remember``.
+        """
+        try:
+            thumb: Optional[np.ndarray] = thumbnail(self._decoder(frame), self._roi, self._size)
+        except Exception:
+            thumb = None  # undecodable frame: always extract, never cache
+
+        with self._lock:
+            ref = self._refs.get(device_id)
+            if thumb is not None and ref is not None and self._unchanged(ref, thumb, self._clock()):
+                self._skipped += 1
+                return thumb, ref.extraction
+        return thumb, None
+
+    def remember(self, device_id: str, thumb: Optional[np.ndarray], extraction: Extraction) -> None:
+        with self._lock:
+            self._processed += 1
+            if thumb is not None:
+                self._refs[device_id] = _Reference(thumb=thumb, extraction=extraction, at=self._clock())
+            else:
+                self._refs.pop(device_id, None)
+
+    def run(self, device_id: str, frame: bytes, extract: Callable[[], Extraction]) -> Extraction:
+        """Return the extraction for ``frame``, calling ``extract`` only if it changed."""
+        thumb, reused = self.lookup(device_id, frame)
+        if reused is not None:
+            return reused
+        extraction = extract()
+        self.remember(device_id, thumb, extraction)
+        return extraction
+
+    def _unchanged(self, ref: _Reference, thumb: np.ndarray, now: float) -> bool:
+        if now - ref.at >= self._max_age_s or ref.thumb.shape != thumb.shape:
+            return False
+        return float(np.abs(thumb - ref.thumb).mean()) < self._threshold
+
+    def forget(self, device_id: str) -> None:
+        with self._lock:
+            self._refs.pop(device_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._processed + self._skipped
+            return {
+                "processed": self._processed,
+                "skipped": self._skipped,
+                "skip_ratio": round(self._skipped / total, 4) if total else 0.0,
+            }
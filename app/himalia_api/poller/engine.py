@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from ..alerts import build_alert_engine
+from ..config import Settings
+from ..db import session_scope
+from ..imagestore import ImageStore
+from ..models import Device, utcnow
+from .changegate import FULL_FRAME, ChangeGate, parse_roi
+from .http import SnapshotClient
+from .inference import InferencePool, build_inference_pool
+from .ingest import ReadingWriter
+from .rtsp import RtspGrabberPool
+from .scheduler import PollScheduler
+from .shards import build_coordinator
+from .specs import DeviceSpec, Extraction, PollResult
+from .spool import open_spool
+
+log = logging.getLogger(__name__)
+
+
+Fetcher = Callable[[DeviceSpec], bytes]
+Extractor = Callable[[DeviceSpec, bytes], Extraction]
+
+
+def _describe_error(e: BaseException) -> str:
+    msg = str(e) or type(e).__name__
+    return f"{type(e).__name__}: {msg}"[:1000]
+
+
+def _apply(result: PollResult, extraction: Extraction) -> None:
+    result.value = extraction.value
+    result.unit = extraction.unit
+    result.confidence = extraction.confidence
+
+
+class CaptureEngine:
+    """Poll enabled devices concurrently on their own intervals.
+
+    One engine lives for the whole poller process. Enabled devices are kept in a
+    ``PollScheduler`` (deadline heap with jitter and failure backoff); due devices
+    are fetched on a bounded thread pool and rescheduled when their poll finishes,
+    so a device is never fetched twice at once.
+
+    ``sync_devices`` picks up API changes (POST/PUT/PATCH/DELETE) without a
+    restart: it reads only ``(id, updated_at)`` for enabled devices and loads full
+    rows for the ones that are new or changed.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        fetchers: Optional[Dict[str, Fetcher]] = None,
+        scheduler: Optional[PollScheduler] = None,
+        clock: Callable[[], float] = time.monotonic,
+        extra_stats: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+        extractor: Optional[Extractor] = None,
+        change_gate: Optional[ChangeGate] = None,
+        inference: Optional[InferencePool] = None,
+    ) -> None:
+        self._max_workers = settings.poller_workers
+        self._tick_s = settings.poller_tick_ms / 1000.0
+        self._refresh_s = float(settings.poller_refresh_s)
+        self._http: Optional[SnapshotClient] = None
+        self._rtsp: Optional[RtspGrabberPool] = None
+        if fetchers is None:
+            self._http = SnapshotClient(
+                max_connections=settings.http_max_connections,
+                max_per_host=settings.http_max_per_host,
+            )
+            self._rtsp = RtspGrabberPool(
+                max_streams=settings.rtsp_max_streams,
+                idle_s=settings.rtsp_idle_s,
+                buffer_frames=settings.rtsp_buffer_frames,
+            )
+            fetchers = {
+                "camera_ip_snapshot": self._http.fetch,
+                "camera_rtsp": self._rtsp.fetch,
+            }
+        self._fetchers: Dict[str, Fetcher] = fetchers
+        self._scheduler = scheduler if scheduler is not None else PollScheduler(
+            max_backoff_s=settings.poller_backoff_max_s,
+        )
+        self._clock = clock
+        self._alerts = build_alert_engine(settings)
+        self._shards = build_coordinator(settings)
+        self._writer = ReadingWriter(
+            max_batch=settings.ingest_max_batch,
+            max_delay_ms=settings.ingest_max_delay_ms,
+            max_queue=settings.ingest_max_queue,
+            spool=open_spool(settings),
+            drain_timeout_s=settings.spool_drain_timeout_s,
+            alerts=self._alerts,
+        )
+        self._stats_path = settings.poller_stats_path
+        self._images: Optional[ImageStore] = None
+        if settings.image_store_enabled:
+            self._images = ImageStore(
+                settings.image_dir,
+                perceptual=settings.image_dedupe_perceptual,
+                phash_threshold=settings.image_phash_threshold,
+            )
+        self._extra_stats = dict(extra_stats or {})
+        self._extractor = extractor
+        self._inference = inference if inference is not None else build_inference_pool(settings)
+        self._deferred = 0
+        self._gate = change_gate
+        extracting = extractor is not None or self._inference is not None
+        if self._gate is None and extracting and settings.change_gate_enabled:
+            try:
+                roi = parse_roi(settings.change_gate_roi)
+            except ValueError as e:
+                log.warning("ignoring HIMALIA_CHANGE_GATE_ROI: %s", e)
+                roi = FULL_FRAME
+            self._gate = ChangeGate(
+                threshold=settings.change_gate_threshold,
+                size=settings.change_gate_size,
+                roi=roi,
+                max_age_s=settings.change_gate_max_age_s,
+            )
+
+        self._versions: Dict[str, dt.datetime] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self) -> None:
+        self._writer.start()
+        if self._alerts is not None:
+            self._alerts.start()
+        if self._inference is not None:
+            self._inference.start()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="himalia-poll",
+            )
+
+    def stop(self, *, wait_for_inflight: bool = True) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait_for_inflight, cancel_futures=True)
+        if self._inference is not None:
+            # Drains queued frames first; their readings still go through the writer.
+            self._inference.stop()
+        self._writer.stop()
+        if self._shards is not None:
+            try:
+                with session_scope() as s:
+                    self._shards.leave(s)
+            except Exception:
+                log.exception("failed to release device leases; they expire on their own")
+        if self._alerts is not None:
+            self._alerts.stop()
+        if self._http is not None:
+            self._http.close()
+        if self._rtsp is not None:
+            self._rtsp.close()
+
+    # ---------------------------
+    # Device set
+    # ---------------------------
+    @property
+    def scheduler(self) -> PollScheduler:
+        return self._scheduler
+
+    def sync_devices(self) -> int:
+        """Bring the schedule in line with the DB; returns the number of scheduled devices.
+
+        With sharding only the devices this worker holds a lease on are kept.
+        """
+        with session_scope() as s:
+            current = dict(
+                s.execute(
+                    select(Device.id, Device.updated_at).where(
+                        Device.enabled.is_(True),
+                        Device.type.in_(list(self._fetchers)),
+                    )
+                ).all()
+            )
+            if self._shards is not None:
+                with self._lock:
+                    busy = set(self._inflight)
+                owned = self._shards.claim(s, current, busy=busy)
+                current = {device_id: ts for device_id, ts in current.items() if device_id in owned}
+            stale = [device_id for device_id, ts in current.items() if self._versions.get(device_id) != ts]
+            rows = []
+            if stale:
+                rows = s.execute(select(Device).where(Device.id.in_(stale))).scalars().all()
+            # last_error also records extraction failures of successful captures;
+            # only a poll that captured nothing leaves last_seen_at behind last_poll_at.
+            specs = [
+                (DeviceSpec.from_device(d), d.updated_at, d.last_poll_at is not None and d.last_seen_at != d.last_poll_at)
+                for d in rows
+            ]
+
+        now = self._clock()
+        for device_id in set(self._versions) - set(current):
+            self._scheduler.remove(device_id)
+            del self._versions[device_id]
+            if self._images is not None:
+                self._images.forget(device_id)
+            if self._gate is not None:
+                self._gate.forget(device_id)
+        for spec, updated_at, failing in specs:
+            # A device that was already failing before this process started backs off at once.
+            self._scheduler.upsert(spec, now, failures=1 if failing else 0)
+            self._versions[spec.id] = updated_at
+        if self._shards is not None and self._alerts is not None:
+            self._alerts.restrict(current)
+        return len(self._scheduler)
+
+    # ---------------------------
+    # Polling
+    # ---------------------------
+    def dispatch_due(self, now: Optional[float] = None) -> int:
+        """Submit every due device to the worker pool; returns the count."""
+        if self._executor is None:
+            raise RuntimeError("CaptureEngine not started")
+        now = self._clock() if now is None else now
+        if self._shards is not None and not self._shards.holding():
+            return 0  # leases may have lapsed (DB unreachable): another worker may own these now
+
+        submitted = 0
+        saturated = self._inference is not None and self._inference.saturated()
+        for spec in self._scheduler.pop_due(now):
+            if saturated:
+                # Extraction is the bottleneck: fetching more frames would only be dropped.
+                self._scheduler.defer(spec.id, now + spec.poll_interval_s)
+                self._deferred += 1
+                continue
+            with self._lock:
+                if spec.id in self._inflight:
+                    # Re-added while an older poll is still running; try again next interval.
+                    self._scheduler.defer(spec.id, now + spec.poll_interval_s)
+                    continue
+                fut = self._executor.submit(self._poll_and_reschedule, spec)
+                self._inflight[spec.id] = fut
+            submitted += 1
+        return submitted
+
+    def _poll_and_reschedule(self, spec: DeviceSpec) -> PollResult:
+        try:
+            result = self.poll_device(spec)
+            self._scheduler.complete(spec.id, self._clock(), success=result.success)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(spec.id, None)
+
+    def poll_device(self, spec: DeviceSpec) -> PollResult:
+        """Fetch one device and persist the outcome. Never raises."""
+        fetch = self._fetchers[spec.type]
+        try:
+            content = fetch(spec)
+            result = PollResult(
+                device_id=spec.id,
+                captured_at=utcnow(),
+                success=True,
+                content=content,
+                source=spec.type,
+            )
+        except Exception as e:
+            result = PollResult(
+                device_id=spec.id,
+                captured_at=utcnow(),
+                success=False,
+                error=_describe_error(e),
+                source=spec.type,
+            )
+
+        if result.success and result.content and self._images is not None:
+            try:
+                result.image_path = self._images.put(result.content, device_id=spec.id).path
+            except OSError:
+                log.exception("failed to store image for device %s", spec.id)
+
+        if result.success and result.content and self._inference is not None:
+            if self._extract_async(spec, result):
+                return result  # recorded once the inference pool has a value
+        elif result.success and result.content and self._extractor is not None:
+            self._extract(spec, result)
+
+        self._record_safely(result)
+        return result
+
+    def _record_safely(self, result: PollResult) -> None:
+        try:
+            self.record(result)
+        except Exception:
+            log.exception("failed to record poll result for device %s", result.device_id)
+
+    def _extract_async(self, spec: DeviceSpec, result: PollResult) -> bool:
+        """Queue the frame for batched inference; False if the caller should record now."""
+        assert self._inference is not None and result.content is not None
+        thumb = None
+        if self._gate is not None:
+            thumb, reused = self._gate.lookup(spec.id, result.content)
+            if reused is not None:
+                _apply(result, reused)
+                return False
+
+        def done(extraction: Optional[Extraction], error: Optional[BaseException]) -> None:
+            if extraction is not None:
+                _apply(result, extraction)
+                if self._gate is not None:
+                    self._gate.remember(spec.id, thumb, extraction)
+            else:
+                reason = _describe_error(error) if error is not None else "no result"
+                result.error = f"extraction failed: {reason}"[:1000]
+            self._record_safely(result)
+
+        if self._inference.submit(spec, result.content, done):
+            return True
+        result.error = "extraction failed: inference queue full"
+        return False
+
+    def _extract(self, spec: DeviceSpec, result: PollResult) -> None:
+        """Fill value/unit/confidence, skipping the extractor for unchanged frames."""
+        assert self._extractor is not None and result.content is not None
+        content = result.content
+        extract = self._extractor
+        try:
+            if self._gate is not None:
+                extraction = self._gate.run(spec.id, content, lambda: extract(spec, content))
+            else:
+                extraction = extract(spec, content)
+        except Exception as e:
+            result.error = f"extraction failed: {_describe_error(e)}"[:1000]
+            return
+        _apply(result, extraction)
+
+    def record(self, result: PollResult) -> None:
+        """Hand the result to the write-behind queue (committed in batches)."""
+        self._writer.submit(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            inflight = len(self._inflight)
+        stats: Dict[str, Any] = {
+            "scheduled": len(self._scheduler),
+            "inflight": inflight,
+            "ingest": self._writer.stats(),
+        }
+        if self._alerts is not None:
+            stats["alerts"] = self._alerts.stats()
+        if self._shards is not None:
+            stats["shard"] = self._shards.stats()
+        if self._images is not None:
+            stats["images"] = self._images.stats()
+        if self._gate is not None:
+            stats["change_gate"] = self._gate.stats()
+        if self._inference is not None:
+            stats["inference"] = dict(self._inference.stats(), deferred_polls=self._deferred)
+        for name, source in self._extra_stats.items():
+            stats[name] = source()
+        return stats
+
+    def write_stats(self) -> None:
+        """Publish ``stats()`` as JSON for the API (``GET /api/v1/poller/stats``)."""
+        if not self._stats_path:
+            return
+        tmp = f"{self._stats_path}.tmp"
+        payload = dict(self.stats(), updated_at=utcnow().isoformat())
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self._stats_path)
+
+    def run_once(self) -> List[PollResult]:
+        """Poll every enabled device exactly once and wait for all results."""
+        self.sync_devices()
+        self.start()
+        assert self._executor is not None
+        futures = [self._executor.submit(self.poll_device, spec) for spec in self._scheduler.specs()]
+        wait(futures)
+        if self._inference is not None:
+            self._inference.flush()
+        self._writer.flush()
+        return [f.result() for f in futures]
+
+    def run_forever(self, stop: threading.Event) -> None:
+        """Main loop: sleep until the next deadline, dispatch, resync devices periodically."""
+        self.start()
+        next_sync = 0.0
+        while not stop.is_set():
+            now = self._clock()
+            if now >= next_sync:
+                try:
+                    self.sync_devices()
+                except Exception:
+                    log.exception("failed to sync devices")
+                if self._rtsp is not None:
+                    self._rtsp.reap_idle()
+                try:
+                    self.write_stats()
+                except OSError:
+                    log.warning("failed to write poller stats to %s", self._stats_path, exc_info=True)
+                next_sync = now + self._refresh_s
+
+            self.dispatch_due(now)
+
+            deadline = self._scheduler.next_deadline()
+            timeout = self._tick_s if deadline is None else max(0.0, min(deadline - self._clock(), self._tick_s))
+            stop.wait(min(timeout, max(0.0, next_sync - self._clock())))
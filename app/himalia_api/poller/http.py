@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase, HTTPBasicAuth, HTTPDigestAuth
+
+from .specs import DeviceSpec
+
+_CHUNK = 64 * 1024
+
+
+class PoolExhausted(TimeoutError):
+    """No connection slot became free within the device's timeout."""
+
+
+class _BearerAuth(AuthBase):
+    def __init__(self, token: str) -> None:
+        self.token = token
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
+
+class _HostPool:
+    """One keep-alive ``requests.Session`` per scheme://host:port."""
+
+    def __init__(self, max_per_host: int) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_per_host, pool_block=True, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.slots = threading.BoundedSemaphore(max_per_host)
+        self._auth: Dict[Tuple[str, str, str], AuthBase] = {}
+        self._lock = threading.Lock()
+
+    def auth_for(self, spec: DeviceSpec) -> Optional[AuthBase]:
+        mode = spec.auth_mode or "none"
+        if mode == "none":
+            return None
+        key = (mode, spec.auth_username or "", spec.auth_password or "")
+        with self._lock:
+            auth = self._auth.get(key)
+            if auth is None:
+                if mode == "basic":
+                    auth = HTTPBasicAuth(key[1], key[2])
+                elif mode == "digest":
+                    # HTTPDigestAuth remembers the last nonce (per worker thread), so
+                    # only the first request of each thread pays the 401 round trip.
+                    auth = HTTPDigestAuth(key[1], key[2])
+                elif mode == "bearer":
+                    auth = _BearerAuth(key[2])
+                else:
+                    raise ValueError(f"unsupported auth_mode: {mode}")
+                self._auth[key] = auth
+            return auth
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SnapshotClient:
+    """Pooled, keep-alive HTTP client for camera_ip_snapshot devices.
+
+    - Connections are reused per host, so steady-state polls skip the TCP connect,
+      TLS handshake and (for digest) the 401 challenge.
+    - Concurrency is bounded globally (``max_connections``) and per host
+      (``max_per_host``).
+    - The device timeout is one deadline for the whole poll: waiting for the
+      global and per-host slots, connecting and reading the body all spend it.
+    - At most ``max_hosts`` host pools are kept; the least recently used one is
+      closed when a new host arrives.
+    """
+
+    def __init__(self, *, max_connections: int = 64, max_per_host: int = 4, max_hosts: int = 1024) -> None:
+        self._global = threading.BoundedSemaphore(max_connections)
+        self._max_per_host = max_per_host
+        self._max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, _HostPool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pool(self, endpoint: str) -> _HostPool:
+        parts = urlsplit(endpoint)
+        key = f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+        with self._lock:
+            pool = self._hosts.get(key)
+            if pool is not None:
+                self._hosts.move_to_end(key)
+                return pool
+            pool = _HostPool(self._max_per_host)
+            self._hosts[key] = pool
+            if len(self._hosts) > self._max_hosts:
+                _key, evicted = self._hosts.popitem(last=False)
+                evicted.close()
+            return pool
+
+    def fetch(self, spec: DeviceSpec) -> bytes:
+        """GET the snapshot for ``spec`` and return the body; raises on any failure."""
+        deadline = time.monotonic() + spec.timeout_ms / 1000.0
+        pool = self._pool(spec.endpoint)
+        auth = pool.auth_for(spec)
+
+        if not self._global.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise PoolExhausted("global connection limit reached")
+        try:
+            if not pool.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise PoolExhausted("per-host connection limit reached")
+            try:
+                return self._get(pool, spec, auth, deadline)
+            finally:
+                pool.slots.release()
+        finally:
+            self._global.release()
+
+    @staticmethod
+    def _get(pool: _HostPool, spec: DeviceSpec, auth: Optional[AuthBase], deadline: float) -> bytes:
+        # requests applies a timeout to the connect and to each socket read, not
+        # to the request as a whole: stream the body and check the deadline per chunk.
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise requests.Timeout("device timeout spent waiting for a connection slot")
+        with pool.session.get(spec.endpoint, auth=auth, timeout=(left, left), stream=True) as resp:
+            resp.raise_for_status()
+            length = int(resp.headers.get("Content-Length") or 0)
+            body = bytearray()
+            for chunk in resp.iter_content(_CHUNK):
+                body += chunk
+                # Without a Content-Length the last chunk cannot be told apart: stop anyway.
+                if time.monotonic() > deadline and (not length or resp.raw.tell() < length):
+                    raise requests.Timeout("device timeout reached while reading the snapshot")
+            return bytes(body)
+
+    __call__ = fetch
+
+    def host_count(self) -> int:
+        with self._lock:
+            return len(self._hosts)
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._hosts.values())
+            self._hosts.clear()
+        for pool in pools:
+            pool.close()
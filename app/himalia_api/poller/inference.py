@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence
+
+import requests
+
+from ..config import Settings
+from .specs import DeviceSpec, Extraction
+
+log = logging.getLogger(__name__)
+
+# Called once per request with either the extraction or the error that prevented it.
+DoneCallback = Callable[[Optional[Extraction], Optional[BaseException]], None]
+
+
+@dataclass
+class InferenceRequest:
+    spec: DeviceSpec
+    content: bytes
+    on_done: DoneCallback
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class Backend(Protocol):
+    """A model server. ``infer`` returns one extraction per frame, in order."""
+
+    name: str
+
+    def infer(self, batch: Sequence[InferenceRequest]) -> List[Extraction]: ...
+
+
+class StubBackend:
+    """Deterministic local backend for tests and benchmarks.
+
+    Each call sleeps ``latency_s + per_item_s * len(batch)``, roughly the cost
+    shape of a model server (fixed per-request overhead plus per-image work).
+    The value is derived from the frame bytes, so identical frames agree.
+    """
+
+    name = "stub"
+
+    def __init__(self, *, latency_s: float = 0.0, per_item_s: float = 0.0) -> None:
+        self.latency_s = latency_s
+        self.per_item_s = per_item_s
+        self.calls: List[int] = []  # batch sizes, for tests and benchmarks
+
+    def infer(self, batch: Sequence[InferenceRequest]) -> List[Extraction]:
+        self.calls.append(len(batch))
+        delay = self.latency_s + self.per_item_s * len(batch)
+        if delay:
+            time.sleep(delay)
+        return [
+            Extraction(value=str(int(hashlib.sha256(r.content).hexdigest()[:6], 16) % 100000), unit=None, confidence=1.0)
+            for r in batch
+        ]
+
+
+_OLLAMA_PROMPT = (
+    "You are given {n} photos of meters or instrument displays, in order. "
+    "For each photo read the value shown. Reply with JSON only: "
+    '{{"readings": [{{"value": "<value as displayed>", "unit": "<unit or null>", '
+    '"confidence": <0..1>}}, ...]}} with exactly {n} entries in the same order.'
+)
+
+
+class OllamaBackend:
+    """Vision model served by Ollama (``POST /api/generate``).
+
+    One request carries every frame of a batch as ``images`` and asks for a JSON
+    array of readings in the same order, so model load/prompt overhead is paid
+    once per batch instead of once per frame.
+    """
+
+    name = "ollama"
+
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        *,
+        timeout_s: float = 120.0,
+        prompt: str = _OLLAMA_PROMPT,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        self._url = url.rstrip("/") + "/api/generate"
+        self._model = model
+        self._timeout_s = timeout_s
+        self._prompt = prompt
+        self._session = session or requests.Session()
+
+    def infer(self, batch: Sequence[InferenceRequest]) -> List[Extraction]:
+        resp = self._session.post(
+            self._url,
+            json={
+                "model": self._model,
+                "prompt": self._prompt.format(n=len(batch)),
+                "images": [base64.b64encode(r.content).decode("ascii") for r in batch],
+                "format": "json",
+                "stream": False,
+            },
+            timeout=self._timeout_s,
+        )
+        resp.raise_for_status()
+        data = json.loads(resp.json()["response"])
+        items = data.get("readings") if isinstance(data, dict) else data
+        if not isinstance(items, list) or len(items) != len(batch):
+            raise ValueError(f"model returned {len(items) if isinstance(items, list) else 'no'} readings for {len(batch)} frames")
+        return [_parse_item(item) for item in items]
+
+
+def _parse_item(item: Any) -> Extraction:
+    if not isinstance(item, dict):
+        raise ValueError("reading must be an object")
+    value = item.get("value")
+    unit = item.get("unit")
+    try:
+        confidence = float(item["confidence"]) if item.get("confidence") is not None else None
+    except (TypeError, ValueError):
+        confidence = None
+    if confidence is not None:
+        confidence = min(1.0, max(0.0, confidence))
+    return Extraction(
+        value=None if value is None else str(value),
+        unit=None if unit in (None, "", "null") else str(unit)[:32],
+        confidence=confidence,
+    )
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.rejected = 0
+        self.max_batch_size = 0
+        self.infer_s = 0.0
+        self.wait_s = 0.0
+
+
+class InferencePool:
+    """Bounded extraction queue drained by workers that batch frames per model call.
+
+    A worker takes the first queued frame, then keeps collecting until it has
+    ``max_batch`` frames or ``max_wait_ms`` has passed, and sends them to the
+    backend in one request. ``submit`` never blocks: when ``max_queue`` frames are
+    waiting it returns False, and ``saturated()`` lets the capture engine stop
+    dispatching polls that would only add to the backlog.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        *,
+        max_batch: int = 8,
+        max_wait_ms: int = 250,
+        max_queue: int = 256,
+        workers: int = 1,
+    ) -> None:
+        self.backend = backend
+        self._max_batch = max(1, max_batch)
+        self._max_wait_s = max_wait_ms / 1000.0
+        self._max_queue = max(1, max_queue)
+        self._workers_n = max(1, workers)
+        self._queue: "queue.Queue[InferenceRequest]" = queue.Queue(maxsize=self._max_queue)
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+        self._pending = 0  # submitted but not yet completed
+        self._stats = _Stats()
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self._workers_n):
+            t = threading.Thread(target=self._run, name=f"himalia-infer-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Finish queued frames (up to ``timeout``), then stop the workers."""
+        if not self._threads:
+            return
+        self.flush(timeout)
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def submit(self, spec: DeviceSpec, content: bytes, on_done: DoneCallback) -> bool:
+        with self._cond:
+            try:
+                self._queue.put_nowait(InferenceRequest(spec=spec, content=content, on_done=on_done))
+            except queue.Full:
+                self._stats.rejected += 1
+                return False
+            self._pending += 1
+        return True
+
+    def saturated(self) -> bool:
+        return self._queue.qsize() >= self._max_queue
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted frame has completed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            st = self._stats
+            return {
+                "backend": self.backend.name,
+                "queued": self._queue.qsize(),
+                "pending": self._pending,
+                "batches": st.batches,
+                "items": st.items,
+                "errors": st.errors,
+                "rejected": st.rejected,
+                "max_batch_size": st.max_batch_size,
+                "avg_batch_size": round(st.items / st.batches, 3) if st.batches else 0.0,
+                "avg_infer_ms": round(st.infer_s * 1000.0 / st.batches, 3) if st.batches else 0.0,
+                "avg_queue_wait_ms": round(st.wait_s * 1000.0 / st.items, 3) if st.items else 0.0,
+            }
+
+    # ---------------------------
+    # Workers
+    # ---------------------------
+    def _collect(self) -> List[InferenceRequest]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self._max_wait_s
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[InferenceRequest]) -> None:
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        results: List[Optional[Extraction]] = [None] * len(batch)
+        try:
+            out = self.backend.infer(batch)
+            if len(out) != len(batch):
+                raise ValueError(f"backend returned {len(out)} results for {len(batch)} frames")
+            results = list(out)
+        except Exception as e:
+            log.warning("inference batch of %d failed: %s", len(batch), e)
+            error = e
+        elapsed = time.monotonic() - started
+
+        for req, extraction in zip(batch, results):
+            try:
+                req.on_done(extraction, error)
+            except Exception:
+                log.exception("inference callback failed for device %s", req.spec.id)
+
+        with self._cond:
+            st = self._stats
+            st.batches += 1
+            st.items += len(batch)
+            st.max_batch_size = max(st.max_batch_size, len(batch))
+            st.infer_s += elapsed
+            st.wait_s += sum(started - r.enqueued_at for r in batch)
+            if error is not None:
+                st.errors += 1
+            self._pending -= len(batch)
+            self._cond.notify_all()
+
+
+def build_inference_pool(settings: Settings) -> Optional[InferencePool]:
+    """Inference pool for ``HIMALIA_INFERENCE_BACKEND``; None when extraction is off."""
+    if settings.inference_backend == "ollama":
+        backend: Backend = OllamaBackend(
+            settings.ollama_url,
+            settings.ollama_model,
+            timeout_s=settings.ollama_timeout_s,
+        )
+    elif settings.inference_backend == "stub":
+        backend = StubBackend()
+    else:
+        return None
+    return InferencePool(
+        backend,
+        max_batch=settings.inference_max_batch,
+        max_wait_ms=settings.inference_max_wait_ms,
+        max_queue=settings.inference_max_queue,
+        workers=settings.inference_workers,
+    )
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_right
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..alerts import AlertEngine
+from ..cache import bump
+from ..db import session_scope
+from ..models import Device, Reading, SpoolCheckpoint
+from .specs import PollResult
+from .spool import Spool, read_segment
+
+log = logging.getLogger(__name__)
+
+
+class _Marker:
+    """Control item on the queue: ends the current batch and signals once it is written."""
+
+    def __init__(self, *, stop: bool = False) -> None:
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.dropped = 0
+        self.torn_segments = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def observe(self, size: int, elapsed_ms: float) -> None:
+        self.batches += 1
+        self.rows += size
+        self.last_batch_size = size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+
+def reading_rows(batch: List[PollResult]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "device_id": r.device_id,
+            "captured_at": r.captured_at,
+            "value": r.value,
+            "unit": r.unit,
+            "confidence": r.confidence,
+            "success": r.success,
+            "error": r.error,
+            "source": r.source,
+            "image_path": r.image_path,
+        }
+        for r in batch
+    ]
+
+
+def device_status_rows(batch: List[PollResult]) -> List[Dict[str, Any]]:
+    """Collapse a batch to one status update per device.
+
+    ``last_poll_at``/``last_error`` come from the device's newest result and
+    ``last_seen_at`` from its newest successful one. A successful capture whose
+    value extraction failed keeps its error in ``last_error``.
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    for r in sorted(batch, key=lambda r: r.captured_at):
+        row = rows.setdefault(r.device_id, {"id": r.device_id})
+        row["last_poll_at"] = r.captured_at
+        row["last_error"] = r.error
+        if r.success:
+            row["last_seen_at"] = r.captured_at
+    return list(rows.values())
+
+
+def write_batch(
+    batch: List[PollResult],
+    *,
+    checkpoint: Optional[Tuple[str, int]] = None,
+    alerts: Optional[AlertEngine] = None,
+) -> int:
+    """Insert readings and update device poll status in a single transaction.
+
+    Results for devices deleted while their poll was in flight are discarded, so
+    one stale row cannot fail the foreign key check for the whole batch.
+    ``checkpoint`` (spool segment, byte offset) is recorded in the same
+    transaction when the batch is a spool replay. With ``alerts`` the batch is
+    evaluated against the alert rules and state changes are written alongside.
+    """
+    ids = {r.device_id for r in batch}
+    with (alerts.transaction() if alerts is not None else nullcontext()) as tx, session_scope() as s:
+        live = set(s.scalars(select(Device.id).where(Device.id.in_(ids))))
+        if live != ids:
+            batch = [r for r in batch if r.device_id in live]
+        if batch:
+            s.execute(insert(Reading), reading_rows(batch))
+            s.execute(update(Device), device_status_rows(batch))
+            bump(s, "readings", "devices")
+            if tx is not None:
+                tx.observe(s, batch)
+        if checkpoint is not None:
+            _save_checkpoint(s, *checkpoint)
+    return len(batch)
+
+
+def committed_offset(segment: str) -> int:
+    """Bytes of spool ``segment`` already committed by an earlier replay."""
+    with session_scope() as s:
+        return s.scalar(select(SpoolCheckpoint.offset).where(SpoolCheckpoint.segment == segment)) or 0
+
+
+def _save_checkpoint(s: Session, segment: str, offset: int) -> None:
+    stmt = sqlite_insert(SpoolCheckpoint).values(segment=segment, offset=offset)
+    s.execute(stmt.on_conflict_do_update(index_elements=[SpoolCheckpoint.segment], set_={"offset": offset}))
+    # Segments are replayed in name order, so older ones are finished and unlinked.
+    s.execute(delete(SpoolCheckpoint).where(SpoolCheckpoint.segment < segment))
+
+
+class ReadingWriter:
+    """Write-behind queue for poll results.
+
+    Pollers ``submit`` results onto an in-process queue; one writer thread drains
+    it and commits a batch when ``max_batch`` results are waiting or the oldest
+    one has waited ``max_delay_ms``. A batch is one transaction: a multi-row
+    INSERT into ``readings`` plus one UPDATE per device for ``last_poll_at`` /
+    ``last_seen_at`` / ``last_error``. That is one SQLite fsync per batch instead
+    of one per reading.
+
+    A failed batch is retried a few times before it is dropped and counted.
+
+    With a ``spool`` the queue is on disk instead: ``submit`` appends to the
+    spool and never waits on the database, the writer thread seals the active
+    segment on the same size/delay triggers and replays sealed segments in
+    batches. Failed batches are retried until they commit (they are already
+    durable), each commit records the segment offset it covers, and a segment
+    is unlinked once fully committed. ``stop`` drains for at most
+    ``drain_timeout_s``; anything left stays spooled for the next start or
+    ``poller.py --drain-spool``.
+
+    With ``alerts`` every batch is also evaluated by the alert engine inside
+    its transaction (see ``AlertEngine``).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_batch: int = 500,
+        max_delay_ms: int = 1000,
+        max_queue: int = 10000,
+        retries: int = 3,
+        spool: Optional[Spool] = None,
+        drain_timeout_s: Optional[float] = None,
+        alerts: Optional[AlertEngine] = None,
+    ) -> None:
+        self._max_batch = max_batch
+        self._max_delay_s = max_delay_ms / 1000.0
+        self._retries = retries
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._stats = _Stats()
+        self._stats_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._spool = spool
+        self._drain_timeout_s = drain_timeout_s
+        self._alerts = alerts
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._drained = threading.Condition()
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def submit(self, result: PollResult) -> None:
+        """Queue a result; blocks only if the in-memory queue is full (writer badly behind)."""
+        if self._spool is None:
+            self._queue.put(result)
+            return
+        if not self._spool.append(result):
+            with self._stats_lock:
+                self._stats.dropped += 1
+        elif self._spool.pending >= self._max_batch:
+            self._wake.set()
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self) -> None:
+        if self._thread is None:
+            target = self._run if self._spool is None else self._run_spool
+            self._stopping.clear()
+            self._thread = threading.Thread(target=target, name="himalia-ingest", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        thread, self._thread = self._thread, None
+        if self._spool is not None:
+            self._stopping.set()
+            self._wake.set()
+            if thread is not None:
+                thread.join()
+            self.drain(self._drain_timeout_s)
+            return
+        if thread is not None:
+            self._queue.put(_Marker(stop=True))
+            thread.join()
+        self.flush()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted before this call is committed."""
+        if self._spool is not None:
+            if self._thread is None:
+                return self.drain(timeout)
+            newest = self._spool.seal()
+            self._wake.set()
+            with self._drained:
+                return self._drained.wait_for(lambda: self._spooled_through(newest), timeout)
+        if self._thread is None:
+            while True:
+                items = self._take(block=False)
+                if not items:
+                    return True
+                self._write([r for r in items if not isinstance(r, _Marker)])
+        marker = _Marker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Replay the whole spool on the calling thread; False if some of it is left.
+
+        Used on shutdown and by ``poller.py --drain-spool``; gives up after
+        ``timeout`` seconds of failing commits (never, when None).
+        """
+        if self._spool is None:
+            return self.flush(timeout)
+        self._spool.seal()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return self._drain_spool(lambda: deadline is not None and time.monotonic() >= deadline)
+
+    # ---------------------------
+    # Metrics
+    # ---------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            st = self._stats
+            stats = {
+                "queued": self._queue.qsize(),
+                "batches": st.batches,
+                "rows": st.rows,
+                "errors": st.errors,
+                "dropped": st.dropped,
+                "last_batch_size": st.last_batch_size,
+                "max_batch_size": st.max_batch_size,
+                "avg_batch_size": round(st.rows / st.batches, 2) if st.batches else 0.0,
+                "last_flush_ms": round(st.last_flush_ms, 3),
+                "max_flush_ms": round(st.max_flush_ms, 3),
+                "avg_flush_ms": round(st.total_flush_ms / st.batches, 3) if st.batches else 0.0,
+            }
+            torn = st.torn_segments
+        if self._spool is not None:
+            stats["spool"] = dict(self._spool.stats(), torn_segments=torn)
+        return stats
+
+    # ---------------------------
+    # Writer side
+    # ---------------------------
+    def _run(self) -> None:
+        while True:
+            items = self._take(block=True)
+            batch = [r for r in items if not isinstance(r, _Marker)]
+            if batch:
+                self._write(batch)
+            markers = [m for m in items if isinstance(m, _Marker)]
+            for m in markers:
+                m.done.set()
+            if any(m.stop for m in markers):
+                return
+
+    def _take(self, *, block: bool) -> List[Any]:
+        """Collect up to ``max_batch`` items, waiting at most ``max_delay`` after the first.
+
+        A control marker ends the batch early so flushes and shutdown are prompt.
+        """
+        try:
+            first = self._queue.get(block=block)
+        except queue.Empty:
+            return []
+        items = [first]
+        if isinstance(first, _Marker):
+            return items
+
+        deadline = time.monotonic() + self._max_delay_s
+        while len(items) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get(block=False)
+            except queue.Empty:
+                break
+            items.append(item)
+            if isinstance(item, _Marker):
+                break
+        return items
+
+    def _write(self, batch: List[PollResult]) -> None:
+        if not batch:
+            return
+        with self._write_lock:
+            for attempt in range(1, self._retries + 1):
+                t0 = time.perf_counter()
+                try:
+                    write_batch(batch, alerts=self._alerts)
+                except Exception:
+                    log.exception("reading batch write failed (attempt %d/%d, %d rows)", attempt, self._retries, len(batch))
+                    with self._stats_lock:
+                        self._stats.errors += 1
+                    time.sleep(min(0.5 * attempt, 2.0))
+                    continue
+                elapsed_ms = (time.perf_counter() - t0) * 1000.0
+                with self._stats_lock:
+                    self._stats.observe(len(batch), elapsed_ms)
+                return
+
+            with self._stats_lock:
+                self._stats.dropped += len(batch)
+
+    # ---------------------------
+    # Spool replay
+    # ---------------------------
+    def _run_spool(self) -> None:
+        assert self._spool is not None
+        while not self._stopping.is_set():
+            self._wake.wait(self._max_delay_s)
+            self._wake.clear()
+            self._spool.seal()
+            self._drain_spool(self._stopping.is_set)
+
+    def _spooled_through(self, name: Optional[str]) -> bool:
+        assert self._spool is not None
+        return name is None or all(p.name > name for p in self._spool.sealed())
+
+    def _drain_spool(self, give_up: Callable[[], bool]) -> bool:
+        """Replay sealed segments oldest first; False if ``give_up`` interrupted it."""
+        assert self._spool is not None
+        with self._write_lock:
+            try:
+                for path in self._spool.sealed():
+                    if not self._replay_segment(path, give_up):
+                        return False
+                    self._spool.remove(path)
+                    with self._drained:
+                        self._drained.notify_all()
+                return True
+            finally:
+                with self._drained:
+                    self._drained.notify_all()
+
+    def _replay_segment(self, path: Path, give_up: Callable[[], bool]) -> bool:
+        seg = read_segment(path)
+        if seg.torn:
+            log.warning(
+                "spool segment %s: discarding %d bytes after the last intact record",
+                seg.name,
+                seg.size - seg.valid_bytes,
+            )
+            with self._stats_lock:
+                self._stats.torn_segments += 1
+        if not seg.results:
+            return True
+
+        done: List[int] = []
+        if not self._retrying(lambda: done.append(committed_offset(seg.name)), give_up):
+            return False
+        for i in range(bisect_right(seg.ends, done[0]), len(seg.results), self._max_batch):
+            batch = seg.results[i : i + self._max_batch]
+            checkpoint = (seg.name, seg.ends[i + len(batch) - 1])
+            t0 = time.perf_counter()
+            if not self._retrying(lambda: write_batch(batch, checkpoint=checkpoint, alerts=self._alerts), give_up):
+                return False
+            with self._stats_lock:
+                self._stats.observe(len(batch), (time.perf_counter() - t0) * 1000.0)
+        return True
+
+    def _retrying(self, fn: Callable[[], Any], give_up: Callable[[], bool]) -> bool:
+        """Run ``fn`` until it succeeds, backing off up to 2 s; False once ``give_up()``."""
+        attempt = 0
+        while True:
+            try:
+                fn()
+                return True
+            except Exception:
+                attempt += 1
+                log.exception("spool replay failed (attempt %d)", attempt)
+                with self._stats_lock:
+                    self._stats.errors += 1
+            if give_up():
+                return False
+            time.sleep(min(0.25 * attempt, 2.0))
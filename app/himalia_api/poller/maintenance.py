@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from ..config import Settings
+from ..models import utcnow
+from ..retention import run_retention
+from ..rollups import run_rollups
+
+log = logging.getLogger(__name__)
+
+
+def rollup_job(settings: Settings) -> Dict[str, Any]:
+    report = run_rollups(chunk_size=settings.rollup_chunk_size)
+    if report.readings:
+        log.info(
+            "rollups: %d readings into %d buckets (watermark %d)",
+            report.readings,
+            report.buckets,
+            report.watermark,
+        )
+    return {"readings": report.readings, "buckets": report.buckets, "watermark": report.watermark}
+
+
+def retention_job(settings: Settings) -> Dict[str, Any]:
+    report = run_retention(settings)
+    log.info(
+        "retention: deleted %d readings, %d rollups, %d images (+%d orphans); reclaimed %d image bytes, %d db bytes",
+        report.readings_deleted,
+        report.rollups_deleted,
+        report.image_files_deleted,
+        report.orphan_files_deleted,
+        report.image_bytes_reclaimed,
+        report.db_bytes_reclaimed,
+    )
+    return report.as_dict()
+
+
+class MaintenanceJobs:
+    """Periodic database housekeeping, run on a background thread of the poller.
+
+    Jobs never overlap themselves (``max_instances=1``) and missed runs are
+    coalesced, so a slow pass simply delays the next one. The latest result of
+    each job is kept for ``stats()`` (published with the poller stats).
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._lock = threading.Lock()
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        if self._scheduler is not None:
+            return
+        sched = BackgroundScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+        sched.add_job(
+            self._run,
+            "interval",
+            args=("rollups", rollup_job),
+            seconds=self._settings.rollup_interval_s,
+            id="rollups",
+        )
+        sched.add_job(
+            self._run,
+            "interval",
+            args=("retention", retention_job),
+            seconds=self._settings.retention_interval_s,
+            id="retention",
+        )
+        sched.start()
+        self._scheduler = sched
+
+    def stop(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=True)
+            self._scheduler = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: dict(last) for name, last in self._last.items()}
+
+    def _run(self, name: str, job: Callable[[Settings], Dict[str, Any]]) -> None:
+        try:
+            result: Dict[str, Any] = {"ok": True, "result": job(self._settings)}
+        except Exception as e:
+            log.exception("maintenance job %s failed", name)
+            result = {"ok": False, "error": str(e)}
+        result["finished_at"] = utcnow().isoformat()
+        with self._lock:
+            self._last[name] = result
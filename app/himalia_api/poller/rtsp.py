@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Protocol, Tuple
+from urllib.parse import quote, urlsplit, urlunsplit
+
+from .specs import DeviceSpec
+
+log = logging.getLogger(__name__)
+
+
+class FrameSource(Protocol):
+    """Minimal interface of an open stream (matches ``cv2.VideoCapture``)."""
+
+    def read(self) -> Tuple[bool, Any]: ...
+
+    def release(self) -> None: ...
+
+
+Opener = Callable[[str, int], FrameSource]
+
+
+class StreamLimitReached(RuntimeError):
+    """All RTSP stream slots are held by recently used devices."""
+
+
+@dataclass(frozen=True)
+class Frame:
+    data: Any
+    seq: int
+    grabbed_at: float
+
+
+def open_cv2_source(url: str, timeout_ms: int) -> FrameSource:
+    """Open an RTSP stream with OpenCV/FFmpeg (imported lazily; optional dependency)."""
+    try:
+        import cv2
+    except ImportError as e:
+        raise RuntimeError("camera_rtsp requires opencv-python-headless") from e
+
+    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms,
+    ])
+    # Keep decoder-side buffering minimal; the grabber keeps its own ring.
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    if not cap.isOpened():
+        cap.release()
+        raise ConnectionError("failed to open RTSP stream")
+    return cap
+
+
+def encode_frame(data: Any) -> bytes:
+    """Return JPEG bytes for a grabbed frame (bytes pass through unchanged)."""
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    import cv2
+
+    ok, buf = cv2.imencode(".jpg", data)
+    if not ok:
+        raise RuntimeError("failed to encode frame")
+    return buf.tobytes()
+
+
+def stream_url(spec: DeviceSpec) -> str:
+    """Endpoint with credentials embedded as RTSP userinfo when the device has them."""
+    if (spec.auth_mode or "none") not in {"basic", "digest"} or not spec.auth_username:
+        return spec.endpoint
+    parts = urlsplit(spec.endpoint)
+    if "@" in parts.netloc:
+        return spec.endpoint
+    userinfo = quote(spec.auth_username, safe="")
+    if spec.auth_password:
+        userinfo += ":" + quote(spec.auth_password, safe="")
+    return urlunsplit(parts._replace(netloc=f"{userinfo}@{parts.netloc}"))
+
+
+class RtspGrabber:
+    """Holds one RTSP stream open and keeps the newest frames in a small ring.
+
+    A background thread reads frames as fast as the stream delivers them, so a
+    poll only copies the latest frame out of memory. On read errors the stream is
+    reopened with a capped backoff.
+    """
+
+    def __init__(
+        self,
+        spec: DeviceSpec,
+        opener: Opener,
+        *,
+        buffer_frames: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.spec = spec
+        self._opener = opener
+        self._clock = clock
+        self._ring: Deque[Frame] = deque(maxlen=buffer_frames)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._seq = 0
+        self.last_error: Optional[str] = None
+        self.last_access = clock()
+        self._thread = threading.Thread(target=self._run, name=f"rtsp-{spec.id[:8]}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, *, join_timeout: float = 5.0) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(join_timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def latest(self, *, timeout: float, max_age: float) -> Frame:
+        """Newest frame, waiting up to ``timeout`` for the first one to arrive."""
+        self.last_access = self._clock()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._ring and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(self.last_error or "no frame received from stream")
+                self._cond.wait(remaining)
+            if not self._ring:
+                raise RuntimeError("stream stopped")
+            frame = self._ring[-1]
+        if self._clock() - frame.grabbed_at > max_age:
+            raise TimeoutError(self.last_error or "stream stalled; latest frame is stale")
+        return frame
+
+    def _run(self) -> None:
+        backoff = 1.0
+        url = stream_url(self.spec)
+        while not self._stop.is_set():
+            try:
+                source = self._opener(url, self.spec.timeout_ms)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            try:
+                while not self._stop.is_set():
+                    ok, data = source.read()
+                    if not ok:
+                        self.last_error = "stream read failed"
+                        break
+                    with self._cond:
+                        self._seq += 1
+                        self._ring.append(Frame(data=data, seq=self._seq, grabbed_at=self._clock()))
+                        self._cond.notify_all()
+                    self.last_error = None
+                    backoff = 1.0
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                try:
+                    source.release()
+                except Exception:
+                    log.debug("error releasing stream for %s", self.spec.id, exc_info=True)
+
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+class RtspGrabberPool:
+    """Per-device RTSP grabbers, capped at ``max_streams``.
+
+    Grabbers start on a device's first poll and are torn down after ``idle_s``
+    without a poll (e.g. the device was disabled or deleted). A device whose
+    endpoint or credentials change gets a fresh grabber.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_streams: int = 16,
+        idle_s: float = 120.0,
+        buffer_frames: int = 2,
+        max_frame_age_s: float = 10.0,
+        opener: Opener = open_cv2_source,
+        encoder: Callable[[Any], bytes] = encode_frame,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_streams = max_streams
+        self._idle_s = idle_s
+        self._buffer_frames = buffer_frames
+        self._max_frame_age_s = max_frame_age_s
+        self._opener = opener
+        self._encoder = encoder
+        self._clock = clock
+        self._grabbers: Dict[str, RtspGrabber] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._grabbers)
+
+    def fetch(self, spec: DeviceSpec) -> bytes:
+        grabber = self._grabber_for(spec)
+        frame = grabber.latest(timeout=spec.timeout_ms / 1000.0, max_age=self._max_frame_age_s)
+        return self._encoder(frame.data)
+
+    __call__ = fetch
+
+    def _grabber_for(self, spec: DeviceSpec) -> RtspGrabber:
+        stale: list[RtspGrabber] = []
+        try:
+            with self._lock:
+                grabber = self._grabbers.get(spec.id)
+                if grabber is not None and stream_url(grabber.spec) == stream_url(spec):
+                    return grabber
+                if grabber is not None:
+                    stale.append(self._grabbers.pop(spec.id))
+
+                if len(self._grabbers) >= self._max_streams:
+                    stale.extend(self._pop_idle_locked())
+                if len(self._grabbers) >= self._max_streams:
+                    raise StreamLimitReached(f"RTSP stream limit reached ({self._max_streams})")
+
+                grabber = RtspGrabber(spec, self._opener, buffer_frames=self._buffer_frames, clock=self._clock)
+                self._grabbers[spec.id] = grabber
+                grabber.start()
+                return grabber
+        finally:
+            for g in stale:
+                g.stop()
+
+    def _pop_idle_locked(self) -> list[RtspGrabber]:
+        cutoff = self._clock() - self._idle_s
+        idle = [device_id for device_id, g in self._grabbers.items() if g.last_access < cutoff]
+        return [self._grabbers.pop(device_id) for device_id in idle]
+
+    def reap_idle(self) -> int:
+        """Tear down grabbers nobody polled for ``idle_s``; returns how many stopped."""
+        with self._lock:
+            idle = self._pop_idle_locked()
+        for g in idle:
+            g.stop()
+        return len(idle)
+
+    def close(self) -> None:
+        with self._lock:
+            grabbers = list(self._grabbers.values())
+            self._grabbers.clear()
+        for g in grabbers:
+            g.stop()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import heapq
+import random
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .specs import DeviceSpec
+
+
+@dataclass
+class _Entry:
+    spec: DeviceSpec
+    due: float
+    seq: int
+    failures: int = 0
+    inflight: bool = False
+
+
+class PollScheduler:
+    """Deadline-ordered schedule of enabled devices.
+
+    Keeps a min-heap of ``(due, seq, device_id)``. Insert, pop and reschedule are
+    O(log n); removals are lazy (stale heap items are skipped when popped because
+    their ``seq`` no longer matches the live entry).
+
+    - New devices get a random phase in ``[0, poll_interval_s)`` so devices that
+      share an interval are spread across the period instead of firing together.
+    - After a successful poll the device keeps its phase (``due += interval``).
+    - After consecutive failures the delay doubles each time, capped at
+      ``max_backoff_s`` (never below the device's own interval). A device added
+      with ``failures > 0`` (failing before a restart) starts at that backoff.
+
+    A device that has been popped is "in flight" and is not scheduled again until
+    ``complete`` is called for it. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        *,
+        jitter: bool = True,
+        max_backoff_s: float = 300.0,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self._jitter = jitter
+        self._max_backoff_s = max_backoff_s
+        self._rng = rng or random.Random()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, _Entry] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, device_id: object) -> bool:
+        return device_id in self._entries
+
+    # ---------------------------
+    # Membership
+    # ---------------------------
+    def upsert(self, spec: DeviceSpec, now: float, *, failures: int = 0) -> None:
+        """Add a device, or update the spec of a known one.
+
+        A changed ``poll_interval_s`` re-phases the device; other changes take
+        effect on its next poll without disturbing the schedule.
+        """
+        with self._lock:
+            entry = self._entries.get(spec.id)
+            if entry is None:
+                entry = _Entry(spec=spec, due=0.0, seq=0, failures=failures)
+                self._entries[spec.id] = entry
+                if failures:
+                    self._push(entry, now + self._backoff(spec.poll_interval_s, failures))
+                else:
+                    self._push(entry, now + self._phase(spec.poll_interval_s))
+                return
+
+            interval_changed = entry.spec.poll_interval_s != spec.poll_interval_s
+            entry.spec = spec
+            if interval_changed and not entry.inflight:
+                self._push(entry, now + self._phase(spec.poll_interval_s))
+
+    def remove(self, device_id: str) -> None:
+        with self._lock:
+            self._entries.pop(device_id, None)
+
+    def specs(self) -> List[DeviceSpec]:
+        with self._lock:
+            return [e.spec for e in self._entries.values()]
+
+    # ---------------------------
+    # Scheduling
+    # ---------------------------
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[DeviceSpec]:
+        """Pop devices whose deadline has passed, earliest first, marking them in flight."""
+        out: List[DeviceSpec] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                if limit is not None and len(out) >= limit:
+                    break
+                _due, seq, device_id = heapq.heappop(self._heap)
+                entry = self._entries.get(device_id)
+                if entry is None or entry.seq != seq or entry.inflight:
+                    continue
+                entry.inflight = True
+                out.append(entry.spec)
+        return out
+
+    def complete(self, device_id: str, now: float, *, success: bool) -> Optional[float]:
+        """Reschedule a device after its poll finished; returns the new deadline."""
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is None:
+                return None
+            entry.inflight = False
+            interval = float(entry.spec.poll_interval_s)
+
+            if success:
+                entry.failures = 0
+                due = entry.due + interval
+                if due < now:
+                    # Overran the interval: poll again right away, keep no backlog.
+                    due = now
+            else:
+                entry.failures += 1
+                due = now + self._backoff(entry.spec.poll_interval_s, entry.failures)
+
+            self._push(entry, due)
+            return due
+
+    def defer(self, device_id: str, due: float) -> None:
+        """Put an in-flight device back without counting a poll (e.g. backpressure)."""
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is None:
+                return
+            entry.inflight = False
+            self._push(entry, due)
+
+    def failures(self, device_id: str) -> int:
+        with self._lock:
+            entry = self._entries.get(device_id)
+            return entry.failures if entry else 0
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline, or None if nothing is scheduled."""
+        with self._lock:
+            while self._heap:
+                _due, seq, device_id = self._heap[0]
+                entry = self._entries.get(device_id)
+                if entry is not None and entry.seq == seq and not entry.inflight:
+                    return self._heap[0][0]
+                heapq.heappop(self._heap)
+            return None
+
+    # ---------------------------
+    # Internals
+    # ---------------------------
+    def _phase(self, interval_s: int) -> float:
+        if not self._jitter:
+            return 0.0
+        return self._rng.uniform(0.0, float(interval_s))
+
+    def _backoff(self, interval_s: int, failures: int) -> float:
+        interval = float(interval_s)
+        cap = max(interval, self._max_backoff_s)
+        delay = min(cap, interval * (2 ** min(failures, 20)))
+        if self._jitter:
+            delay *= self._rng.uniform(0.9, 1.1)
+        return min(delay, cap)
+
+    def _push(self, entry: _Entry, due: float) -> None:
+        self._seq += 1
+        entry.seq = self._seq
+        entry.due = due
+        heapq.heappush(self._heap, (due, entry.seq, entry.spec.id))
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import os
+import socket
+from bisect import bisect_right
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..config import Settings
+from ..models import DeviceLease, PollerWorker, epoch_ms, utcnow
+
+_CHUNK = 500
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with ``vnodes`` points per worker.
+
+    A worker joining or leaving moves only the devices on the arcs it gains or
+    loses (about 1/N of them), so a rebalance does not reshuffle the fleet.
+    """
+
+    def __init__(self, nodes: Iterable[str], *, vnodes: int = 64) -> None:
+        points = sorted((_hash(f"{node}#{i}"), node) for node in set(nodes) for i in range(vnodes))
+        self._keys = [p[0] for p in points]
+        self._nodes = [p[1] for p in points]
+
+    def __len__(self) -> int:
+        return len(set(self._nodes))
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        return self._nodes[bisect_right(self._keys, _hash(key)) % len(self._keys)]
+
+
+class ShardCoordinator:
+    """Splits enabled devices between poller workers sharing one database.
+
+    Every ``claim`` (run on each device sync) heartbeats this worker into
+    ``poller_workers``, builds the hash ring from the workers whose heartbeat
+    is younger than ``lease_s`` and keeps the devices the ring assigns here.
+    Ownership is enforced by ``device_leases``: a device is polled only under
+    an unexpired lease, and a lease is taken over only when it is free, expired
+    or already ours. A worker hands devices back by deleting their leases
+    (devices still being polled are held until the poll ends); a worker that
+    dies loses them when its leases expire. Either way no device is polled by
+    two workers at once, as long as host clocks agree to well within
+    ``lease_s``.
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        *,
+        lease_s: int = 30,
+        vnodes: int = 64,
+        clock_ms: Optional[Callable[[], int]] = None,
+    ) -> None:
+        self.worker_id = worker_id
+        self._lease_ms = lease_s * 1000
+        self._vnodes = vnodes
+        self._clock_ms = clock_ms or (lambda: epoch_ms(utcnow()))
+        self._valid_until_ms = 0
+        self._workers = 0
+        self._owned = 0
+        self._acquired = 0
+        self._released = 0
+
+    def claim(self, s: Session, device_ids: Iterable[str], *, busy: Collection[str] = ()) -> Set[str]:
+        """Heartbeat, rebalance and renew leases in ``s``; returns the devices this worker owns."""
+        now = self._clock_ms()
+        me = self.worker_id
+        heartbeat = sqlite_insert(PollerWorker).values(id=me, started_at=utcnow(), heartbeat_ms=now)
+        s.execute(heartbeat.on_conflict_do_update(index_elements=[PollerWorker.id], set_={"heartbeat_ms": now}))
+        live = s.scalars(select(PollerWorker.id).where(PollerWorker.heartbeat_ms >= now - self._lease_ms)).all()
+        ring = HashRing(live, vnodes=self._vnodes)
+        wanted = {d for d in device_ids if ring.owner(d) == me}
+
+        held = set(s.scalars(select(DeviceLease.device_id).where(DeviceLease.worker_id == me)))
+        release = sorted(held - wanted - set(busy))
+        for start in range(0, len(release), _CHUNK):
+            s.execute(
+                delete(DeviceLease).where(
+                    DeviceLease.worker_id == me, DeviceLease.device_id.in_(release[start : start + _CHUNK])
+                )
+            )
+
+        renew = wanted | (held & set(busy))
+        if renew:
+            stmt = sqlite_insert(DeviceLease)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DeviceLease.device_id],
+                set_={"worker_id": stmt.excluded.worker_id, "expires_ms": stmt.excluded.expires_ms},
+                where=(DeviceLease.worker_id == me) | (DeviceLease.expires_ms < now),
+            )
+            s.execute(stmt, [{"device_id": d, "worker_id": me, "expires_ms": now + self._lease_ms} for d in renew])
+
+        mine = set(s.scalars(select(DeviceLease.device_id).where(DeviceLease.worker_id == me)))
+        owned = wanted & mine
+        # Long-dead workers only clutter the table; their leases have expired already.
+        s.execute(delete(PollerWorker).where(PollerWorker.heartbeat_ms < now - 10 * self._lease_ms))
+
+        self._acquired += len(owned - held)
+        self._released += len(release)
+        self._workers = len(ring)
+        self._owned = len(owned)
+        self._valid_until_ms = now + self._lease_ms
+        return owned
+
+    def holding(self) -> bool:
+        """False once the last successful ``claim`` is older than a lease: stop polling."""
+        return self._clock_ms() < self._valid_until_ms
+
+    def leave(self, s: Session) -> None:
+        """Drop this worker and its leases so the others take over at their next sync."""
+        s.execute(delete(DeviceLease).where(DeviceLease.worker_id == self.worker_id))
+        s.execute(delete(PollerWorker).where(PollerWorker.id == self.worker_id))
+        self._valid_until_ms = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self._workers,
+            "owned": self._owned,
+            "acquired": self._acquired,
+            "released": self._released,
+        }
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def build_coordinator(settings: Settings) -> Optional[ShardCoordinator]:
+    """The shard coordinator, or None when this poller owns every device."""
+    if not settings.poller_sharding:
+        return None
+    return ShardCoordinator(settings.poller_worker_id or default_worker_id(), lease_s=settings.poller_lease_s)
+
+
+def worker_settings(settings: Settings, index: int) -> Settings:
+    """Settings for worker ``index`` of ``--processes``: sharded, own spool and stats file."""
+    stats = settings.poller_stats_path
+    if stats and index:
+        root, ext = os.path.splitext(stats)
+        stats = f"{root}.{index}{ext}"
+    return dataclasses.replace(
+        settings,
+        poller_sharding=True,
+        poller_worker_id="",
+        spool_dir=os.path.join(settings.spool_dir, f"worker-{index}") if settings.spool_dir else "",
+        poller_stats_path=stats,
+    )
+
+
+def spool_dirs(settings: Settings) -> List[str]:
+    """The spool directory and any per-worker ones under it (for ``--drain-spool``)."""
+    if not settings.spool_dir or not os.path.isdir(settings.spool_dir):
+        return [settings.spool_dir] if settings.spool_dir else []
+    subdirs = sorted(
+        os.path.join(settings.spool_dir, name)
+        for name in os.listdir(settings.spool_dir)
+        if name.startswith("worker-") and os.path.isdir(os.path.join(settings.spool_dir, name))
+    )
+    return [settings.spool_dir] + subdirs
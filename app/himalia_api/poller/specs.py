@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+
+from ..models import Device
+
+
+@dataclass(frozen=True)
+class DeviceSpec:
+    """Immutable copy of the Device columns a poll needs.
+
+    Workers never touch ORM objects, so a spec can be handed to any thread.
+    """
+
+    id: str
+    type: str
+    endpoint: str
+    auth_mode: str | None
+    auth_username: str | None
+    auth_password: str | None
+    poll_interval_s: int
+    timeout_ms: int
+
+    @classmethod
+    def from_device(cls, dev: Device) -> "DeviceSpec":
+        return cls(
+            id=dev.id,
+            type=dev.type,
+            endpoint=dev.endpoint,
+            auth_mode=dev.auth_mode,
+            auth_username=dev.auth_username,
+            auth_password=dev.auth_password,
+            poll_interval_s=dev.poll_interval_s,
+            timeout_ms=dev.timeout_ms,
+        )
+
+
+@dataclass
+class PollResult:
+    device_id: str
+    captured_at: dt.datetime
+    success: bool
+    content: bytes | None = None
+    error: str | None = None
+    source: str | None = None
+    value: str | None = None
+    unit: str | None = None
+    confidence: float | None = None
+    image_path: str | None = None
+
+
+@dataclass(frozen=True)
+class Extraction:
+    """What the extraction stage (OCR/vision) read from a frame."""
+
+    value: str | None
+    unit: str | None = None
+    confidence: float | None = None
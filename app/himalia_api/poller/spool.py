@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import Settings
+from .specs import PollResult
+
+SEGMENT_SUFFIX = ".seg"
+
+# Frame header: payload length and CRC-32 of the payload, little endian.
+_HEADER = struct.Struct("<II")
+
+_FIELDS = ("device_id", "success", "error", "source", "value", "unit", "confidence", "image_path")
+
+
+def encode_result(result: PollResult) -> bytes:
+    """One poll result as a spool payload (frame bytes are never spooled)."""
+    record: Dict[str, Any] = {f: getattr(result, f) for f in _FIELDS}
+    record["captured_at"] = result.captured_at.isoformat()
+    return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+
+def decode_result(payload: bytes) -> PollResult:
+    record = json.loads(payload)
+    record["captured_at"] = dt.datetime.fromisoformat(record["captured_at"])
+    return PollResult(**record)
+
+
+def frame(payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+@dataclass
+class SegmentRecords:
+    """Valid records of one segment, with the byte offset just past each one."""
+
+    name: str
+    results: List[PollResult]
+    ends: List[int]
+    size: int
+    valid_bytes: int
+
+    @property
+    def torn(self) -> bool:
+        return self.valid_bytes < self.size
+
+
+def read_segment(path: Path) -> SegmentRecords:
+    """Decode ``path`` up to the first torn or corrupt frame.
+
+    A crash mid-append leaves a short or checksum-failing frame at the tail;
+    everything before it is intact and is returned.
+    """
+    data = path.read_bytes()
+    results: List[PollResult] = []
+    ends: List[int] = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, pos)
+        start, end = pos + _HEADER.size, pos + _HEADER.size + length
+        if end > len(data):
+            break
+        payload = data[start:end]
+        if zlib.crc32(payload) != crc:
+            break
+        try:
+            results.append(decode_result(payload))
+        except (ValueError, TypeError, KeyError):
+            break
+        ends.append(end)
+        pos = end
+    return SegmentRecords(name=path.name, results=results, ends=ends, size=len(data), valid_bytes=pos)
+
+
+class Spool:
+    """Append-only, checksummed on-disk queue of poll results.
+
+    Results are framed (length + CRC-32 + JSON) and appended to the active
+    segment file in ``directory``. ``seal`` fsyncs and closes the active
+    segment; sealed segments are replayed oldest first by the reading writer
+    and unlinked once committed. Segment names are the creation time in
+    nanoseconds, so they sort in append order and never repeat a name that an
+    earlier spool (or an emptied directory) already used.
+
+    Appends only touch the local filesystem, never the database. Once
+    ``max_bytes`` are on disk new results are dropped and counted instead of
+    blocking the caller.
+
+    Segments left by a previous process are treated as sealed on open.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync: bool = True,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._active: Optional[Any] = None
+        self._active_name: Optional[str] = None
+        self._active_records = 0
+        existing = sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+        self._last_name = existing[-1].name if existing else ""
+        self._bytes = sum(p.stat().st_size for p in existing)
+        self._appended = 0
+        self._dropped = 0
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def append(self, result: PollResult) -> bool:
+        """Append one result; False if the spool is full and it was dropped."""
+        data = frame(encode_result(result))
+        with self._lock:
+            if self._bytes + len(data) > self._max_bytes:
+                self._dropped += 1
+                return False
+            if self._active is None:
+                self._open_segment()
+            self._active.write(data)
+            # Hand the bytes to the OS now: a killed process loses nothing,
+            # only a power cut before the next seal can.
+            self._active.flush()
+            self._bytes += len(data)
+            self._active_records += 1
+            self._appended += 1
+            if self._active.tell() >= self._segment_bytes:
+                self._seal_locked()
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Results appended to the active segment that are not sealed yet."""
+        with self._lock:
+            return self._active_records
+
+    # ---------------------------
+    # Segments
+    # ---------------------------
+    def seal(self) -> Optional[str]:
+        """Seal the active segment (if it has data); return the newest sealed name."""
+        with self._lock:
+            if self._active is not None:
+                self._seal_locked()
+            return self._last_name or None
+
+    def sealed(self) -> List[Path]:
+        with self._lock:
+            active = self._active_name
+        return sorted(
+            (p for p in self.directory.glob(f"*{SEGMENT_SUFFIX}") if p.name != active),
+            key=lambda p: p.name,
+        )
+
+    def remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._bytes -= size
+
+    def close(self) -> None:
+        self.seal()
+
+    def stats(self) -> Dict[str, Any]:
+        sealed = self.sealed()
+        oldest_age_s = 0.0
+        if sealed:
+            oldest_age_s = max(0.0, (time.time_ns() - int(sealed[0].stem)) / 1e9)
+        with self._lock:
+            return {
+                "dir": str(self.directory),
+                "segments": len(sealed) + (1 if self._active is not None else 0),
+                "bytes": self._bytes,
+                "appended": self._appended,
+                "dropped": self._dropped,
+                "oldest_segment_age_s": round(oldest_age_s, 3),
+            }
+
+    def _open_segment(self) -> None:
+        name_ns = time.time_ns()
+        if self._last_name:
+            name_ns = max(name_ns, int(self._last_name[: -len(SEGMENT_SUFFIX)]) + 1)
+        name = f"{name_ns:020d}{SEGMENT_SUFFIX}"
+        self._active = open(self.directory / name, "ab")
+        self._active_name = name
+        self._last_name = name
+
+    def _seal_locked(self) -> None:
+        f, self._active, self._active_name = self._active, None, None
+        self._active_records = 0
+        if self._fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        f.close()
+        if self._fsync:
+            # Make the new directory entry durable too.
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+
+def open_spool(settings: Settings) -> Optional[Spool]:
+    """The configured spool, or None when ``HIMALIA_SPOOL_DIR`` is empty."""
+    if not settings.spool_dir:
+        return None
+    return Spool(
+        settings.spool_dir,
+        segment_bytes=settings.spool_segment_bytes,
+        max_bytes=settings.spool_max_bytes,
+    )
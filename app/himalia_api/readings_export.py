@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import tempfile
+from typing import Any, Iterable, Iterator, Sequence
+
+FORMATS = ("csv", "xlsx", "parquet")
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+COLUMNS = (
+    "id",
+    "device_id",
+    "captured_at",
+    "value",
+    "value_num",
+    "unit",
+    "confidence",
+    "success",
+    "error",
+    "source",
+    "image_path",
+)
+
+_SPOOL_BYTES = 16 * 1024 * 1024
+_READ_BYTES = 64 * 1024
+
+
+def format_available(fmt: str) -> bool:
+    """Parquet needs pyarrow, which is optional; the other formats always work."""
+    if fmt == "parquet":
+        return importlib.util.find_spec("pyarrow") is not None
+    return fmt in FORMATS
+
+
+def frame(rows: Sequence[Any]):
+    """One chunk of reading rows (``COLUMNS`` order) as a typed DataFrame.
+
+    ``value_num`` is the stored numeric column (NaN where the reading was not a
+    finite number), so nothing is re-parsed here.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame.from_records([tuple(r) for r in rows], columns=list(COLUMNS))
+    df["value_num"] = df["value_num"].astype("float64")
+    df["captured_at"] = pd.to_datetime(df["captured_at"], utc=True)
+    df["success"] = df["success"].astype(bool)
+    return df
+
+
+def export_chunks(partitions: Iterable[Sequence[Any]], fmt: str) -> Iterator[bytes]:
+    """Serialize row partitions (``Result.partitions()``) in ``fmt``.
+
+    Only one partition is in memory at a time. CSV goes out as each chunk is
+    converted; XLSX and Parquet are container formats finalized at the end, so
+    they are built in a temporary file (on disk past 16 MiB) and then streamed.
+    """
+    if fmt == "csv":
+        yield from _csv(partitions)
+    elif fmt == "xlsx":
+        yield from _xlsx(partitions)
+    elif fmt == "parquet":
+        yield from _parquet(partitions)
+    else:
+        raise ValueError(f"unsupported format: {fmt}")
+
+
+def _csv(partitions: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for rows in partitions:
+        df = frame(rows)
+        df["captured_at"] = df["captured_at"].dt.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+        yield df.to_csv(header=False, index=False, lineterminator="\r\n").encode("utf-8")
+
+
+def _xlsx(partitions: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("readings")
+    ws.append(list(COLUMNS))
+    for rows in partitions:
+        df = frame(rows)
+        # Excel has no time zones: write naive UTC.
+        df["captured_at"] = df["captured_at"].dt.tz_localize(None)
+        for record in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            ws.append(list(record))
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as f:
+        wb.save(f)
+        yield from _drain(f)
+
+
+def _parquet(partitions: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Fixed schema: a chunk where e.g. every unit is NULL must not change the column type.
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("device_id", pa.string()),
+            ("captured_at", pa.timestamp("us", tz="UTC")),
+            ("value", pa.string()),
+            ("value_num", pa.float64()),
+            ("unit", pa.string()),
+            ("confidence", pa.float64()),
+            ("success", pa.bool_()),
+            ("error", pa.string()),
+            ("source", pa.string()),
+            ("image_path", pa.string()),
+        ]
+    )
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as f:
+        with pq.ParquetWriter(f, schema) as writer:
+            for rows in partitions:
+                writer.write_table(pa.Table.from_pandas(frame(rows), schema=schema, preserve_index=False))
+        yield from _drain(f)
+
+
+def _drain(f) -> Iterator[bytes]:
+    f.seek(0)
+    while True:
+        chunk = f.read(_READ_BYTES)
+        if not chunk:
+            return
+        yield chunk
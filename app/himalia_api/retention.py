@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, literal_column, select, update
+
+from .cache import bump
+from .config import Settings
+from .db import get_engine, session_scope
+from .imagestore import ImageStore
+from .models import Device, Reading, ReadingRollup, RetentionPolicy as RetentionPolicyRow, epoch_ms
+
+log = logging.getLogger(__name__)
+
+# Pages handed back to the filesystem per incremental_vacuum step; each step
+# holds the write lock only briefly.
+_VACUUM_STEP_PAGES = 2000
+
+
+@dataclass(frozen=True)
+class Policy:
+    """Effective retention for one device. ``*_days == 0`` means keep forever.
+
+    ``images`` selects which readings keep their image past ``image_days``:
+    ``all`` (as long as the reading), ``failed`` (failed reads only) or ``none``.
+    """
+
+    raw_days: int
+    rollup_days: int
+    images: str
+    image_days: int
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Policy":
+        return cls(
+            raw_days=settings.retention_raw_days,
+            rollup_days=settings.retention_rollup_days,
+            images=settings.retention_images,
+            image_days=settings.retention_image_days,
+        )
+
+    def merged(self, override: Optional[RetentionPolicyRow]) -> "Policy":
+        if override is None:
+            return self
+        return Policy(
+            raw_days=self.raw_days if override.raw_days is None else override.raw_days,
+            rollup_days=self.rollup_days if override.rollup_days is None else override.rollup_days,
+            images=self.images if override.images is None else override.images,
+            image_days=self.image_days if override.image_days is None else override.image_days,
+        )
+
+
+@dataclass
+class RetentionReport:
+    readings_deleted: int = 0
+    rollups_deleted: int = 0
+    images_detached: int = 0
+    image_files_deleted: int = 0
+    orphan_files_deleted: int = 0
+    image_bytes_reclaimed: int = 0
+    db_bytes_reclaimed: int = 0
+    db_free_bytes: int = 0
+    duration_ms: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def _referenced(session, forms: Iterable[str]) -> Set[str]:
+    forms = list(forms)
+    if not forms:
+        return set()
+    return set(session.scalars(select(Reading.image_path).where(Reading.image_path.in_(forms))))
+
+
+def _unlink_unreferenced(candidates: Dict[Path, List[str]], horizon: float, report: RetentionReport) -> int:
+    """Delete the candidate files no reading points to; returns how many were removed.
+
+    Files touched after ``horizon`` are left alone: the image store refreshes the
+    mtime when a new frame deduplicates onto an existing file, and that reading
+    may not be committed yet. The orphan sweep picks them up on a later run.
+    """
+    if not candidates:
+        return 0
+    with session_scope() as s:
+        still_used = _referenced(s, (form for forms in candidates.values() for form in forms))
+    removed = 0
+    for path, forms in candidates.items():
+        if still_used.intersection(forms):
+            continue
+        try:
+            st = path.stat()
+            if st.st_mtime > horizon:
+                continue
+            size = st.st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            report.errors.append(f"unlink {path}: {e}")
+            continue
+        removed += 1
+        report.image_bytes_reclaimed += size
+    return removed
+
+
+def _release_images(store: ImageStore, image_paths: Iterable[str], horizon: float, report: RetentionReport) -> None:
+    candidates: Dict[Path, List[str]] = {}
+    for image_path in set(image_paths):
+        path = store.resolve(image_path)
+        if path is not None:
+            candidates[path] = store.stored_forms(path)
+    report.image_files_deleted += _unlink_unreferenced(candidates, horizon, report)
+
+
+def _delete_old_readings(
+    device_id: str, cutoff: dt.datetime, chunk: int, store: ImageStore, horizon: float, report: RetentionReport
+) -> None:
+    while True:
+        with session_scope() as s:
+            rows = s.execute(
+                select(Reading.id, Reading.image_path)
+                .where(Reading.device_id == device_id, Reading.captured_ms < epoch_ms(cutoff))
+                .order_by(Reading.captured_ms)
+                .limit(chunk)
+            ).all()
+            if not rows:
+                return
+            s.execute(delete(Reading).where(Reading.id.in_([r.id for r in rows])))
+            bump(s, "readings")
+        report.readings_deleted += len(rows)
+        _release_images(store, (r.image_path for r in rows if r.image_path), horizon, report)
+        if len(rows) < chunk:
+            return
+
+
+def _detach_images(
+    device_id: str,
+    policy: Policy,
+    cutoff: dt.datetime,
+    chunk: int,
+    store: ImageStore,
+    horizon: float,
+    report: RetentionReport,
+) -> None:
+    where = [Reading.device_id == device_id, Reading.captured_ms < epoch_ms(cutoff), Reading.image_path.is_not(None)]
+    if policy.images == "failed":
+        where.append(Reading.success.is_(True))
+    while True:
+        with session_scope() as s:
+            rows = s.execute(
+                select(Reading.id, Reading.image_path).where(*where).order_by(Reading.captured_ms).limit(chunk)
+            ).all()
+            if not rows:
+                return
+            s.execute(
+                update(Reading).where(Reading.id.in_([r.id for r in rows])).values(image_path=None),
+                execution_options={"synchronize_session": False},
+            )
+            bump(s, "readings")
+        report.images_detached += len(rows)
+        _release_images(store, (r.image_path for r in rows), horizon, report)
+        if len(rows) < chunk:
+            return
+
+
+def _delete_old_rollups(device_id: str, cutoff: dt.datetime, chunk: int, report: RetentionReport) -> None:
+    rowid = literal_column("rowid")
+    while True:
+        with session_scope() as s:
+            ids = s.scalars(
+                select(rowid)
+                .select_from(ReadingRollup)
+                .where(ReadingRollup.device_id == device_id, ReadingRollup.bucket_start < cutoff)
+                .limit(chunk)
+            ).all()
+            if not ids:
+                return
+            s.execute(delete(ReadingRollup).where(rowid.in_(ids)))
+        report.rollups_deleted += len(ids)
+        if len(ids) < chunk:
+            return
+
+
+def _sweep_orphan_images(store: ImageStore, horizon: float, chunk: int, report: RetentionReport) -> None:
+    """Delete files under the image dir that no reading points to.
+
+    Files modified after ``horizon`` are skipped so an image written just before
+    its reading is committed is never mistaken for an orphan.
+    """
+    batch: Dict[Path, List[str]] = {}
+    for path in store.walk():
+        try:
+            if path.stat().st_mtime > horizon:
+                continue
+        except FileNotFoundError:
+            continue
+        batch[path] = store.stored_forms(path)
+        if len(batch) >= chunk:
+            report.orphan_files_deleted += _unlink_unreferenced(batch, horizon, report)
+            batch = {}
+    report.orphan_files_deleted += _unlink_unreferenced(batch, horizon, report)
+
+
+def _db_size(conn) -> tuple[int, int]:
+    page_size = conn.exec_driver_sql("PRAGMA page_size").scalar() or 0
+    pages = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+    free = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+    return pages * page_size, free * page_size
+
+
+def compact(report: RetentionReport) -> None:
+    """Return free pages to the filesystem with ``incremental_vacuum``.
+
+    Only databases created with ``auto_vacuum=INCREMENTAL`` support this; for
+    older files the free pages are still reused by SQLite and are reported as
+    ``db_free_bytes``. A full ``VACUUM`` converts them but rewrites the file.
+    """
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        before, _free = _db_size(conn)
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            while free_pages:
+                conn.exec_driver_sql(f"PRAGMA incremental_vacuum({_VACUUM_STEP_PAGES})")
+                conn.commit()
+                remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+                if remaining >= free_pages:
+                    break
+                free_pages = remaining
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        after, free = _db_size(conn)
+        conn.commit()
+    report.db_bytes_reclaimed += max(0, before - after)
+    report.db_free_bytes = free
+
+
+def run_retention(settings: Settings, *, now: Optional[dt.datetime] = None) -> RetentionReport:
+    """Enforce retention for every device, sweep orphaned images, then compact.
+
+    Every delete works on at most ``retention_chunk_size`` rows in its own short
+    transaction, so ingestion and API writes interleave with a long cleanup.
+    """
+    started = time.perf_counter()
+    now = now or dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    chunk = settings.retention_chunk_size
+    base = Policy.from_settings(settings)
+    store = ImageStore(settings.image_dir)
+    report = RetentionReport()
+    # Files touched within the grace period may be about to gain a reference.
+    horizon = time.time() - settings.retention_orphan_grace_s
+
+    with session_scope() as s:
+        overrides = {p.device_id: p for p in s.scalars(select(RetentionPolicyRow))}
+        policies = {device_id: base.merged(overrides.get(device_id)) for device_id in s.scalars(select(Device.id))}
+
+    for device_id, policy in policies.items():
+        if policy.raw_days:
+            raw_cutoff = now - dt.timedelta(days=policy.raw_days)
+            _delete_old_readings(device_id, raw_cutoff, chunk, store, horizon, report)
+        if policy.images != "all" and policy.image_days:
+            image_cutoff = now - dt.timedelta(days=policy.image_days)
+            _detach_images(device_id, policy, image_cutoff, chunk, store, horizon, report)
+        if policy.rollup_days:
+            _delete_old_rollups(device_id, now - dt.timedelta(days=policy.rollup_days), chunk, report)
+
+    _sweep_orphan_images(store, horizon, chunk, report)
+    compact(report)
+
+    for error in report.errors:
+        log.warning("retention: %s", error)
+    report.duration_ms = round((time.perf_counter() - started) * 1000.0, 3)
+    return report
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import datetime as dt
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .db import session_scope
+from .models import Reading, ReadingRollup, RollupState, from_epoch_ms, utcnow
+
+# Bucket widths in seconds, finest first.
+RESOLUTIONS: Dict[str, int] = {"1m": 60, "1h": 3600, "1d": 86400}
+
+_STATE_NAME = "readings"
+_EPOCH = dt.datetime(1970, 1, 1)
+
+
+@dataclass
+class RollupReport:
+    readings: int = 0
+    buckets: int = 0
+    watermark: int = 0
+
+
+def bucket_start(captured_at: dt.datetime, width_s: int) -> dt.datetime:
+    """Floor a (naive UTC or aware) timestamp to its bucket; returns naive UTC."""
+    if captured_at.tzinfo is not None:
+        captured_at = captured_at.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    seconds = int((captured_at - _EPOCH).total_seconds())
+    return _EPOCH + dt.timedelta(seconds=seconds - seconds % width_s)
+
+
+def _upsert_stmt():
+    ins = sqlite_insert(ReadingRollup)
+    ex = ins.excluded
+    t = ReadingRollup.__table__.c
+    return ins.on_conflict_do_update(
+        index_elements=[t.device_id, t.resolution, t.bucket_start],
+        set_={
+            "count": t.count + ex.count,
+            "success_count": t.success_count + ex.success_count,
+            "num_count": t.num_count + ex.num_count,
+            # min()/max() with a NULL argument are NULL in SQLite; coalesce picks the other side.
+            "num_min": func.coalesce(func.min(t.num_min, ex.num_min), t.num_min, ex.num_min),
+            "num_max": func.coalesce(func.max(t.num_max, ex.num_max), t.num_max, ex.num_max),
+            "num_sum": func.coalesce(t.num_sum + ex.num_sum, t.num_sum, ex.num_sum),
+        },
+    )
+
+
+def _aggregate(s: Session, low_id: int, high_id: int, width_s: int) -> List[dict]:
+    """Aggregate readings with ``low_id < id <= high_id`` into ``width_s`` buckets in SQL."""
+    width_ms = width_s * 1000
+    bucket = (Reading.captured_ms // width_ms) * width_ms
+    rows = s.execute(
+        select(
+            Reading.device_id,
+            bucket,
+            func.count(),
+            func.sum(Reading.success, type_=Integer),
+            func.count(Reading.value_num),
+            func.min(Reading.value_num),
+            func.max(Reading.value_num),
+            func.sum(Reading.value_num),
+        )
+        .where(Reading.id > low_id, Reading.id <= high_id)
+        .group_by(Reading.device_id, bucket)
+    ).all()
+    return [
+        {
+            "device_id": device_id,
+            "bucket_start": from_epoch_ms(bucket_ms),
+            "count": count,
+            "success_count": success_count or 0,
+            "num_count": num_count,
+            "num_min": num_min,
+            "num_max": num_max,
+            "num_sum": num_sum,
+        }
+        for device_id, bucket_ms, count, success_count, num_count, num_min, num_max, num_sum in rows
+    ]
+
+
+def run_rollups(*, chunk_size: int = 5000, max_chunks: Optional[int] = None) -> RollupReport:
+    """Fold readings newer than the watermark into the 1m/1h/1d rollup tables.
+
+    Processes ``readings`` in id order, ``chunk_size`` rows per transaction; the
+    watermark advances in the same transaction as the upserts, so a crash never
+    double-counts. Late readings (old ``captured_at``, new id) merge into their
+    existing buckets. SQLite does the bucketing (integer division of
+    ``captured_ms``) and the aggregation over ``value_num``; only one row per
+    bucket comes back to Python.
+    """
+    report = RollupReport()
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        with session_scope() as s:
+            state = s.get(RollupState, _STATE_NAME)
+            if state is None:
+                state = RollupState(name=_STATE_NAME, last_reading_id=0)
+                s.add(state)
+
+            ids = (
+                select(Reading.id)
+                .where(Reading.id > state.last_reading_id)
+                .order_by(Reading.id)
+                .limit(chunk_size)
+                .subquery()
+            )
+            count, high_id = s.execute(select(func.count(), func.max(ids.c.id))).one()
+            if not count:
+                report.watermark = state.last_reading_id
+                return report
+
+            for name, width in RESOLUTIONS.items():
+                rows = _aggregate(s, state.last_reading_id, high_id, width)
+                s.execute(_upsert_stmt(), [dict(r, resolution=name) for r in rows])
+                report.buckets += len(rows)
+            state.last_reading_id = high_id
+            state.updated_at = utcnow()
+
+            report.readings += count
+            report.watermark = state.last_reading_id
+        chunks += 1
+    return report
+
+
+def pick_resolution(since: dt.datetime, until: dt.datetime, max_points: int) -> str:
+    """Finest resolution whose bucket count over ``[since, until)`` fits ``max_points``.
+
+    Falls back to the coarsest (1d) when even that exceeds the budget.
+    """
+    for name, width in RESOLUTIONS.items():
+        # Count from the aligned start: the bucket holding ``since`` is returned too.
+        span = max(0.0, (until - bucket_start(since, width)).total_seconds())
+        if math.ceil(span / width) <= max_points:
+            return name
+    return list(RESOLUTIONS)[-1]
+
+
+def series_points(rows: List[ReadingRollup]) -> List[dict]:
+    return [
+        {
+            "t": r.bucket_start.isoformat(),
+            "count": r.count,
+            "success_rate": round(r.success_count / r.count, 6) if r.count else None,
+            "min": r.num_min,
+            "max": r.num_max,
+            "avg": (r.num_sum / r.num_count) if r.num_count else None,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response, request, stream_with_context
+from sqlalchemy import func, select
+
+from ..alerts import FIRING
+from ..cache import bump, cached
+from ..models import AlertEvent, AlertRule, Device, utcnow
+from ..pagination import QueryParams, stream_page
+from ..serializers import alert_event_to_dict, alert_rule_to_dict
+from ..validation import validate_alert_rule_payload
+
+bp = Blueprint("alerts", __name__)
+
+ALERT_STATES = {"firing", "resolved"}
+
+_EVENT_COLUMNS = (
+    AlertEvent.id,
+    AlertEvent.rule_id,
+    AlertEvent.device_id,
+    AlertEvent.state,
+    AlertEvent.at,
+    AlertEvent.value,
+    AlertEvent.message,
+)
+
+
+def _get_session():
+    # Late import to avoid circulars
+    from flask import g
+
+    return g.db
+
+
+def _apply_rule(s, rule: AlertRule, payload) -> list[str]:
+    """Validate ``payload`` onto ``rule``; returns errors (rule untouched if any)."""
+    res = validate_alert_rule_payload(payload if payload is not None else {})
+    if res.errors:
+        return res.errors
+    device_id = res.cleaned.get("device_id")
+    if device_id is not None and s.scalar(select(Device.id).where(Device.id == device_id)) is None:
+        return [f"device_id {device_id} does not exist"]
+    for k, v in res.cleaned.items():
+        setattr(rule, k, v)
+    return []
+
+
+@bp.get("/api/v1/alert-rules")
+@cached("alert_rules")
+def list_alert_rules():
+    rules = _get_session().scalars(select(AlertRule).order_by(AlertRule.id)).all()
+    return {"items": [alert_rule_to_dict(r) for r in rules], "count": len(rules)}, 200
+
+
+@bp.post("/api/v1/alert-rules")
+def create_alert_rule():
+    s = _get_session()
+    rule = AlertRule(created_at=utcnow(), updated_at=utcnow())
+    errors = _apply_rule(s, rule, request.get_json(silent=True))
+    if errors:
+        return {"error": "validation_error", "details": errors}, 400
+    s.add(rule)
+    bump(s, "alert_rules")
+    s.commit()
+    return alert_rule_to_dict(rule), 201
+
+
+@bp.get("/api/v1/alert-rules/<int:rule_id>")
+def get_alert_rule(rule_id: int):
+    rule = _get_session().get(AlertRule, rule_id)
+    if rule is None:
+        return {"error": "not_found"}, 404
+    return alert_rule_to_dict(rule), 200
+
+
+@bp.put("/api/v1/alert-rules/<int:rule_id>")
+def put_alert_rule(rule_id: int):
+    s = _get_session()
+    rule = s.get(AlertRule, rule_id)
+    if rule is None:
+        return {"error": "not_found"}, 404
+    errors = _apply_rule(s, rule, request.get_json(silent=True))
+    if errors:
+        return {"error": "validation_error", "details": errors}, 400
+    rule.updated_at = utcnow()
+    bump(s, "alert_rules")
+    s.commit()
+    return alert_rule_to_dict(rule), 200
+
+
+@bp.delete("/api/v1/alert-rules/<int:rule_id>")
+def delete_alert_rule(rule_id: int):
+    s = _get_session()
+    rule = s.get(AlertRule, rule_id)
+    if rule is None:
+        return {"error": "not_found"}, 404
+    s.delete(rule)
+    # Its events go with it (ON DELETE CASCADE).
+    bump(s, "alert_rules", "alerts")
+    s.commit()
+    return "", 204
+
+
+@bp.get("/api/v1/alerts/active")
+@cached("alerts")
+def list_active_alerts():
+    """(rule, device) pairs whose latest event is ``firing``."""
+    latest = (
+        select(func.max(AlertEvent.id))
+        .group_by(AlertEvent.rule_id, AlertEvent.device_id)
+        .scalar_subquery()
+    )
+    rows = _get_session().execute(
+        select(*_EVENT_COLUMNS).where(AlertEvent.id.in_(latest), AlertEvent.state == FIRING).order_by(AlertEvent.id)
+    ).all()
+    return {"items": [alert_event_to_dict(e) for e in rows], "count": len(rows)}, 200
+
+
+@bp.get("/api/v1/alerts/events")
+@cached("alerts")
+def list_alert_events():
+    """Alert state transitions, newest first, keyset-paginated by id."""
+    params = QueryParams(request.args)
+    limit = params.limit()
+    rule_id = params.int("rule_id", 0, minimum=1, maximum=2**63 - 1)
+    device_id = params.str("device_id")
+    state = params.str("state")
+    if state is not None and state not in ALERT_STATES:
+        params.errors.append(f"state must be one of {sorted(list(ALERT_STATES))}")
+    cursor = params.cursor(1)
+    if cursor is not None and (isinstance(cursor[0], bool) or not isinstance(cursor[0], int)):
+        params.errors.append("cursor is invalid")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    stmt = select(*_EVENT_COLUMNS)
+    if rule_id:
+        stmt = stmt.where(AlertEvent.rule_id == rule_id)
+    if device_id is not None:
+        stmt = stmt.where(AlertEvent.device_id == device_id)
+    if state is not None:
+        stmt = stmt.where(AlertEvent.state == state)
+    if cursor is not None:
+        stmt = stmt.where(AlertEvent.id < cursor[0])
+    stmt = stmt.order_by(AlertEvent.id.desc()).limit(limit + 1)
+
+    rows = _get_session().execute(stmt)
+    body = stream_page(rows, limit=limit, to_dict=alert_event_to_dict, cursor_of=lambda e: [e.id])
+    return Response(stream_with_context(body), status=200, mimetype="application/json")
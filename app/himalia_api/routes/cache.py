@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import os
+
+from flask import Blueprint
+
+from ..cache import get_cache
+
+bp = Blueprint("cache", __name__)
+
+
+@bp.get("/api/v1/cache/stats")
+def cache_stats():
+    # Each API worker has its own cache; this reports the one that served the request.
+    cache = get_cache()
+    if cache is None:
+        return {"enabled": False}, 200
+    return {"enabled": True, "pid": os.getpid(), **cache.stats()}, 200
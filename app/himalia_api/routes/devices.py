@@ -3,12 +3,16 @@ from __future__ import annotations
 import datetime as dt
 import uuid
 
-from flask import Blueprint, jsonify, request
-from sqlalchemy import select
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import func, select, tuple_
 
+from ..bulk import CONTENT_TYPES, FORMATS, BulkFormatError, detect_format, export_chunks, import_devices, parse_rows
+from ..cache import bump, cached
 from ..models import Device, utcnow
-from ..serializers import device_to_dict
-from ..validation import validate_device_payload
+from ..pagination import QueryParams, encode_cursor, to_naive_utc
+from ..serializers import DEVICE_FIELDS, device_row_to_dict, device_to_dict
+from ..tags import set_device_tags, tag_filter_params, tagged_device_ids
+from ..validation import validate_device_payload, validate_endpoint_for_type
 
 bp = Blueprint("devices", __name__)
 
@@ -46,19 +50,158 @@ def create_device():
 
     s = _get_session()
     s.add(dev)
+    set_device_tags(s, {dev.id: dev.tags})
+    bump(s, "devices", "device_config")
     s.commit()
 
     return device_to_dict(dev), 201
 
 
+@bp.post("/api/v1/devices:bulk")
+def bulk_import_devices():
+    """Create (or with ``upsert=true`` replace) many devices in one transaction.
+
+    The body is a JSON array, NDJSON, CSV or XLSX (``format=`` or Content-Type).
+    Every row is validated first; invalid rows are reported by position and the
+    rest are written, unless ``atomic=true``, in which case any error aborts
+    the whole import.
+    """
+    params = QueryParams(request.args)
+    upsert = params.bool("upsert") or False
+    atomic = params.bool("atomic") or False
+    fmt = detect_format(params.str("format"), request.content_type)
+    if fmt is None:
+        params.errors.append(f"format must be one of {list(FORMATS)} (query parameter or Content-Type)")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    try:
+        rows = parse_rows(request.get_data(cache=False), fmt)
+    except BulkFormatError as e:
+        return {"error": "validation_error", "details": [str(e)]}, 400
+    max_rows = current_app.config["HIMALIA_SETTINGS"].bulk_max_rows
+    if len(rows) > max_rows:
+        return {"error": "validation_error", "details": [f"at most {max_rows} rows per request"]}, 400
+
+    s = _get_session()
+    report = import_devices(s, rows, upsert=upsert, atomic=atomic)
+    if atomic and report.errors:
+        s.rollback()
+        return {"error": "validation_error", "details": report.errors}, 400
+    s.commit()
+    return report.as_dict(), 200
+
+
+@bp.get("/api/v1/devices:export")
+def export_devices():
+    """Stream every device as JSON, NDJSON, CSV or XLSX (``format=``, default json).
+
+    The tabular formats use the columns the bulk import accepts, so an export
+    can be edited and uploaded again; passwords are never exported.
+    """
+    params = QueryParams(request.args)
+    fmt = (params.str("format") or "json").lower()
+    if fmt not in FORMATS:
+        params.errors.append(f"format must be one of {list(FORMATS)}")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    rows = _get_session().execute(
+        select(*_LIST_COLUMNS.values()).order_by(Device.created_at.asc(), Device.id.asc())
+    ).yield_per(500)
+    devices = (device_row_to_dict(r._mapping) for r in rows)
+    resp = Response(stream_with_context(export_chunks(devices, fmt)), status=200, mimetype=CONTENT_TYPES[fmt])
+    resp.headers["Content-Disposition"] = f"attachment; filename=devices.{fmt}"
+    return resp
+
+
+# Column (or expression) behind each output field; projections select only these.
+_LIST_COLUMNS = {
+    "id": Device.id,
+    "name": Device.name,
+    "type": Device.type,
+    "enabled": Device.enabled,
+    "endpoint": Device.endpoint,
+    "auth_mode": Device.auth_mode,
+    "auth_username": Device.auth_username,
+    "has_auth_password": (func.coalesce(func.length(Device.auth_password), 0) > 0).label("has_auth_password"),
+    "poll_interval_s": Device.poll_interval_s,
+    "timeout_ms": Device.timeout_ms,
+    "tags": Device.tags,
+    "notes": Device.notes,
+    "created_at": Device.created_at,
+    "updated_at": Device.updated_at,
+    "last_seen_at": Device.last_seen_at,
+    "last_poll_at": Device.last_poll_at,
+    "last_error": Device.last_error,
+}
+
+
 @bp.get("/api/v1/devices")
+@cached("devices")
 def list_devices():
-    s = _get_session()
-    rows = s.execute(select(Device).order_by(Device.created_at.asc())).scalars().all()
-    return {"items": [device_to_dict(d) for d in rows], "count": len(rows)}, 200
+    """List devices in creation order, one keyset page at a time.
+
+    Filters: ``type``, ``enabled``, ``tag`` (repeatable; ``tag_mode=all``, the
+    default, requires every tag and ``any`` at least one) and
+    ``has_error`` (``last_error IS [NOT] NULL``). ``fields=a,b`` returns only those
+    fields, selected as plain columns without building ORM objects.
+    """
+    params = QueryParams(request.args)
+    limit = params.limit()
+    dev_type = params.str("type")
+    enabled = params.bool("enabled")
+    has_error = params.bool("has_error")
+    tags, tag_mode = tag_filter_params(params)
+    cursor = params.cursor(2)
+
+    fields = params.list("fields") or list(DEVICE_FIELDS)
+    unknown = [f for f in fields if f not in _LIST_COLUMNS]
+    if unknown:
+        params.errors.append(f"unknown fields: {sorted(unknown)}")
+
+    after = None
+    if cursor is not None:
+        try:
+            after = (to_naive_utc(dt.datetime.fromisoformat(cursor[0])), str(cursor[1]))
+        except (TypeError, ValueError):
+            params.errors.append("cursor is invalid")
+
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    # id and created_at are always selected: they form the pagination key.
+    selected = list(dict.fromkeys(["id", "created_at", *fields]))
+    stmt = select(*(_LIST_COLUMNS[f] for f in selected))
+    if dev_type is not None:
+        stmt = stmt.where(Device.type == dev_type)
+    if enabled is not None:
+        stmt = stmt.where(Device.enabled == enabled)
+    if has_error is not None:
+        stmt = stmt.where(Device.last_error.is_not(None) if has_error else Device.last_error.is_(None))
+    if tags:
+        stmt = stmt.where(Device.id.in_(tagged_device_ids(tags, tag_mode)))
+    if after is not None:
+        stmt = stmt.where(Device.created_at >= after[0], tuple_(Device.created_at, Device.id) > tuple_(*after))
+    stmt = stmt.order_by(Device.created_at.asc(), Device.id.asc()).limit(limit + 1)
+
+    rows = _get_session().execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
+
+    return {
+        "items": [device_row_to_dict(r._mapping, fields) for r in rows],
+        "count": len(rows),
+        "next_cursor": next_cursor,
+    }, 200
 
 
 @bp.get("/api/v1/devices/<device_id>")
+@cached("devices")
 def get_device(device_id: str):
     s = _get_session()
     dev = s.get(Device, device_id)
@@ -96,6 +239,8 @@ def put_device(device_id: str):
 
     dev.updated_at = utcnow()
 
+    set_device_tags(s, {dev.id: dev.tags})
+    bump(s, "devices", "device_config")
     s.commit()
     return device_to_dict(dev), 200
 
@@ -116,28 +261,18 @@ def patch_device(device_id: str):
     for k, v in res.cleaned.items():
         setattr(dev, k, v)
 
-    # If either type or endpoint changed, enforce scheme/type compatibility using updated values
+    # If either type or endpoint changed, enforce scheme/type compatibility using
+    # the merged values; every other stored field was validated when it was written.
     if "type" in res.cleaned or "endpoint" in res.cleaned:
-        # Re-run validator in PUT mode against the merged state for endpoint/type coupling
-        merged = {
-            "name": dev.name,
-            "type": dev.type,
-            "endpoint": dev.endpoint,
-            "enabled": dev.enabled,
-            "auth_mode": dev.auth_mode,
-            "auth_username": dev.auth_username,
-            "auth_password": dev.auth_password,
-            "poll_interval_s": dev.poll_interval_s,
-            "timeout_ms": dev.timeout_ms,
-            "tags": dev.tags or [],
-            "notes": dev.notes,
-        }
-        check = validate_device_payload(merged, mode="put")
-        if check.errors:
+        errors = validate_endpoint_for_type(dev.type, dev.endpoint)
+        if errors:
             s.rollback()
-            return {"error": "validation_error", "details": check.errors}, 400
+            return {"error": "validation_error", "details": errors}, 400
 
     dev.updated_at = utcnow()
+    if "tags" in res.cleaned:
+        set_device_tags(s, {dev.id: dev.tags})
+    bump(s, "devices", "device_config")
     s.commit()
 
     return device_to_dict(dev), 200
@@ -151,5 +286,7 @@ def delete_device(device_id: str):
         return {"error": "not_found"}, 404
 
     s.delete(dev)
+    # Its readings, alert rules and alert events go with it (ON DELETE CASCADE).
+    bump(s, "devices", "readings", "device_config", "alert_rules", "alerts")
     s.commit()
     return "", 204
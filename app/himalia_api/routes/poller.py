@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import json
+
+from flask import Blueprint, current_app
+
+bp = Blueprint("poller", __name__)
+
+
+@bp.get("/api/v1/poller/stats")
+def poller_stats():
+    # The poller is a separate process; it publishes its metrics as a JSON file.
+    path = current_app.config["HIMALIA_SETTINGS"].poller_stats_path
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f), 200
+    except (OSError, ValueError):
+        return {"error": "poller_stats_unavailable"}, 503
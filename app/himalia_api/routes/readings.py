@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Optional
+
+from flask import Blueprint, Response, request, stream_with_context
+from sqlalchemy import Select, select, tuple_
+
+from ..cache import cached
+from ..models import Device, Reading, epoch_ms
+from ..pagination import QueryParams, stream_page
+from ..readings_export import COLUMNS as EXPORT_COLUMNS
+from ..readings_export import CONTENT_TYPES as EXPORT_CONTENT_TYPES
+from ..readings_export import FORMATS as EXPORT_FORMATS
+from ..readings_export import export_chunks, format_available
+from ..serializers import reading_to_dict
+from ..tags import tag_filter_params, tagged_device_ids
+
+bp = Blueprint("readings", __name__)
+
+_READING_COLUMNS = (
+    Reading.id,
+    Reading.device_id,
+    Reading.captured_at,
+    Reading.captured_ms,
+    Reading.value,
+    Reading.value_num,
+    Reading.unit,
+    Reading.confidence,
+    Reading.success,
+    Reading.error,
+    Reading.source,
+    Reading.image_path,
+)
+
+
+def _get_session():
+    # Late import to avoid circulars
+    from flask import g
+
+    return g.db
+
+
+def _readings_query(params: QueryParams, device_id: Optional[str]) -> tuple[Optional[Select], int]:
+    """Build a keyset-paginated readings query from the request's query string.
+
+    Pages are ordered newest first by ``(captured_ms, id)``; the cursor is the
+    last row of the previous page, so every page is an index range scan with no
+    OFFSET, whatever its depth. Integer epoch-ms keys keep the index small and
+    the comparisons numeric. ``tag``/``tag_mode`` select devices through the
+    ``device_tags`` index.
+    """
+    limit = params.limit()
+    since = params.datetime("since")
+    until = params.datetime("until")
+    success = params.bool("success")
+    source = params.str("source")
+    tags, tag_mode = tag_filter_params(params)
+    cursor = params.cursor(2)
+    order = params.str("order") or "desc"
+    if order not in {"asc", "desc"}:
+        params.errors.append("order must be asc or desc")
+
+    after_ms: Optional[int] = None
+    after_id: Optional[int] = None
+    if cursor is not None:
+        try:
+            # Cursors issued before the epoch-ms key carry an ISO timestamp.
+            at = cursor[0]
+            after_ms = epoch_ms(dt.datetime.fromisoformat(at)) if isinstance(at, str) else int(at)
+            after_id = int(cursor[1])
+        except (TypeError, ValueError):
+            params.errors.append("cursor is invalid")
+
+    if params.errors:
+        return None, limit
+
+    stmt = select(*_READING_COLUMNS)
+    if device_id is not None:
+        stmt = stmt.where(Reading.device_id == device_id)
+    stmt = _time_range(stmt, since, until)
+    if success is not None:
+        stmt = stmt.where(Reading.success == success)
+    if source is not None:
+        stmt = stmt.where(Reading.source == source)
+    if tags:
+        stmt = stmt.where(Reading.device_id.in_(tagged_device_ids(tags, tag_mode)))
+
+    key = tuple_(Reading.captured_ms, Reading.id)
+    if order == "desc":
+        if after_ms is not None:
+            # The plain column bound lets SQLite seek the index; the row value breaks ties.
+            stmt = stmt.where(Reading.captured_ms <= after_ms, key < tuple_(after_ms, after_id))
+        stmt = stmt.order_by(Reading.captured_ms.desc(), Reading.id.desc())
+    else:
+        if after_ms is not None:
+            stmt = stmt.where(Reading.captured_ms >= after_ms, key > tuple_(after_ms, after_id))
+        stmt = stmt.order_by(Reading.captured_ms.asc(), Reading.id.asc())
+
+    return stmt.limit(limit + 1), limit
+
+
+def _time_range(stmt: Select, since: Optional[dt.datetime], until: Optional[dt.datetime]) -> Select:
+    """``[since, until)`` on the epoch-ms key (bounds are naive UTC, floored to the ms)."""
+    if since is not None:
+        stmt = stmt.where(Reading.captured_ms >= epoch_ms(since))
+    if until is not None:
+        stmt = stmt.where(Reading.captured_ms < epoch_ms(until))
+    return stmt
+
+
+def _stream(stmt: Select, limit: int) -> Response:
+    rows = _get_session().execute(stmt).yield_per(200)
+    body = stream_page(
+        rows,
+        limit=limit,
+        to_dict=reading_to_dict,
+        cursor_of=lambda r: [r.captured_ms, r.id],
+    )
+    return Response(stream_with_context(body), status=200, mimetype="application/json")
+
+
+@bp.get("/api/v1/readings")
+@cached("readings", "devices")
+def list_readings():
+    params = QueryParams(request.args)
+    device_id = params.str("device_id")
+    stmt, limit = _readings_query(params, device_id)
+    if stmt is None:
+        return {"error": "validation_error", "details": params.errors}, 400
+    return _stream(stmt, limit)
+
+
+@bp.get("/api/v1/devices/<device_id>/readings")
+@cached("readings", "devices")
+def list_device_readings(device_id: str):
+    s = _get_session()
+    if s.scalar(select(Device.id).where(Device.id == device_id)) is None:
+        return {"error": "not_found"}, 404
+
+    params = QueryParams(request.args)
+    stmt, limit = _readings_query(params, device_id)
+    if stmt is None:
+        return {"error": "validation_error", "details": params.errors}, 400
+    return _stream(stmt, limit)
+
+
+_EXPORT_CHUNK_ROWS = 5000
+
+
+@bp.get("/api/v1/readings/export")
+def export_readings():
+    """Stream readings as CSV, XLSX or Parquet for offline analysis.
+
+    Filters: ``device_id`` (repeatable), ``tag`` (repeatable, with ``tag_mode``),
+    ``since``, ``until``, ``success``. With a
+    device filter rows come out per device in time order, straight off the
+    ``(device_id, captured_ms)`` index; otherwise in time order across devices.
+    Rows are fetched ``_EXPORT_CHUNK_ROWS`` at a time from one cursor and each
+    chunk is converted column-wise, so memory does not grow with the range.
+    """
+    params = QueryParams(request.args)
+    fmt = (params.str("format") or "csv").lower()
+    device_ids = params.list("device_id")
+    since = params.datetime("since")
+    until = params.datetime("until")
+    success = params.bool("success")
+    tags, tag_mode = tag_filter_params(params)
+    if fmt not in EXPORT_FORMATS:
+        params.errors.append(f"format must be one of {list(EXPORT_FORMATS)}")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+    if not format_available(fmt):
+        return {"error": "format_unavailable", "details": [f"{fmt} export requires pyarrow"]}, 501
+
+    stmt = select(*(getattr(Reading, c) for c in EXPORT_COLUMNS))
+    if device_ids:
+        stmt = stmt.where(Reading.device_id.in_(device_ids))
+    if tags:
+        stmt = stmt.where(Reading.device_id.in_(tagged_device_ids(tags, tag_mode)))
+    stmt = _time_range(stmt, since, until)
+    if success is not None:
+        stmt = stmt.where(Reading.success == success)
+    if device_ids or tags:
+        stmt = stmt.order_by(Reading.device_id, Reading.captured_ms, Reading.id)
+    else:
+        stmt = stmt.order_by(Reading.captured_ms, Reading.id)
+
+    partitions = _get_session().execute(stmt).yield_per(_EXPORT_CHUNK_ROWS).partitions()
+    resp = Response(
+        stream_with_context(export_chunks(partitions, fmt)), status=200, mimetype=EXPORT_CONTENT_TYPES[fmt]
+    )
+    resp.headers["Content-Disposition"] = f"attachment; filename=readings.{fmt}"
+    return resp
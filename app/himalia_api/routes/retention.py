@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+
+from flask import Blueprint, current_app, request
+from sqlalchemy import select
+
+from ..models import Device, RetentionPolicy, utcnow
+from ..retention import Policy
+from ..validation import validate_retention_payload
+
+bp = Blueprint("retention", __name__)
+
+
+def _get_session():
+    # Late import to avoid circulars
+    from flask import g
+
+    return g.db
+
+
+def _global_policy() -> Policy:
+    return Policy.from_settings(current_app.config["HIMALIA_SETTINGS"])
+
+
+def _override_to_dict(row: RetentionPolicy | None):
+    if row is None:
+        return None
+    return {
+        "raw_days": row.raw_days,
+        "rollup_days": row.rollup_days,
+        "images": row.images,
+        "image_days": row.image_days,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def _policy_response(device_id: str, row: RetentionPolicy | None) -> dict:
+    return {
+        "device_id": device_id,
+        "override": _override_to_dict(row),
+        "effective": asdict(_global_policy().merged(row)),
+    }
+
+
+@bp.get("/api/v1/retention")
+def get_global_retention():
+    return asdict(_global_policy()), 200
+
+
+@bp.get("/api/v1/devices/<device_id>/retention")
+def get_device_retention(device_id: str):
+    s = _get_session()
+    if s.scalar(select(Device.id).where(Device.id == device_id)) is None:
+        return {"error": "not_found"}, 404
+    return _policy_response(device_id, s.get(RetentionPolicy, device_id)), 200
+
+
+@bp.put("/api/v1/devices/<device_id>/retention")
+def put_device_retention(device_id: str):
+    s = _get_session()
+    if s.scalar(select(Device.id).where(Device.id == device_id)) is None:
+        return {"error": "not_found"}, 404
+
+    payload = request.get_json(silent=True)
+    res = validate_retention_payload(payload if payload is not None else {})
+    if res.errors:
+        return {"error": "validation_error", "details": res.errors}, 400
+
+    row = s.get(RetentionPolicy, device_id)
+    if row is None:
+        row = RetentionPolicy(device_id=device_id)
+        s.add(row)
+    for k, v in res.cleaned.items():
+        setattr(row, k, v)
+    row.updated_at = utcnow()
+    s.commit()
+
+    return _policy_response(device_id, row), 200
+
+
+@bp.delete("/api/v1/devices/<device_id>/retention")
+def delete_device_retention(device_id: str):
+    s = _get_session()
+    row = s.get(RetentionPolicy, device_id)
+    if row is None:
+        return {"error": "not_found"}, 404
+    s.delete(row)
+    s.commit()
+    return "", 204
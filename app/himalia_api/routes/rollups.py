@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from flask import Blueprint, request
+from sqlalchemy import select
+
+from ..models import Device, ReadingRollup
+from ..pagination import QueryParams
+from ..rollups import RESOLUTIONS, bucket_start, pick_resolution, series_points
+
+bp = Blueprint("rollups", __name__)
+
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS = 10000
+
+
+def _get_session():
+    # Late import to avoid circulars
+    from flask import g
+
+    return g.db
+
+
+@bp.get("/api/v1/devices/<device_id>/series")
+def device_series(device_id: str):
+    s = _get_session()
+    if s.scalar(select(Device.id).where(Device.id == device_id)) is None:
+        return {"error": "not_found"}, 404
+
+    params = QueryParams(request.args)
+    until = params.datetime("until")
+    since = params.datetime("since")
+    max_points = params.int("max_points", DEFAULT_MAX_POINTS, minimum=1, maximum=MAX_POINTS)
+    resolution = params.str("resolution") or "auto"
+    if resolution != "auto" and resolution not in RESOLUTIONS:
+        params.errors.append(f"resolution must be auto or one of {', '.join(RESOLUTIONS)}")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    if until is None:
+        until = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    if since is None:
+        since = until - dt.timedelta(days=1)
+    if since >= until:
+        return {"error": "validation_error", "details": ["since must be before until"]}, 400
+
+    if resolution == "auto":
+        resolution = pick_resolution(since, until, max_points)
+
+    # Include the bucket that contains ``since`` so a range never starts mid-gap.
+    first_bucket = bucket_start(since, RESOLUTIONS[resolution])
+    rows = s.scalars(
+        select(ReadingRollup)
+        .where(
+            ReadingRollup.device_id == device_id,
+            ReadingRollup.resolution == resolution,
+            ReadingRollup.bucket_start >= first_bucket,
+            ReadingRollup.bucket_start < until,
+        )
+        .order_by(ReadingRollup.bucket_start)
+        .limit(max_points)
+    ).all()
+
+    return {
+        "device_id": device_id,
+        "resolution": resolution,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "points": series_points(rows),
+    }, 200
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response, current_app, request
+
+from ..pagination import QueryParams
+from ..stream import EXTENSION_KEY, Broker, Subscription, sse_frame
+
+bp = Blueprint("stream", __name__)
+
+
+def _broker() -> Broker:
+    return current_app.extensions[EXTENSION_KEY]
+
+
+@bp.get("/api/v1/stream")
+def stream():
+    """Server-Sent Events: ``reading`` and ``device`` (poll status) events as they are ingested.
+
+    Filters: ``device_id`` and ``tag`` (both repeatable; an event matches if
+    either does). Without filters every device is streamed.
+    """
+    params = QueryParams(request.args)
+    device_ids = params.list("device_id")
+    tags = params.list("tag")
+    if params.errors:
+        return {"error": "validation_error", "details": params.errors}, 400
+
+    sub = _broker().subscribe(device_ids, tags)
+    if sub is None:
+        return {"error": "too_many_subscribers"}, 503
+
+    keepalive_s = current_app.config["HIMALIA_SETTINGS"].stream_keepalive_s
+    # The generator runs after the request context (and its DB session) is gone;
+    # it only needs the broker and the subscription.
+    resp = Response(_events(_broker(), sub, keepalive_s), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+def _events(broker: Broker, sub: Subscription, keepalive_s: float):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            frames = sub.take(timeout=keepalive_s)
+            if sub.dropped:
+                yield sse_frame("dropped", {"reason": "client too slow; reconnect and catch up via /api/v1/readings"})
+                return
+            if sub.closed:
+                return
+            if not frames:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(frames)
+    finally:
+        broker.unsubscribe(sub)
+
+
+@bp.get("/api/v1/stream/stats")
+def stream_stats():
+    return _broker().stats(), 200
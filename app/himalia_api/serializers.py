@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterable, Mapping
 
-from .models import Device
+from .models import AlertEvent, AlertRule, Device, Reading
 
 
 def device_to_dict(dev: Device) -> dict[str, Any]:
@@ -26,3 +26,89 @@ def device_to_dict(dev: Device) -> dict[str, Any]:
         "last_poll_at": dev.last_poll_at.isoformat() if dev.last_poll_at else None,
         "last_error": dev.last_error,
     }
+
+
+# Output fields of device_to_dict, in order; used for ?fields= projections.
+DEVICE_FIELDS = (
+    "id",
+    "name",
+    "type",
+    "enabled",
+    "endpoint",
+    "auth_mode",
+    "auth_username",
+    "has_auth_password",
+    "poll_interval_s",
+    "timeout_ms",
+    "tags",
+    "notes",
+    "created_at",
+    "updated_at",
+    "last_seen_at",
+    "last_poll_at",
+    "last_error",
+)
+
+_DEVICE_DATETIME_FIELDS = {"created_at", "updated_at", "last_seen_at", "last_poll_at"}
+
+
+def device_row_to_dict(row: Mapping[str, Any], fields: Iterable[str] = DEVICE_FIELDS) -> dict[str, Any]:
+    """Serialize a Core row (``row._mapping``) with the same formatting as device_to_dict."""
+    out: dict[str, Any] = {}
+    for f in fields:
+        v = row[f]
+        if f in _DEVICE_DATETIME_FIELDS:
+            v = v.isoformat() if v else None
+        elif f == "tags":
+            v = v if v is not None else []
+        elif f in {"enabled", "has_auth_password"}:
+            v = bool(v)
+        out[f] = v
+    return out
+
+
+def reading_to_dict(r: Reading) -> dict[str, Any]:
+    # Accepts ORM objects and Core rows alike (attribute access only).
+    return {
+        "id": r.id,
+        "device_id": r.device_id,
+        "captured_at": r.captured_at.isoformat(),
+        "value": r.value,
+        "value_num": r.value_num,
+        "unit": r.unit,
+        "confidence": r.confidence,
+        "success": r.success,
+        "error": r.error,
+        "source": r.source,
+        "image_path": r.image_path,
+    }
+
+
+def alert_rule_to_dict(rule: AlertRule) -> dict[str, Any]:
+    return {
+        "id": rule.id,
+        "name": rule.name,
+        "kind": rule.kind,
+        "enabled": rule.enabled,
+        "device_id": rule.device_id,
+        "tag": rule.tag,
+        "operator": rule.operator,
+        "threshold": rule.threshold,
+        "stale_s": rule.stale_s,
+        "streak": rule.streak,
+        "created_at": rule.created_at.isoformat(),
+        "updated_at": rule.updated_at.isoformat(),
+    }
+
+
+def alert_event_to_dict(e: AlertEvent) -> dict[str, Any]:
+    # Accepts ORM objects and Core rows alike (attribute access only).
+    return {
+        "id": e.id,
+        "rule_id": e.rule_id,
+        "device_id": e.device_id,
+        "state": e.state,
+        "at": e.at.isoformat(),
+        "value": e.value,
+        "message": e.message,
+    }
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy import func, select
+
+from .cache import generations
+from .db import get_read_session
+from .models import AlertEvent, Device, Reading
+from .serializers import alert_event_to_dict, reading_to_dict
+
+log = logging.getLogger(__name__)
+
+EXTENSION_KEY = "himalia_stream"
+
+_READING_COLUMNS = (
+    Reading.id,
+    Reading.device_id,
+    Reading.captured_at,
+    Reading.value,
+    Reading.value_num,
+    Reading.unit,
+    Reading.confidence,
+    Reading.success,
+    Reading.error,
+    Reading.source,
+    Reading.image_path,
+)
+
+
+@dataclass(frozen=True)
+class Event:
+    """One SSE frame, serialized once and shared by every subscriber it matches."""
+
+    device_id: str
+    tags: FrozenSet[str]
+    frame: str
+
+
+def sse_frame(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """A client's filter plus its bounded event buffer.
+
+    When more than ``max_buffer`` events are waiting the subscription is marked
+    dropped: it stops receiving and the stream tells the client to reconnect.
+    """
+
+    def __init__(self, device_ids: Iterable[str], tags: Iterable[str], max_buffer: int) -> None:
+        self.device_ids = frozenset(device_ids)
+        self.tags = frozenset(tags)
+        self._max_buffer = max(1, max_buffer)
+        self._buffer: Deque[str] = deque()
+        self._cond = threading.Condition()
+        self.dropped = False
+        self.closed = False
+
+    def matches(self, event: Event) -> bool:
+        if not self.device_ids and not self.tags:
+            return True
+        return event.device_id in self.device_ids or not self.tags.isdisjoint(event.tags)
+
+    def offer(self, frames: List[str]) -> bool:
+        with self._cond:
+            if self.dropped or self.closed:
+                return False
+            if len(self._buffer) + len(frames) > self._max_buffer:
+                self.dropped = True
+                self._buffer.clear()
+                self._cond.notify_all()
+                return False
+            self._buffer.extend(frames)
+            self._cond.notify_all()
+            return True
+
+    def take(self, timeout: float) -> List[str]:
+        """Wait up to ``timeout`` for frames and return everything buffered."""
+        with self._cond:
+            if not self._buffer and not self.dropped and not self.closed:
+                self._cond.wait(timeout)
+            frames = list(self._buffer)
+            self._buffer.clear()
+            return frames
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class Broker:
+    """In-process fan-out of new readings, device status and alerts to stream subscribers.
+
+    A single tailer thread per process polls ``readings`` past an id watermark
+    (only when the ``readings`` generation moved) and publishes each row once;
+    delivery to N subscribers is a buffer append each. ``alert_events`` are
+    tailed the same way behind the ``alerts`` generation. The tailer runs only
+    while someone is subscribed.
+    """
+
+    def __init__(self, *, poll_ms: int = 500, max_buffer: int = 1000, max_clients: int = 3, batch: int = 1000) -> None:
+        self._poll_s = poll_ms / 1000.0
+        self._max_buffer = max_buffer
+        self._max_clients = max_clients
+        self._batch = batch
+        self._lock = threading.Lock()
+        self._subs: List[Subscription] = []
+        self._thread: Optional[threading.Thread] = None
+        # Highest id published; readings.id is AUTOINCREMENT, so ids are never reused below it.
+        self._watermark: Optional[int] = None
+        self._generation: Optional[int] = None
+        self._alert_watermark: Optional[int] = None
+        self._alert_generation: Optional[int] = None
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+
+    # ---------------------------
+    # Subscribers
+    # ---------------------------
+    def subscribe(self, device_ids: Iterable[str] = (), tags: Iterable[str] = ()) -> Optional[Subscription]:
+        """Register a subscriber; None when ``max_clients`` are already connected."""
+        with self._lock:
+            if len(self._subs) >= self._max_clients:
+                return None
+            sub = Subscription(device_ids, tags, self._max_buffer)
+            self._subs.append(sub)
+            if self._thread is None:
+                # Start from the current end of the table: subscribers see what
+                # is ingested after they connect.
+                self._watermark, self._alert_watermark = self._max_ids()
+                self._generation = self._alert_generation = None
+                self._thread = threading.Thread(target=self._run, name="himalia-stream-tailer", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.close()
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def publish(self, events: List[Event]) -> None:
+        if not events:
+            return
+        with self._lock:
+            subs = list(self._subs)
+            self._published += len(events)
+        delivered = 0
+        for sub in subs:
+            frames = [e.frame for e in events if sub.matches(e)]
+            if not frames:
+                continue
+            if sub.offer(frames):
+                delivered += len(frames)
+            elif sub.dropped:
+                self._drop(sub)
+        with self._lock:
+            self._delivered += delivered
+
+    def _drop(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+                self._dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subs),
+                "max_clients": self._max_clients,
+                "tailer_running": self._thread is not None,
+                "watermark": self._watermark,
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped_clients": self._dropped,
+            }
+
+    # ---------------------------
+    # Tailer
+    # ---------------------------
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subs:
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("stream tailer poll failed")
+            time.sleep(self._poll_s)
+
+    def poll_once(self) -> int:
+        """Publish readings and alert events past the watermarks; returns how many."""
+        s = get_read_session()
+        try:
+            gens = generations(s, ["readings", "alerts"])
+            total = 0
+            if gens["readings"] != self._generation:
+                total += self._poll_readings(s)
+                self._generation = gens["readings"]
+            if gens["alerts"] != self._alert_generation:
+                total += self._poll_alerts(s)
+                self._alert_generation = gens["alerts"]
+            return total
+        finally:
+            s.close()
+
+    def _poll_readings(self, s) -> int:
+        total = 0
+        while True:
+            rows = s.execute(
+                select(*_READING_COLUMNS)
+                .where(Reading.id > (self._watermark or 0))
+                .order_by(Reading.id)
+                .limit(self._batch)
+            ).all()
+            if not rows:
+                return total
+            self.publish(self._events(s, rows))
+            self._watermark = rows[-1].id
+            total += len(rows)
+            if len(rows) < self._batch:
+                return total
+
+    def _poll_alerts(self, s) -> int:
+        total = 0
+        while True:
+            rows = s.execute(
+                select(AlertEvent.__table__, Device.tags)
+                .join(Device, Device.id == AlertEvent.device_id)
+                .where(AlertEvent.id > (self._alert_watermark or 0))
+                .order_by(AlertEvent.id)
+                .limit(self._batch)
+            ).all()
+            if not rows:
+                return total
+            # No SSE id: the id field carries reading ids, which alert ids would collide with.
+            self.publish(
+                [Event(e.device_id, frozenset(e.tags or []), sse_frame("alert", alert_event_to_dict(e))) for e in rows]
+            )
+            self._alert_watermark = rows[-1].id
+            total += len(rows)
+            if len(rows) < self._batch:
+                return total
+
+    def _events(self, s, rows) -> List[Event]:
+        ids = {r.device_id for r in rows}
+        devices = {
+            d.id: d
+            for d in s.execute(
+                select(Device.id, Device.tags, Device.last_seen_at, Device.last_poll_at, Device.last_error).where(
+                    Device.id.in_(ids)
+                )
+            ).all()
+        }
+        events: List[Event] = []
+        for r in rows:
+            dev = devices.get(r.device_id)
+            tags = frozenset(dev.tags or []) if dev is not None else frozenset()
+            events.append(Event(r.device_id, tags, sse_frame("reading", reading_to_dict(r), event_id=r.id)))
+        # One status event per device per poll, after its readings.
+        for dev in devices.values():
+            status = {
+                "id": dev.id,
+                "last_seen_at": dev.last_seen_at.isoformat() if dev.last_seen_at else None,
+                "last_poll_at": dev.last_poll_at.isoformat() if dev.last_poll_at else None,
+                "last_error": dev.last_error,
+            }
+            events.append(Event(dev.id, frozenset(dev.tags or []), sse_frame("device", status)))
+        return events
+
+    def _max_ids(self) -> tuple[int, int]:
+        s = get_read_session()
+        try:
+            return (
+                s.scalar(select(func.max(Reading.id))) or 0,
+                s.scalar(select(func.max(AlertEvent.id))) or 0,
+            )
+        finally:
+            s.close()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .models import DeviceTag
+from .pagination import QueryParams
+
+TAG_MODES = ("all", "any")
+
+_CHUNK = 500
+
+
+def set_device_tags(session: Session, tags_by_device: Mapping[str, Optional[Iterable[str]]]) -> None:
+    """Rewrite the ``device_tags`` rows of each device from its tag list.
+
+    Runs in the caller's transaction, so the index never disagrees with
+    ``Device.tags`` after a commit.
+    """
+    # Pending Device rows must be inserted before their tags (foreign key).
+    session.flush()
+    ids = list(tags_by_device)
+    for start in range(0, len(ids), _CHUNK):
+        session.execute(delete(DeviceTag).where(DeviceTag.device_id.in_(ids[start : start + _CHUNK])))
+    rows = [
+        {"tag": tag, "device_id": device_id}
+        for device_id, tags in tags_by_device.items()
+        for tag in dict.fromkeys(tags or ())
+    ]
+    if rows:
+        session.execute(insert(DeviceTag.__table__), rows)
+
+
+def tagged_device_ids(tags: Sequence[str], mode: str = "all") -> Select:
+    """Subquery of device ids carrying every (``all``) or any (``any``) of ``tags``.
+
+    Both read only the ``(tag, device_id)`` primary key index; ``all`` counts
+    the matched tags per device instead of intersecting one subquery per tag.
+    """
+    wanted = list(dict.fromkeys(tags))
+    stmt = select(DeviceTag.device_id).where(DeviceTag.tag.in_(wanted))
+    if mode == "all" and len(wanted) > 1:
+        stmt = stmt.group_by(DeviceTag.device_id).having(func.count() == len(wanted))
+    return stmt
+
+
+def tag_filter_params(params: QueryParams) -> Tuple[List[str], str]:
+    """The ``tag`` (repeatable) and ``tag_mode`` query parameters; errors go to ``params``."""
+    tags = params.list("tag")
+    mode = (params.str("tag_mode") or "all").lower()
+    if mode not in TAG_MODES:
+        params.errors.append("tag_mode must be all or any")
+    return tags, mode
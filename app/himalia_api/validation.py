@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
 
 ALLOWED_DEVICE_TYPES = {"camera_ip_snapshot", "camera_rtsp"}
 ALLOWED_AUTH_MODES = {"none", "basic", "digest", "bearer"}
 
+# Endpoint scheme each device type requires.
+_TYPE_SCHEMES = {
+    "camera_ip_snapshot": ({"http", "https"}, "endpoint scheme must be http or https for camera_ip_snapshot"),
+    "camera_rtsp": ({"rtsp"}, "endpoint scheme must be rtsp for camera_rtsp"),
+}
+
 
 @dataclass
 class ValidationResult:
@@ -23,22 +30,267 @@ def _is_int(v: Any) -> bool:
     return isinstance(v, int) and not isinstance(v, bool)
 
 
-def _validate_endpoint(device_type: str, endpoint: str) -> str | None:
+@lru_cache(maxsize=4096)
+def _endpoint_scheme(endpoint: str) -> Optional[str]:
+    """Lower-cased URL scheme, or None if the URL cannot be parsed.
+
+    Cached: fleets share a handful of URL shapes and bulk imports and PATCH
+    re-checks see the same endpoints again.
+    """
     try:
-        p = urlparse(endpoint)
-    except Exception:
+        return (urlparse(endpoint).scheme or "").lower()
+    except ValueError:
+        return None
+
+
+def _validate_endpoint(device_type: str, endpoint: str) -> str | None:
+    scheme = _endpoint_scheme(endpoint)
+    if scheme is None:
         return "endpoint must be a valid URL"
+    rule = _TYPE_SCHEMES.get(device_type)
+    if rule is not None and scheme not in rule[0]:
+        return rule[1]
+    return None
 
-    scheme = (p.scheme or "").lower()
 
-    if device_type == "camera_ip_snapshot":
-        if scheme not in {"http", "https"}:
-            return "endpoint scheme must be http or https for camera_ip_snapshot"
-    elif device_type == "camera_rtsp":
-        if scheme != "rtsp":
-            return "endpoint scheme must be rtsp for camera_rtsp"
+# ---------------------------
+# Declarative device schema
+# ---------------------------
+_MISSING = object()
 
-    return None
+
+@dataclass(frozen=True)
+class Field:
+    """One writable device field.
+
+    ``kind`` is ``str``, ``bool``, ``int``, ``choice`` or ``str_list``. ``error``
+    is the message for a value of the wrong type; ``null`` is what an explicit
+    null becomes when ``nullable`` (e.g. ``tags: null`` means no tags).
+    """
+
+    name: str
+    kind: str
+    error: str
+    description: str
+    required: bool = False
+    nullable: bool = False
+    null: Any = None
+    default: Any = _MISSING
+    non_empty: bool = False
+    choices: FrozenSet[str] = frozenset()
+    minimum: Optional[int] = None
+    maximum: Optional[int] = None
+
+
+DEVICE_SCHEMA_FIELDS: Tuple[Field, ...] = (
+    Field("name", "str", "name must be a non-empty string", "Display name", required=True, non_empty=True),
+    Field(
+        "type",
+        "choice",
+        f"type must be one of {sorted(ALLOWED_DEVICE_TYPES)}",
+        "Device type; decides the endpoint scheme",
+        required=True,
+        choices=frozenset(ALLOWED_DEVICE_TYPES),
+    ),
+    Field("enabled", "bool", "enabled must be boolean", "Whether the poller captures from it", default=True),
+    Field(
+        "endpoint",
+        "str",
+        "endpoint must be a non-empty string",
+        "Snapshot URL (http/https) or stream URL (rtsp)",
+        required=True,
+        non_empty=True,
+    ),
+    Field(
+        "auth_mode",
+        "choice",
+        f"auth_mode must be one of {sorted(ALLOWED_AUTH_MODES)} or null",
+        "How the poller authenticates",
+        nullable=True,
+        default="none",
+        choices=frozenset(ALLOWED_AUTH_MODES),
+    ),
+    Field("auth_username", "str", "auth_username must be string or null", "Username", nullable=True, default=None),
+    Field(
+        "auth_password",
+        "str",
+        "auth_password must be string or null",
+        "Password or bearer token (write-only)",
+        nullable=True,
+        default=None,
+    ),
+    Field(
+        "poll_interval_s",
+        "int",
+        "poll_interval_s must be an integer",
+        "Seconds between captures",
+        default=60,
+        minimum=1,
+        maximum=3600,
+    ),
+    Field(
+        "timeout_ms",
+        "int",
+        "timeout_ms must be an integer",
+        "Capture timeout in milliseconds",
+        default=5000,
+        minimum=100,
+        maximum=60000,
+    ),
+    Field("tags", "str_list", "tags must be a list of strings", "Free-form labels", nullable=True, null=(), default=()),
+    Field("notes", "str", "notes must be a string or null", "Free-form notes", nullable=True, default=None),
+)
+
+# Check for one field: value -> (cleaned, None) or (None, error).
+_Check = Callable[[Any], Tuple[Any, Optional[str]]]
+
+
+def _compile_field(f: Field) -> _Check:
+    """Build the check for ``f`` once, so a call is a couple of type tests."""
+    error = f.error
+    null = list(f.null) if isinstance(f.null, tuple) else f.null
+
+    if f.kind == "str":
+        if f.non_empty:
+            def check_str(v: Any) -> Tuple[Any, Optional[str]]:
+                if isinstance(v, str):
+                    v = v.strip()
+                    if v:
+                        return v, None
+                return None, error
+        else:
+            def check_str(v: Any) -> Tuple[Any, Optional[str]]:
+                return (v, None) if isinstance(v, str) else (None, error)
+        base = check_str
+    elif f.kind == "bool":
+        def base(v: Any) -> Tuple[Any, Optional[str]]:
+            return (v, None) if v is True or v is False else (None, error)
+    elif f.kind == "int":
+        lo, hi = f.minimum, f.maximum
+        range_error = f"{f.name} must be between {lo} and {hi}"
+
+        def base(v: Any) -> Tuple[Any, Optional[str]]:
+            if not _is_int(v):
+                return None, error
+            if v < lo or v > hi:
+                return None, range_error
+            return v, None
+    elif f.kind == "choice":
+        choices = f.choices
+
+        def base(v: Any) -> Tuple[Any, Optional[str]]:
+            return (v, None) if isinstance(v, str) and v in choices else (None, error)
+    elif f.kind == "str_list":
+        def base(v: Any) -> Tuple[Any, Optional[str]]:
+            if isinstance(v, list) and all(isinstance(x, str) for x in v):
+                return v, None
+            return None, error
+    else:
+        raise ValueError(f"unknown field kind: {f.kind}")
+
+    if not f.nullable:
+        return base
+
+    def nullable(v: Any) -> Tuple[Any, Optional[str]]:
+        if v is None:
+            return (list(null) if isinstance(null, list) else null), None
+        return base(v)
+
+    return nullable
+
+
+class DeviceSchema:
+    """Validator compiled from a tuple of ``Field`` specs.
+
+    Field checks, the allowed-name set, required names and defaults are all
+    built once in ``__init__``; ``validate`` only walks the payload.
+    """
+
+    def __init__(self, fields: Iterable[Field]) -> None:
+        self.fields: Tuple[Field, ...] = tuple(fields)
+        self._checks: Tuple[Tuple[str, _Check], ...] = tuple((f.name, _compile_field(f)) for f in self.fields)
+        self._allowed: FrozenSet[str] = frozenset(f.name for f in self.fields)
+        self._required: Tuple[str, ...] = tuple(sorted(f.name for f in self.fields if f.required))
+        self._defaults: Tuple[Tuple[str, Any], ...] = tuple(
+            (f.name, f.default) for f in self.fields if f.default is not _MISSING
+        )
+
+    def _new_defaults(self) -> Dict[str, Any]:
+        return {k: (list(v) if isinstance(v, tuple) else v) for k, v in self._defaults}
+
+    def validate(self, data: Any, *, mode: str) -> ValidationResult:
+        if not isinstance(data, dict):
+            return ValidationResult(cleaned={}, errors=["body must be a JSON object"])
+
+        errors: List[str] = []
+        full = mode in {"create", "put"}
+
+        unknown = data.keys() - self._allowed
+        if unknown:
+            errors.append(f"unknown fields: {sorted(unknown)}")
+        if mode == "patch" and len(unknown) == len(data):
+            errors.append("patch body must include at least one updatable field")
+
+        cleaned = self._new_defaults() if full else {}
+        if full:
+            for k in self._required:
+                if k not in data:
+                    errors.append(f"missing required field: {k}")
+
+        for name, check in self._checks:
+            if name in data:
+                value, err = check(data[name])
+                if err is None:
+                    cleaned[name] = value
+                else:
+                    errors.append(err)
+
+        # Cross-field: endpoint scheme depends on type
+        if full or ("type" in data and "endpoint" in data):
+            device_type = cleaned["type"] if "type" in cleaned else data.get("type")
+            endpoint = cleaned["endpoint"] if "endpoint" in cleaned else data.get("endpoint")
+            if isinstance(device_type, str) and isinstance(endpoint, str):
+                err = _validate_endpoint(device_type, endpoint)
+                if err:
+                    errors.append(err)
+
+        return ValidationResult(cleaned=cleaned, errors=errors)
+
+    def validate_many(self, items: Iterable[Any], *, mode: str) -> List[ValidationResult]:
+        validate = self.validate
+        return [validate(item, mode=mode) for item in items]
+
+    def json_schema(self, *, mode: str) -> Dict[str, Any]:
+        """OpenAPI schema of a request body for ``mode`` (create, put or patch)."""
+        props: Dict[str, Any] = {}
+        for f in self.fields:
+            prop: Dict[str, Any] = {"description": f.description}
+            if f.kind in {"str", "choice"}:
+                prop["type"] = "string"
+                if f.non_empty:
+                    prop["minLength"] = 1
+                if f.choices:
+                    prop["enum"] = sorted(f.choices)
+            elif f.kind == "bool":
+                prop["type"] = "boolean"
+            elif f.kind == "int":
+                prop.update(type="integer", minimum=f.minimum, maximum=f.maximum)
+            elif f.kind == "str_list":
+                prop.update(type="array", items={"type": "string"})
+            if f.nullable:
+                prop["nullable"] = True
+            if f.default is not _MISSING and mode != "patch":
+                prop["default"] = list(f.default) if isinstance(f.default, tuple) else f.default
+            props[f.name] = prop
+        schema: Dict[str, Any] = {"type": "object", "properties": props, "additionalProperties": False}
+        if mode in {"create", "put"}:
+            schema["required"] = list(self._required)
+        else:
+            schema["minProperties"] = 1
+        return schema
+
+
+DEVICE_SCHEMA = DeviceSchema(DEVICE_SCHEMA_FIELDS)
 
 
 def validate_device_payload(
@@ -56,160 +308,140 @@ def validate_device_payload(
     PUT semantics: unspecified optional fields reset to defaults/null.
     PATCH semantics: unspecified fields unchanged; payload must include at least one field.
     """
+    return DEVICE_SCHEMA.validate(data, mode=mode)
+
+
+def validate_device_payloads(items: Iterable[Any], *, mode: str) -> List[ValidationResult]:
+    """Validate many payloads in one call; one result (with its own errors) per item."""
+    return DEVICE_SCHEMA.validate_many(items, mode=mode)
+
+
+def validate_endpoint_for_type(device_type: str, endpoint: str) -> List[str]:
+    """Cross-field check alone, for updates that merge into an already valid device."""
+    err = _validate_endpoint(device_type, endpoint)
+    return [err] if err else []
+
+
+RETENTION_IMAGE_MODES = {"all", "failed", "none"}
+_RETENTION_DAY_FIELDS = ("raw_days", "rollup_days", "image_days")
 
+
+def validate_retention_payload(data: Dict[str, Any]) -> ValidationResult:
+    """Validate a per-device retention override (PUT semantics).
+
+    Every field is optional; a missing or null field inherits the global policy.
+    Day counts of 0 mean keep forever.
+    """
     errors: List[str] = []
     cleaned: Dict[str, Any] = {}
 
     if not isinstance(data, dict):
         return ValidationResult(cleaned={}, errors=["body must be a JSON object"])
 
-    required = {"name", "type", "endpoint"} if mode in {"create", "put"} else set()
-
-    allowed_fields = {
-        "name",
-        "type",
-        "enabled",
-        "endpoint",
-        "auth_mode",
-        "auth_username",
-        "auth_password",
-        "poll_interval_s",
-        "timeout_ms",
-        "tags",
-        "notes",
-        # operational fields are not writable via API in Sprint 2
-    }
-
-    unknown = set(data.keys()) - allowed_fields
+    unknown = set(data.keys()) - set(_RETENTION_DAY_FIELDS) - {"images"}
     if unknown:
         errors.append(f"unknown fields: {sorted(list(unknown))}")
 
-    # PATCH requires at least one recognized field
-    if mode == "patch":
-        provided = set(data.keys()) & allowed_fields
-        if not provided:
-            errors.append("patch body must include at least one updatable field")
-
-    # Defaults for create/put
-    if mode in {"create", "put"}:
-        cleaned["enabled"] = True
-        cleaned["auth_mode"] = "none"
-        cleaned["auth_username"] = None
-        cleaned["auth_password"] = None
-        cleaned["poll_interval_s"] = 60
-        cleaned["timeout_ms"] = 5000
-        cleaned["tags"] = []
-        cleaned["notes"] = None
-
-    # Required fields
-    for k in required:
-        if k not in data:
-            errors.append(f"missing required field: {k}")
-
-    # name
-    if "name" in data:
-        if not isinstance(data["name"], str) or not data["name"].strip():
-            errors.append("name must be a non-empty string")
+    for k in _RETENTION_DAY_FIELDS:
+        v = data.get(k)
+        if v is None:
+            cleaned[k] = None
+        elif not _is_int(v):
+            errors.append(f"{k} must be an integer or null")
+        elif v < 0 or v > 36500:
+            errors.append(f"{k} must be between 0 and 36500")
         else:
-            cleaned["name"] = data["name"].strip()
+            cleaned[k] = v
 
-    # type
-    if "type" in data:
-        if not isinstance(data["type"], str) or data["type"] not in ALLOWED_DEVICE_TYPES:
-            errors.append(f"type must be one of {sorted(list(ALLOWED_DEVICE_TYPES))}")
-        else:
-            cleaned["type"] = data["type"]
+    v = data.get("images")
+    if v is None or v in RETENTION_IMAGE_MODES:
+        cleaned["images"] = v
+    else:
+        errors.append(f"images must be one of {sorted(list(RETENTION_IMAGE_MODES))} or null")
 
-    # enabled
-    if "enabled" in data:
-        if not _is_bool(data["enabled"]):
-            errors.append("enabled must be boolean")
-        else:
-            cleaned["enabled"] = bool(data["enabled"])
+    return ValidationResult(cleaned=cleaned, errors=errors)
 
-    # endpoint
-    if "endpoint" in data:
-        if not isinstance(data["endpoint"], str) or not data["endpoint"].strip():
-            errors.append("endpoint must be a non-empty string")
-        else:
-            cleaned["endpoint"] = data["endpoint"].strip()
-
-    # auth
-    if "auth_mode" in data:
-        if data["auth_mode"] is None:
-            cleaned["auth_mode"] = None
-        elif not isinstance(data["auth_mode"], str) or data["auth_mode"] not in ALLOWED_AUTH_MODES:
-            errors.append(f"auth_mode must be one of {sorted(list(ALLOWED_AUTH_MODES))} or null")
-        else:
-            cleaned["auth_mode"] = data["auth_mode"]
 
-    if "auth_username" in data:
-        if data["auth_username"] is None:
-            cleaned["auth_username"] = None
-        elif not isinstance(data["auth_username"], str):
-            errors.append("auth_username must be string or null")
-        else:
-            cleaned["auth_username"] = data["auth_username"]
+ALERT_RULE_KINDS = {"threshold", "stale", "error_streak"}
+ALERT_OPERATORS = {">", ">=", "<", "<=", "==", "!="}
+# Parameter fields each rule kind requires; the others must be absent or null.
+_ALERT_KIND_FIELDS = {
+    "threshold": ("operator", "threshold"),
+    "stale": ("stale_s",),
+    "error_streak": ("streak",),
+}
+_ALERT_FIELDS = {"name", "kind", "enabled", "device_id", "tag", "operator", "threshold", "stale_s", "streak"}
 
-    if "auth_password" in data:
-        if data["auth_password"] is None:
-            cleaned["auth_password"] = None
-        elif not isinstance(data["auth_password"], str):
-            errors.append("auth_password must be string or null")
-        else:
-            cleaned["auth_password"] = data["auth_password"]
-
-    # poll_interval_s
-    if "poll_interval_s" in data:
-        v = data["poll_interval_s"]
-        if not _is_int(v):
-            errors.append("poll_interval_s must be an integer")
-        elif v < 1 or v > 3600:
-            errors.append("poll_interval_s must be between 1 and 3600")
-        else:
-            cleaned["poll_interval_s"] = v
-
-    # timeout_ms
-    if "timeout_ms" in data:
-        v = data["timeout_ms"]
-        if not _is_int(v):
-            errors.append("timeout_ms must be an integer")
-        elif v < 100 or v > 60000:
-            errors.append("timeout_ms must be between 100 and 60000")
-        else:
-            cleaned["timeout_ms"] = v
 
-    # tags
-    if "tags" in data:
-        v = data["tags"]
-        if v is None:
-            cleaned["tags"] = []
-        elif isinstance(v, list) and all(isinstance(x, str) for x in v):
-            cleaned["tags"] = v
-        else:
-            errors.append("tags must be a list of strings")
+def validate_alert_rule_payload(data: Dict[str, Any]) -> ValidationResult:
+    """Validate an alert rule (PUT semantics: the body is the whole rule).
 
-    # notes
-    if "notes" in data:
-        v = data["notes"]
-        if v is None:
-            cleaned["notes"] = None
-        elif not isinstance(v, str):
-            errors.append("notes must be a string or null")
+    ``device_id`` and ``tag`` are mutually exclusive; with neither the rule
+    applies to every device. Whether ``device_id`` exists is checked by the route.
+    """
+    errors: List[str] = []
+    cleaned: Dict[str, Any] = {}
+
+    if not isinstance(data, dict):
+        return ValidationResult(cleaned={}, errors=["body must be a JSON object"])
+
+    unknown = set(data.keys()) - _ALERT_FIELDS
+    if unknown:
+        errors.append(f"unknown fields: {sorted(list(unknown))}")
+
+    name = data.get("name")
+    if not isinstance(name, str) or not name.strip():
+        errors.append("name is required")
+    elif len(name.strip()) > 200:
+        errors.append("name must be at most 200 characters")
+    else:
+        cleaned["name"] = name.strip()
+
+    enabled = data.get("enabled", True)
+    if not _is_bool(enabled):
+        errors.append("enabled must be a boolean")
+    else:
+        cleaned["enabled"] = enabled
+
+    for k in ("device_id", "tag"):
+        v = data.get(k)
+        if v is not None and (not isinstance(v, str) or not v.strip()):
+            errors.append(f"{k} must be a non-empty string or null")
+        else:
+            cleaned[k] = v.strip() if v is not None else None
+    if cleaned.get("device_id") and cleaned.get("tag"):
+        errors.append("device_id and tag are mutually exclusive")
+
+    kind = data.get("kind")
+    if kind not in ALERT_RULE_KINDS:
+        errors.append(f"kind must be one of {sorted(list(ALERT_RULE_KINDS))}")
+        return ValidationResult(cleaned=cleaned, errors=errors)
+    cleaned["kind"] = kind
+
+    required = _ALERT_KIND_FIELDS[kind]
+    for k in ("operator", "threshold", "stale_s", "streak"):
+        v = data.get(k)
+        cleaned[k] = None
+        if k not in required:
+            if v is not None:
+                errors.append(f"{k} does not apply to {kind} rules")
+        elif v is None:
+            errors.append(f"{k} is required for {kind} rules")
+        elif k == "operator":
+            if v not in ALERT_OPERATORS:
+                errors.append(f"operator must be one of {sorted(list(ALERT_OPERATORS))}")
+            else:
+                cleaned[k] = v
+        elif k == "threshold":
+            if _is_bool(v) or not isinstance(v, (int, float)) or v != v or v in (float("inf"), float("-inf")):
+                errors.append("threshold must be a finite number")
+            else:
+                cleaned[k] = float(v)
+        elif not _is_int(v):
+            errors.append(f"{k} must be an integer")
+        elif v < 1 or v > 86400 * 365:
+            errors.append(f"{k} must be between 1 and {86400 * 365}")
         else:
-            cleaned["notes"] = v
-
-    # Cross-field: endpoint scheme depends on type
-    t = cleaned.get("type") if mode in {"create", "put"} else data.get("type")
-    e = cleaned.get("endpoint") if mode in {"create", "put"} else data.get("endpoint")
-
-    if ("type" in data or mode in {"create", "put"}) and ("endpoint" in data or mode in {"create", "put"}):
-        # Determine device_type used for validation
-        device_type = cleaned.get("type") if "type" in cleaned else data.get("type")
-        endpoint = cleaned.get("endpoint") if "endpoint" in cleaned else data.get("endpoint")
-        if isinstance(device_type, str) and isinstance(endpoint, str):
-            err = _validate_endpoint(device_type, endpoint)
-            if err:
-                errors.append(err)
+            cleaned[k] = v
 
     return ValidationResult(cleaned=cleaned, errors=errors)
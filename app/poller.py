@@ -1,8 +1,151 @@
 #!/usr/bin/env python3
-"""Cron-invoked poller entrypoint (placeholder)."""
-def main() -> int:
-    print("POLL_RUN_PLACEHOLDER")
+"""Poller entrypoint.
+
+Runs the long-lived capture engine under s6 (``/etc/services.d/poller``),
+plus periodic maintenance jobs (reading rollups, retention).
+``--once`` polls every enabled device a single time and exits.
+``--drain-spool`` replays the on-disk reading spool into the database and
+exits (run from ``/etc/cont-finish.d`` on container stop).
+``--processes N`` (``HIMALIA_POLLER_PROCESSES``) runs N sharded capture
+workers as child processes, each with its own spool directory, and keeps the
+maintenance jobs in the parent.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import multiprocessing
+import signal
+import threading
+
+from himalia_api.alerts import build_alert_engine
+from himalia_api.config import load_settings
+from himalia_api.db import init_db
+from himalia_api.poller import CaptureEngine
+from himalia_api.poller.ingest import ReadingWriter
+from himalia_api.poller.shards import spool_dirs, worker_settings
+from himalia_api.poller.spool import open_spool
+from himalia_api.poller.maintenance import MaintenanceJobs
+
+log = logging.getLogger("himalia.poller")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Himalia device poller")
+    parser.add_argument("--once", action="store_true", help="poll every enabled device once and exit")
+    parser.add_argument("--drain-spool", action="store_true", help="replay spooled readings into the database and exit")
+    parser.add_argument("--timeout", type=float, default=None, help="give up draining after this many seconds of DB errors")
+    parser.add_argument("--processes", type=int, default=None, help="sharded capture worker processes (default HIMALIA_POLLER_PROCESSES)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    settings = load_settings()
+    init_db(settings)
+
+    if args.drain_spool:
+        return drain_spool(settings, args.timeout)
+
+    processes = args.processes if args.processes is not None else settings.poller_processes
+    if processes > 1 and not args.once:
+        return run_processes(settings, processes)
+
+    jobs = MaintenanceJobs(settings)
+    engine = CaptureEngine(settings, extra_stats={"maintenance": jobs.stats})
+
+    if args.once:
+        try:
+            results = engine.run_once()
+        finally:
+            engine.stop()
+        failed = sum(1 for r in results if not r.success)
+        print(f"POLL_RUN devices={len(results)} failed={failed}")
+        return 0
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    jobs.start()
+    try:
+        engine.run_forever(stop)
+    finally:
+        jobs.stop()
+        engine.stop()
+    return 0
+
+
+def drain_spool(settings, timeout: float | None) -> int:
+    dirs = spool_dirs(settings)
+    if not dirs:
+        print("SPOOL_DRAIN disabled")
+        return 0
+    failed = 0
+    alerts = build_alert_engine(settings)
+    # The top-level spool plus the per-worker ones left by --processes.
+    for directory in dirs:
+        spool = open_spool(dataclasses.replace(settings, spool_dir=directory))
+        writer = ReadingWriter(max_batch=settings.ingest_max_batch, spool=spool, alerts=alerts)
+        ok = writer.drain(timeout)
+        failed += not ok
+        stats = writer.stats()
+        print(
+            f"SPOOL_DRAIN dir={directory} rows={stats['rows']} segments_left={stats['spool']['segments']} "
+            f"torn={stats['spool']['torn_segments']}"
+        )
+    return 0 if not failed else 1
+
+
+def run_worker(settings, index: int) -> None:
+    """Child process body for ``--processes``: one sharded capture engine."""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s %(levelname)s [worker-{index}] [%(name)s] %(message)s")
+    settings = worker_settings(settings, index)
+    init_db(settings)
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    engine = CaptureEngine(settings)
+    try:
+        engine.run_forever(stop)
+    finally:
+        engine.stop()
+
+
+def run_processes(settings, processes: int) -> int:
+    """Supervise ``processes`` sharded workers; a worker that exits is restarted.
+
+    Workers split the devices through the shard leases, so a restarted (or
+    crashed) worker's devices are picked up by the others once its leases
+    expire. Maintenance jobs run once, here.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    def spawn(index: int):
+        proc = ctx.Process(target=run_worker, args=(settings, index), name=f"himalia-poller-{index}", daemon=False)
+        proc.start()
+        return proc
+
+    workers = [spawn(i) for i in range(processes)]
+    jobs = MaintenanceJobs(settings)
+    jobs.start()
+    try:
+        while not stop.wait(1.0):
+            for i, proc in enumerate(workers):
+                if not proc.is_alive():
+                    log.warning("poller worker %d exited with %s; restarting", i, proc.exitcode)
+                    workers[i] = spawn(i)
+    finally:
+        jobs.stop()
+        for proc in workers:
+            proc.terminate()  # SIGTERM: each worker drains its spool before exiting
+        for proc in workers:
+            proc.join(settings.spool_drain_timeout_s + 5)
     return 0
 
+
 if __name__ == "__main__":
     raise SystemExit(main())
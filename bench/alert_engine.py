@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Ingest throughput with the alert engine in the write path.
+
+Commits ``--readings`` poll results through ``write_batch`` in batches of
+``--batch``, first without alerts and then with ``--rules-per-device`` rules on
+every device (a mix of per-device threshold, per-tag error-streak and a global
+stale rule), and reports readings/s, alert events written and SQL statements
+per batch:
+
+    python bench/alert_engine.py --devices 500 --readings 200000 --batch 500
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+
+
+def run(with_alerts: bool, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.alerts import AlertEngine
+    from himalia_api.db import get_engine, session_scope
+    from himalia_api.models import AlertEvent, AlertRule, Device, utcnow
+    from himalia_api.poller import PollResult
+    from himalia_api.poller.ingest import write_batch
+
+    create_app()
+    ids = [f"dev-{i:05d}" for i in range(args.devices)]
+    now = utcnow()
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [{"id": i, "name": i, "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+              "tags": [f"zone-{n % 10}"], "created_at": now, "updated_at": now} for n, i in enumerate(ids)],
+        )
+        if with_alerts:
+            rules = [{"name": "stale", "kind": "stale", "stale_s": 300}]
+            rules += [{"name": f"zone-{z}", "kind": "error_streak", "streak": 3, "tag": f"zone-{z}"} for z in range(10)]
+            for n in range(max(0, args.rules_per_device - 2)):
+                rules += [{"name": f"hi-{d}-{n}", "kind": "threshold", "operator": ">", "threshold": 90.0 + n,
+                           "device_id": d} for d in ids]
+            s.execute(insert(AlertRule), [dict(r, enabled=True, created_at=now, updated_at=now) for r in rules])
+
+    engine = AlertEngine() if with_alerts else None
+    rnd = random.Random(7)
+    start = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+    batches = []
+    for lo in range(0, args.readings, args.batch):
+        batch = []
+        for n in range(lo, min(lo + args.batch, args.readings)):
+            ok = rnd.random() > 0.05
+            batch.append(PollResult(
+                device_id=ids[n % len(ids)],
+                captured_at=start + dt.timedelta(milliseconds=n),
+                success=ok,
+                value=f"{rnd.uniform(0, 100):.1f}" if ok else None,
+                error=None if ok else "timeout",
+            ))
+        batches.append(batch)
+
+    statements = [0]
+    event.listen(get_engine(), "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+    t0 = time.perf_counter()
+    for batch in batches:
+        write_batch(batch, alerts=engine)
+    elapsed = time.perf_counter() - t0
+
+    with session_scope() as s:
+        events = s.scalar(select(func.count()).select_from(AlertEvent))
+    return {
+        "variant": "alerts" if with_alerts else "baseline",
+        "rate": args.readings / elapsed,
+        "events": events,
+        "stmts_per_batch": statements[0] / len(batches),
+        "rules": engine.stats()["rules"] if engine is not None else 0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--readings", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--rules-per-device", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'variant':<9} {'rules':>6} {'readings/s':>11} {'events':>7} {'stmts/batch':>12}")
+    for with_alerts in (False, True):
+        r = run(with_alerts, args)
+        print(f"{r['variant']:<9} {r['rules']:>6} {r['rate']:>11.0f} {r['events']:>7} {r['stmts_per_batch']:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""API throughput and latency per serving mode under concurrent clients.
+
+Seeds a temporary database, then serves it with each mode in turn (Werkzeug dev
+server, gunicorn with one sync worker, gunicorn gthread with N workers and, if
+installed, gevent) while client threads alternate ``GET /api/v1/devices`` and
+``GET /api/v1/readings``. Prints requests/s and latency percentiles:
+
+    python bench/api_load.py --clients 32 --seconds 10 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+import requests  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+API_KEY = "bench-api-key"
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed(db_url: str, devices: int, readings: int) -> None:
+    os.environ["HIMALIA_DB_URL"] = db_url
+    from himalia_api import create_app
+    from himalia_api.db import session_scope
+    from himalia_api.models import Device, Reading, utcnow
+
+    create_app()
+    ids = [str(uuid.uuid4()) for _ in range(devices)]
+    now = utcnow()
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [
+                {"id": i, "name": i[:8], "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+                 "created_at": now, "updated_at": now}
+                for i in ids
+            ],
+        )
+        s.execute(
+            insert(Reading),
+            [
+                {"device_id": ids[n % devices], "captured_at": now - dt.timedelta(seconds=n),
+                 "value": str(n), "success": True}
+                for n in range(readings)
+            ],
+        )
+
+
+def modes(workers: int):
+    yield "flask-dev", ["flask", "--app", "wsgi:app", "run", "--no-reload", "--no-debugger", "--with-threads"], {}
+    yield "gunicorn-sync-1", None, {"HIMALIA_API_WORKERS": "1", "HIMALIA_API_WORKER_CLASS": "sync"}
+    yield f"gunicorn-gthread-{workers}", None, {"HIMALIA_API_WORKERS": str(workers), "HIMALIA_API_WORKER_CLASS": "gthread"}
+    if importlib.util.find_spec("gevent") is not None:
+        yield f"gunicorn-gevent-{workers}", None, {"HIMALIA_API_WORKERS": str(workers), "HIMALIA_API_WORKER_CLASS": "gevent"}
+
+
+def start_server(cmd, extra_env, db_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        {
+            "HIMALIA_DB_URL": db_url,
+            "HIMALIA_API_KEY": API_KEY,
+            "HIMALIA_MIGRATIONS_ON_STARTUP": "false",
+            "HIMALIA_API_BIND": f"127.0.0.1:{port}",
+            "HIMALIA_API_MAX_REQUESTS": "0",
+        }
+    )
+    env.update(extra_env)
+    if cmd is None:
+        cmd = [sys.executable, "-m", "gunicorn", "-c", str(APP_DIR / "gunicorn.conf.py"), "wsgi:app"]
+    else:
+        cmd = cmd + ["--host", "127.0.0.1", "--port", str(port)]
+    proc = subprocess.Popen(cmd, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/v1/health", timeout=0.5)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"server did not start: {' '.join(cmd)}")
+
+
+def hammer(base: str, args) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    paths = ["/api/v1/devices", f"/api/v1/readings?limit={args.page}"]
+
+    def client(n: int):
+        nonlocal errors
+        session = requests.Session()
+        session.headers["X-API-Key"] = API_KEY
+        mine, bad, i = [], 0, n
+        while time.monotonic() < deadline:
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(base + paths[i % len(paths)], timeout=10).status_code == 200
+            except requests.RequestException:
+                ok = False
+            mine.append((time.perf_counter() - t0) * 1000.0)
+            bad += not ok
+            i += 1
+        with lock:
+            latencies.extend(mine)
+            errors += bad
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": _percentile(latencies, 50),
+        "p99": _percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=min(8, 2 * (os.cpu_count() or 1)))
+    parser.add_argument("--page", type=int, default=100, help="readings per request")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    db_url = f"sqlite:///{tmp}/bench.sqlite3"
+    seed(db_url, args.devices, args.readings)
+
+    print(f"{'mode':<22} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'errors':>6}")
+    for name, cmd, extra_env in modes(args.workers):
+        port = _free_port()
+        proc = start_server(cmd, extra_env, db_url, port)
+        try:
+            r = hammer(f"http://127.0.0.1:{port}", args)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        print(f"{name:<22} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['errors']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Device provisioning time: one POST per device vs ``POST /api/v1/devices:bulk``.
+
+Each mode runs against a fresh temporary database through the Flask test client
+(no network), so the numbers are validation + SQLite cost only. Per-device POSTs
+are timed on a sample and extrapolated:
+
+    python bench/bulk_import.py --devices 10000 --sample 500
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+HEADERS = {"X-API-Key": "bench"}
+COLUMNS = ["name", "type", "endpoint", "poll_interval_s", "tags"]
+
+
+def _rows(n: int):
+    return [
+        {
+            "name": f"cam-{i:05d}",
+            "type": "camera_ip_snapshot",
+            "endpoint": f"http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/snap.jpg",
+            "poll_interval_s": 60,
+            "tags": [f"site-{i % 20}"],
+        }
+        for i in range(n)
+    ]
+
+
+def _client():
+    from himalia_api import create_app
+
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_API_KEY"] = "bench"
+    return create_app().test_client()
+
+
+def _body(rows, fmt: str) -> bytes:
+    if fmt == "json":
+        return json.dumps(rows).encode()
+    if fmt == "ndjson":
+        return "\n".join(json.dumps(r) for r in rows).encode()
+    if fmt == "csv":
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(COLUMNS)
+        for r in rows:
+            w.writerow([r["name"], r["type"], r["endpoint"], r["poll_interval_s"], ";".join(r["tags"])])
+        return buf.getvalue().encode()
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("devices")
+    ws.append(COLUMNS)
+    for r in rows:
+        ws.append([r["name"], r["type"], r["endpoint"], r["poll_interval_s"], ";".join(r["tags"])])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=500, help="devices timed for the one-POST-each baseline")
+    parser.add_argument("--formats", default="json,ndjson,csv,xlsx")
+    args = parser.parse_args()
+
+    rows = _rows(args.devices)
+    print(f"{'mode':<14} {'devices':>8} {'seconds':>8} {'devices/s':>10}")
+
+    client = _client()
+    sample = rows[: args.sample]
+    started = time.perf_counter()
+    for r in sample:
+        assert client.post("/api/v1/devices", json=r, headers=HEADERS).status_code == 201
+    per_device = (time.perf_counter() - started) / len(sample)
+    print(f"{'single POSTs':<14} {args.devices:>8} {per_device * args.devices:>8.2f} {1 / per_device:>10.0f}  (extrapolated)")
+
+    for fmt in args.formats.split(","):
+        client = _client()
+        body = _body(rows, fmt)
+        started = time.perf_counter()
+        resp = client.post(f"/api/v1/devices:bulk?format={fmt}", data=body, headers=HEADERS)
+        elapsed = time.perf_counter() - started
+        assert resp.status_code == 200 and resp.get_json()["created"] == args.devices, resp.get_json()
+        print(f"{'bulk ' + fmt:<14} {args.devices:>8} {elapsed:>8.2f} {args.devices / elapsed:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
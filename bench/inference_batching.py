@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Extraction throughput of the inference pool per batch size.
+
+Feeds frames from many simulated devices through ``InferencePool`` backed by the
+local stub (fixed per-request latency plus per-image cost, the shape of a vision
+model server) and reports frames/s and queue wait for each max batch size:
+
+    python bench/inference_batching.py --frames 400 --latency-ms 150 --per-item-ms 10
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from himalia_api.poller import DeviceSpec  # noqa: E402
+from himalia_api.poller.inference import InferencePool, StubBackend  # noqa: E402
+
+
+def _spec(i: int) -> DeviceSpec:
+    return DeviceSpec(
+        id=f"dev{i}",
+        type="camera_ip_snapshot",
+        endpoint="http://bench.local/snap.jpg",
+        auth_mode=None,
+        auth_username=None,
+        auth_password=None,
+        poll_interval_s=1,
+        timeout_ms=1000,
+    )
+
+
+def run(batch: int, args) -> dict:
+    backend = StubBackend(latency_s=args.latency_ms / 1000.0, per_item_s=args.per_item_ms / 1000.0)
+    pool = InferencePool(
+        backend,
+        max_batch=batch,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=args.frames,
+        workers=args.workers,
+    )
+    done = threading.Semaphore(0)
+    pool.start()
+    started = time.perf_counter()
+    for n in range(args.frames):
+        pool.submit(_spec(n % args.devices), f"frame-{n}".encode(), lambda ex, err: done.release())
+        if args.arrival_ms:
+            time.sleep(args.arrival_ms / 1000.0)
+    for _ in range(args.frames):
+        done.acquire()
+    elapsed = time.perf_counter() - started
+    stats = pool.stats()
+    pool.stop()
+    return {
+        "batch": batch,
+        "frames_s": args.frames / elapsed,
+        "requests": stats["batches"],
+        "avg_batch": stats["avg_batch_size"],
+        "wait_ms": stats["avg_queue_wait_ms"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="fixed cost per model request")
+    parser.add_argument("--per-item-ms", type=float, default=10.0, help="extra cost per image in a request")
+    parser.add_argument("--max-wait-ms", type=int, default=250)
+    parser.add_argument("--arrival-ms", type=float, default=0.0, help="gap between submitted frames")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batches", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    print(f"{'batch':>5} {'frames/s':>9} {'requests':>8} {'avg_batch':>9} {'wait_ms':>9}")
+    for batch in (int(b) for b in args.batches.split(",")):
+        r = run(batch, args)
+        print(f"{r['batch']:>5} {r['frames_s']:>9.1f} {r['requests']:>8} {r['avg_batch']:>9.2f} {r['wait_ms']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Poller-side ingest under database write stalls: in-memory queue vs on-disk spool.
+
+A second connection holds the SQLite write lock (``BEGIN IMMEDIATE``) for
+``--stall-s`` seconds every ``--every-s`` seconds while a producer submits
+readings at ``--rate``. Reports how long ``submit`` blocked the producer and how
+many readings ended up committed or dropped:
+
+    python bench/ingest_stall.py --rate 1000 --seconds 20 --stall-s 8 --every-s 10
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def run(variant: str, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    db_path = f"{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{db_path}"
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.db import session_scope
+    from himalia_api.models import Device, utcnow
+    from himalia_api.poller import PollResult
+    from himalia_api.poller.ingest import ReadingWriter
+    from himalia_api.poller.spool import Spool
+
+    create_app()
+
+    ids = [str(uuid.uuid4()) for _ in range(args.devices)]
+    now = utcnow()
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [
+                {"id": i, "name": i[:8], "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+                 "created_at": now, "updated_at": now}
+                for i in ids
+            ],
+        )
+
+    spool = Spool(f"{tmp}/spool") if variant == "spool" else None
+    writer = ReadingWriter(max_batch=args.batch, max_delay_ms=200, max_queue=args.queue, spool=spool)
+    writer.start()
+    stop = threading.Event()
+
+    def stall():
+        conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+        while not stop.wait(args.every_s - args.stall_s):
+            conn.execute("BEGIN IMMEDIATE")
+            stop.wait(args.stall_s)
+            conn.execute("COMMIT")
+        conn.close()
+
+    staller = threading.Thread(target=stall, daemon=True)
+    staller.start()
+
+    blocked = []
+    n = 0
+    start = time.monotonic()
+    deadline = start + args.seconds
+    while time.monotonic() < deadline:
+        delay = start + n / args.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        t0 = time.perf_counter()
+        writer.submit(PollResult(device_id=ids[n % len(ids)], captured_at=utcnow(), success=True, value=str(n)))
+        blocked.append((time.perf_counter() - t0) * 1000.0)
+        n += 1
+
+    stop.set()
+    staller.join()
+    writer.stop()
+
+    with session_scope() as s:
+        rows = s.execute(text("SELECT count(*) FROM readings")).scalar()
+
+    return {
+        "variant": variant,
+        "submitted": n,
+        "committed": rows,
+        "dropped": writer.stats()["dropped"],
+        "p50_ms": statistics.median(blocked),
+        "p99_ms": _percentile(blocked, 99),
+        "max_ms": max(blocked),
+        "achieved_per_s": n / args.seconds,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=1000.0, help="readings per second to submit")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--queue", type=int, default=2000, help="in-memory queue bound (queue variant)")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--stall-s", type=float, default=8.0, help="how long each stall holds the write lock")
+    parser.add_argument("--every-s", type=float, default=10.0)
+    parser.add_argument("--variants", default="queue,spool")
+    args = parser.parse_args()
+
+    print(f"{'variant':<8} {'submitted':>9} {'committed':>9} {'dropped':>7} {'p50ms':>8} {'p99ms':>8} {'maxms':>9} {'rate/s':>7}")
+    for variant in args.variants.split(","):
+        r = run(variant.strip(), args)
+        print(
+            f"{r['variant']:<8} {r['submitted']:>9} {r['committed']:>9} {r['dropped']:>7} {r['p50_ms']:>8.3f} "
+            f"{r['p99_ms']:>8.3f} {r['max_ms']:>9.1f} {r['achieved_per_s']:>7.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
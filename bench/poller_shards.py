@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Aggregate poll throughput as sharded poller processes are added.
+
+Serves ``--devices`` snapshot devices from ``--cameras`` fake cameras (in a
+separate process, each snapshot taking ``--delay-ms``), then for every worker
+count in ``--workers`` starts that many ``poller.py`` processes with
+``HIMALIA_POLLER_SHARDING=true`` against one shared SQLite file and measures
+readings committed per second once the leases have settled. Also reports the
+busiest device's polls per interval (above 1.0 would mean double polling)
+and, with ``--kill``, how long the devices of a SIGKILLed worker go unpolled:
+
+    python bench/poller_shards.py --devices 2000 --workers 1,2,4 --seconds 20 --kill
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+
+def _serve_cameras(n: int, delay_s: float, urls, stop) -> None:
+    from fakecam import FakeCamera
+
+    sys.stderr = open(os.devnull, "w")  # killed workers leave reset connections behind
+    cams = [FakeCamera(delay_s=delay_s).__enter__() for _ in range(n)]
+    urls.put([c.url for c in cams])
+    stop.wait()
+
+
+def _window(engine, since_ms: int, until_ms: int):
+    with engine.connect() as conn:
+        per_device = conn.execute(
+            text(
+                "SELECT device_id, count(*) FROM readings WHERE captured_ms >= :a AND captured_ms < :b "
+                "GROUP BY device_id"
+            ),
+            {"a": since_ms, "b": until_ms},
+        ).all()
+    return sum(n for _, n in per_device), max((n for _, n in per_device), default=0), len(per_device)
+
+
+def run(workers: int, urls, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    db_url = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_DB_URL"] = db_url
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.db import get_engine, session_scope
+    from himalia_api.models import Device, epoch_ms, utcnow
+
+    create_app()
+    now = utcnow()
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [{"id": str(uuid.uuid4()), "name": f"cam{i}", "type": "camera_ip_snapshot", "endpoint": urls[i % len(urls)],
+              "poll_interval_s": args.interval_s, "created_at": now, "updated_at": now} for i in range(args.devices)],
+        )
+
+    env = dict(
+        os.environ,
+        HIMALIA_DB_URL=db_url,
+        HIMALIA_POLLER_SHARDING="true",
+        HIMALIA_POLLER_LEASE_S=str(args.lease_s),
+        HIMALIA_POLLER_REFRESH_S="1",
+        HIMALIA_POLLER_WORKERS=str(args.threads),
+        HIMALIA_HTTP_MAX_PER_HOST="64",
+        HIMALIA_IMAGE_STORE_ENABLED="false",
+        HIMALIA_ALERTS_ENABLED="false",
+        HIMALIA_INGEST_MAX_DELAY_MS="200",
+        PYTHONPATH=str(ROOT / "app"),
+    )
+    procs = []
+    for i in range(workers):
+        env_i = dict(env, HIMALIA_POLLER_WORKER_ID=f"bench-{i}", HIMALIA_SPOOL_DIR=f"{tmp}/spool-{i}")
+        procs.append(subprocess.Popen(
+            [sys.executable, str(ROOT / "app" / "poller.py")], env=env_i,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+
+    try:
+        time.sleep(args.warmup_s)  # heartbeats, ring convergence and lease handoffs
+        t0 = epoch_ms(utcnow())
+        time.sleep(args.seconds)
+        t1 = epoch_ms(utcnow())
+        time.sleep(1.0)  # let the last batches commit
+        total, busiest, covered = _window(get_engine(), t0, t1)
+        result = {
+            "workers": workers,
+            "polls_per_s": total / ((t1 - t0) / 1000.0),
+            "busiest": busiest / ((t1 - t0) / 1000.0 / args.interval_s),
+            "covered": covered,
+            "gap_s": None,
+        }
+
+        if args.kill and workers > 1:
+            victim = procs.pop()
+            with get_engine().connect() as conn:
+                lost = {r[0] for r in conn.execute(text("SELECT device_id FROM device_leases WHERE worker_id = :w"),
+                                                  {"w": f"bench-{workers - 1}"})}
+            victim.send_signal(signal.SIGKILL)
+            victim.wait()
+            killed_ms = epoch_ms(utcnow())
+            deadline = time.monotonic() + args.lease_s * 3 + 10
+            while time.monotonic() < deadline:
+                time.sleep(0.5)
+                with get_engine().connect() as conn:
+                    repolled = conn.execute(
+                        text("SELECT DISTINCT device_id FROM readings WHERE captured_ms > :k"), {"k": killed_ms}
+                    ).scalars().all()
+                if lost <= set(repolled):
+                    result["gap_s"] = (epoch_ms(utcnow()) - killed_ms) / 1000.0
+                    break
+        return result
+    finally:
+        for p in procs:
+            p.send_signal(signal.SIGTERM)
+        for p in procs:
+            try:
+                p.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--cameras", type=int, default=16)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="simulated snapshot latency")
+    parser.add_argument("--interval-s", type=int, default=1, help="device poll interval")
+    parser.add_argument("--threads", type=int, default=64, help="poll threads per worker (HIMALIA_POLLER_WORKERS)")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup-s", type=float, default=8.0)
+    parser.add_argument("--lease-s", type=int, default=6)
+    parser.add_argument("--kill", action="store_true", help="SIGKILL one worker after measuring and time the takeover")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    urls_q, stop = ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=_serve_cameras, args=(args.cameras, args.delay_ms / 1000.0, urls_q, stop), daemon=True)
+    server.start()
+    urls = urls_q.get(timeout=30)
+
+    print(f"CPUs: {os.cpu_count()}  devices: {args.devices}  demand: {args.devices / args.interval_s:.0f} polls/s")
+    print(f"{'workers':>7} {'polls/s':>9} {'covered':>8} {'busiest/interval':>17} {'takeover_s':>11}")
+    try:
+        for workers in (int(w) for w in args.workers.split(",")):
+            r = run(workers, urls, args)
+            gap = f"{r['gap_s']:.1f}" if r["gap_s"] is not None else "-"
+            print(f"{r['workers']:>7} {r['polls_per_s']:>9.0f} {r['covered']:>8} {r['busiest']:>17.2f} {gap:>11}")
+    finally:
+        stop.set()
+        server.join(5)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""List-readings latency while the poller's writer sustains an ingestion load.
+
+Runs the same workload once per SQLite journal mode (default: DELETE vs WAL) and
+prints read latency percentiles plus the achieved ingest rate:
+
+    python bench/read_under_ingest.py --devices 200 --rate 2000 --seconds 10
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def run(mode: str, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_SQLITE_JOURNAL_MODE"] = mode
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.db import get_read_session, session_scope
+    from himalia_api.models import Device, Reading, utcnow
+    from himalia_api.poller import PollResult
+    from himalia_api.poller.ingest import ReadingWriter
+
+    create_app()
+
+    ids = [str(uuid.uuid4()) for _ in range(args.devices)]
+    now = utcnow()
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [
+                {"id": i, "name": i[:8], "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+                 "created_at": now, "updated_at": now}
+                for i in ids
+            ],
+        )
+
+    writer = ReadingWriter(max_batch=args.batch, max_delay_ms=200)
+    writer.start()
+    stop = threading.Event()
+
+    def produce():
+        n = 0
+        start = time.monotonic()
+        while not stop.is_set():
+            due = start + n / args.rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            writer.submit(PollResult(device_id=ids[n % len(ids)], captured_at=utcnow(), success=True, value=str(n)))
+            n += 1
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    latencies = []
+    deadline = time.monotonic() + args.seconds
+    i = 0
+    while time.monotonic() < deadline:
+        device_id = ids[i % len(ids)]
+        i += 1
+        t0 = time.perf_counter()
+        s = get_read_session()
+        try:
+            s.execute(
+                select(Reading.id, Reading.captured_at, Reading.value)
+                .where(Reading.device_id == device_id)
+                .order_by(Reading.captured_ms.desc())
+                .limit(100)
+            ).all()
+        finally:
+            s.close()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    stop.set()
+    producer.join()
+    writer.stop()
+
+    with session_scope() as s:
+        rows = s.execute(text("SELECT count(*) FROM readings")).scalar()
+
+    return {
+        "mode": mode,
+        "reads": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "ingested_per_s": rows / args.seconds,
+        "avg_flush_ms": writer.stats()["avg_flush_ms"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=2000.0, help="readings per second to ingest")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", default="DELETE,WAL")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'reads':>7} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8} {'ingest/s':>9} {'flushms':>8}")
+    for mode in args.modes.split(","):
+        r = run(mode.strip().upper(), args)
+        print(
+            f"{r['mode']:<8} {r['reads']:>7} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['max_ms']:>8.2f} {r['ingested_per_s']:>9.0f} {r['avg_flush_ms']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
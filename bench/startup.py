@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Cold start time of the API process (import + ``create_app()``).
+
+Migrates a temporary database once, then starts fresh interpreters the way a
+restarted container or recycled gunicorn worker would, and reports the median
+and worst time to a ready app, per startup mode. Exits non-zero when the warm
+start (schema already at head) exceeds ``--budget-ms``:
+
+    python bench/startup.py --runs 10 --budget-ms 1500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from himalia_api import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "create_ms": (t2 - t1) * 1000,
+                  "alembic": "alembic" in sys.modules}))
+"""
+
+
+def probe(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="max median warm start")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    db_url = f"sqlite:///{tmp}/bench.sqlite3"
+    from himalia_api.migrate import upgrade_head
+
+    upgrade_head(db_url)
+
+    base = dict(os.environ, HIMALIA_DB_URL=db_url, HIMALIA_API_KEY="bench")
+    modes = {
+        "warm (at head)": dict(base, HIMALIA_MIGRATIONS_ON_STARTUP="true"),
+        "migrations off": dict(base, HIMALIA_MIGRATIONS_ON_STARTUP="false"),
+    }
+
+    print(f"{'mode':<16} {'import_ms':>9} {'create_ms':>9} {'total_p50':>9} {'total_max':>9} {'alembic':>7}")
+    warm_p50 = None
+    for name, env in modes.items():
+        runs = [probe(env) for _ in range(args.runs)]
+        totals = [r["import_ms"] + r["create_ms"] for r in runs]
+        p50 = statistics.median(totals)
+        if warm_p50 is None:
+            warm_p50 = p50
+        print(
+            f"{name:<16} {statistics.median(r['import_ms'] for r in runs):>9.1f} "
+            f"{statistics.median(r['create_ms'] for r in runs):>9.1f} {p50:>9.1f} {max(totals):>9.1f} "
+            f"{str(any(r['alembic'] for r in runs)):>7}"
+        )
+
+    if warm_p50 > args.budget_ms:
+        print(f"warm start {warm_p50:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Selecting devices and readings by tag: JSON ``tags`` scan vs the ``device_tags`` index.
+
+Builds ``--devices`` devices of which ``--tagged`` carry the tag ``boiler-room``
+(plus filler tags on everyone) and ``--readings`` readings spread over all of
+them, then times, per strategy: listing the tagged devices, the newest page of
+their readings and a 6h window of their readings. Prints the query plans of
+the indexed queries:
+
+    python bench/tag_index.py --devices 10000 --tagged 200 --readings 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from sqlalchemy import insert, literal, select  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+TAG = "boiler-room"
+
+
+def _best(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--tagged", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.db import get_engine, session_scope
+    from himalia_api.models import Device, Reading, epoch_ms, utcnow
+    from himalia_api.tags import set_device_tags, tagged_device_ids
+
+    create_app()
+    rnd = random.Random(5)
+    ids = [f"dev-{i:05d}" for i in range(args.devices)]
+    tagged = set(rnd.sample(ids, args.tagged))
+    tags = {i: [f"site-{n % 50}", f"floor-{n % 7}"] + ([TAG] if i in tagged else []) for n, i in enumerate(ids)}
+    now = utcnow()
+    start = dt.datetime(2026, 1, 1)
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [{"id": i, "name": i, "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+              "tags": tags[i], "created_at": now, "updated_at": now} for i in ids],
+        )
+        set_device_tags(s, tags)
+        for lo in range(0, args.readings, 50_000):
+            s.execute(
+                insert(Reading),
+                [{"device_id": rnd.choice(ids), "captured_at": start + dt.timedelta(seconds=n),
+                  "value": "1", "success": True} for n in range(lo, min(lo + 50_000, args.readings))],
+            )
+
+    def json_tagged():
+        each = func.json_each(Device.tags).table_valued("value")
+        return select(Device.id).where(select(literal(1)).select_from(each).where(each.c.value == TAG).exists())
+
+    def indexed_tagged():
+        return tagged_device_ids([TAG])
+
+    cols = (Reading.id, Reading.device_id, Reading.captured_ms, Reading.value)
+    end_ms = epoch_ms(start + dt.timedelta(seconds=args.readings))
+    window = (end_ms - 6 * 3600 * 1000, end_ms)
+    queries = {
+        "devices": lambda sub: select(Device.id, Device.name).where(Device.id.in_(sub)),
+        "newest page": lambda sub: select(*cols).where(Reading.device_id.in_(sub))
+        .order_by(Reading.captured_ms.desc(), Reading.id.desc()).limit(args.page + 1),
+        "6h window": lambda sub: select(*cols).where(
+            Reading.device_id.in_(sub), Reading.captured_ms >= window[0], Reading.captured_ms < window[1]
+        ).order_by(Reading.device_id, Reading.captured_ms),
+    }
+
+    print(f"{'query':<12} {'rows':>6} {'json ms':>9} {'index ms':>9} {'ratio':>7}")
+    with get_engine().connect() as conn:
+        for name, build in queries.items():
+            old, new = build(json_tagged().scalar_subquery()), build(indexed_tagged().scalar_subquery())
+            rows = len(conn.execute(new).all())
+            assert rows == len(conn.execute(old).all())
+            t_old = _best(lambda: conn.execute(old).all())
+            t_new = _best(lambda: conn.execute(new).all())
+            print(f"{name:<12} {rows:>6} {t_old * 1000:>9.2f} {t_new * 1000:>9.2f} {t_old / t_new:>6.1f}x")
+        for name, build in queries.items():
+            stmt = build(indexed_tagged().scalar_subquery())
+            sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+            print(f"\n{name}:")
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+                print(f"  {row[-1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Reading time keys and numeric values: ISO-string columns vs ``captured_ms``/``value_num``.
+
+Builds one database of ``--readings`` rows, adds the old string-keyed
+``(device_id, captured_at)`` index next to the new integer one and compares:
+index size (via ``dbstat``), per-device range query time with each index forced,
+and a 1h min/max/avg series computed in Python from the text value vs in SQL
+from ``value_num``:
+
+    python bench/typed_readings.py --readings 500000 --devices 50 --queries 500
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+HOUR_MS = 3600 * 1000
+
+
+def _index_bytes(conn, name: str) -> int:
+    return conn.execute(text("SELECT sum(pgsize) FROM dbstat WHERE name = :n"), {"n": name}).scalar() or 0
+
+
+def _best(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=500_000)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--window-h", type=float, default=6.0, help="time range per query")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="himalia-bench-")
+    os.environ["HIMALIA_DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+    os.environ["HIMALIA_POLLER_STATS_PATH"] = ""
+
+    from himalia_api import create_app
+    from himalia_api.db import get_engine, session_scope
+    from himalia_api.models import Device, Reading, epoch_ms, parse_number, utcnow
+
+    create_app()
+    ids = [f"dev-{i:04d}" for i in range(args.devices)]
+    now = utcnow()
+    start = dt.datetime(2026, 1, 1)
+    step = dt.timedelta(seconds=30)
+    rnd = random.Random(3)
+    with session_scope() as s:
+        s.execute(
+            insert(Device),
+            [{"id": i, "name": i, "type": "camera_ip_snapshot", "endpoint": "http://x/snap.jpg",
+              "created_at": now, "updated_at": now} for i in ids],
+        )
+        for lo in range(0, args.readings, 50_000):
+            s.execute(
+                insert(Reading),
+                [
+                    {"device_id": ids[n % len(ids)], "captured_at": start + (n // len(ids)) * step,
+                     "value": f"{rnd.uniform(0, 100):.2f}" if n % 10 else "n/a", "success": True}
+                    for n in range(lo, min(lo + 50_000, args.readings))
+                ],
+            )
+
+    span_s = (args.readings // len(ids)) * step.total_seconds()
+    window = dt.timedelta(hours=args.window_h)
+    queries = []
+    for _ in range(args.queries):
+        since = start + dt.timedelta(seconds=rnd.uniform(0, max(0.0, span_s - window.total_seconds())))
+        queries.append((rnd.choice(ids), since, since + window))
+
+    with get_engine().connect() as conn:
+        conn.execute(text("CREATE INDEX bench_device_captured_at ON readings (device_id, captured_at)"))
+        conn.commit()
+        sizes = {
+            "captured_at": _index_bytes(conn, "bench_device_captured_at"),
+            "captured_ms": _index_bytes(conn, "ix_readings_device_id_captured_ms"),
+        }
+
+        def by_string():
+            for device_id, since, until in queries:
+                conn.execute(
+                    text(
+                        "SELECT id, value FROM readings INDEXED BY bench_device_captured_at "
+                        "WHERE device_id = :d AND captured_at >= :a AND captured_at < :b ORDER BY captured_at"
+                    ),
+                    {"d": device_id, "a": since.isoformat(" "), "b": until.isoformat(" ")},
+                ).all()
+
+        def by_ms():
+            for device_id, since, until in queries:
+                conn.execute(
+                    text(
+                        "SELECT id, value FROM readings INDEXED BY ix_readings_device_id_captured_ms "
+                        "WHERE device_id = :d AND captured_ms >= :a AND captured_ms < :b ORDER BY captured_ms"
+                    ),
+                    {"d": device_id, "a": epoch_ms(since), "b": epoch_ms(until)},
+                ).all()
+
+        device = ids[0]
+
+        def series_python():
+            buckets = {}
+            rows = conn.execute(
+                text("SELECT captured_at, value FROM readings WHERE device_id = :d ORDER BY captured_at"), {"d": device}
+            )
+            for at, value in rows:
+                num = parse_number(value)
+                if num is None:
+                    continue
+                key = dt.datetime.fromisoformat(at).replace(minute=0, second=0, microsecond=0)
+                b = buckets.setdefault(key, [num, num, 0.0, 0])
+                b[0], b[1], b[2], b[3] = min(b[0], num), max(b[1], num), b[2] + num, b[3] + 1
+            return buckets
+
+        def series_sql():
+            return conn.execute(
+                text(
+                    "SELECT captured_ms / :w, min(value_num), max(value_num), avg(value_num) FROM readings "
+                    "WHERE device_id = :d AND value_num IS NOT NULL GROUP BY captured_ms / :w"
+                ),
+                {"d": device, "w": HOUR_MS},
+            ).all()
+
+        assert len(series_python()) == len(series_sql())
+        t_string, t_ms = _best(by_string), _best(by_ms)
+        t_py, t_sql = _best(series_python), _best(series_sql)
+
+    print(f"{'':<26} {'captured_at':>12} {'captured_ms':>12} {'ratio':>7}")
+    print(f"{'(device, time) index KiB':<26} {sizes['captured_at'] / 1024:>12.0f} {sizes['captured_ms'] / 1024:>12.0f} "
+          f"{sizes['captured_at'] / max(sizes['captured_ms'], 1):>6.2f}x")
+    print(f"{'range query ms':<26} {t_string * 1000 / len(queries):>12.3f} {t_ms * 1000 / len(queries):>12.3f} "
+          f"{t_string / t_ms:>6.2f}x")
+    print(f"{'1h series ms (py vs sql)':<26} {t_py * 1000:>12.1f} {t_sql * 1000:>12.1f} {t_py / t_sql:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Device payload validation: the compiled schema vs the previous if-chain validator.
+
+The previous implementation is kept below verbatim (as ``legacy_validate_device_payload``)
+as the baseline. Both are first checked to agree on a mix of valid, invalid and
+patch payloads, then timed per call and in batch mode:
+
+    python bench/validator.py --payloads 20000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from himalia_api.validation import validate_device_payload, validate_device_payloads  # noqa: E402
+
+ALLOWED_DEVICE_TYPES = {"camera_ip_snapshot", "camera_rtsp"}
+ALLOWED_AUTH_MODES = {"none", "basic", "digest", "bearer"}
+
+
+@dataclass
+class LegacyResult:
+    cleaned: Dict[str, Any]
+    errors: List[str]
+
+
+# ---- previous implementation (baseline) ----
+
+
+def _is_bool(v: Any) -> bool:
+    return isinstance(v, bool)
+
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _validate_endpoint(device_type: str, endpoint: str) -> str | None:
+    try:
+        p = urlparse(endpoint)
+    except Exception:
+        return "endpoint must be a valid URL"
+
+    scheme = (p.scheme or "").lower()
+
+    if device_type == "camera_ip_snapshot":
+        if scheme not in {"http", "https"}:
+            return "endpoint scheme must be http or https for camera_ip_snapshot"
+    elif device_type == "camera_rtsp":
+        if scheme != "rtsp":
+            return "endpoint scheme must be rtsp for camera_rtsp"
+
+    return None
+
+
+def legacy_validate_device_payload(
+    data: Dict[str, Any],
+    *,
+    mode: str,
+) -> ValidationResult:
+    """Validate and normalize device payload.
+
+    mode:
+      - "create": POST
+      - "put": full replacement
+      - "patch": partial update
+
+    PUT semantics: unspecified optional fields reset to defaults/null.
+    PATCH semantics: unspecified fields unchanged; payload must include at least one field.
+    """
+
+    errors: List[str] = []
+    cleaned: Dict[str, Any] = {}
+
+    if not isinstance(data, dict):
+        return LegacyResult(cleaned={}, errors=["body must be a JSON object"])
+
+    required = {"name", "type", "endpoint"} if mode in {"create", "put"} else set()
+
+    allowed_fields = {
+        "name",
+        "type",
+        "enabled",
+        "endpoint",
+        "auth_mode",
+        "auth_username",
+        "auth_password",
+        "poll_interval_s",
+        "timeout_ms",
+        "tags",
+        "notes",
+        # operational fields are not writable via API in Sprint 2
+    }
+
+    unknown = set(data.keys()) - allowed_fields
+    if unknown:
+        errors.append(f"unknown fields: {sorted(list(unknown))}")
+
+    # PATCH requires at least one recognized field
+    if mode == "patch":
+        provided = set(data.keys()) & allowed_fields
+        if not provided:
+            errors.append("patch body must include at least one updatable field")
+
+    # Defaults for create/put
+    if mode in {"create", "put"}:
+        cleaned["enabled"] = True
+        cleaned["auth_mode"] = "none"
+        cleaned["auth_username"] = None
+        cleaned["auth_password"] = None
+        cleaned["poll_interval_s"] = 60
+        cleaned["timeout_ms"] = 5000
+        cleaned["tags"] = []
+        cleaned["notes"] = None
+
+    # Required fields
+    for k in required:
+        if k not in data:
+            errors.append(f"missing required field: {k}")
+
+    # name
+    if "name" in data:
+        if not isinstance(data["name"], str) or not data["name"].strip():
+            errors.append("name must be a non-empty string")
+        else:
+            cleaned["name"] = data["name"].strip()
+
+    # type
+    if "type" in data:
+        if not isinstance(data["type"], str) or data["type"] not in ALLOWED_DEVICE_TYPES:
+            errors.append(f"type must be one of {sorted(list(ALLOWED_DEVICE_TYPES))}")
+        else:
+            cleaned["type"] = data["type"]
+
+    # enabled
+    if "enabled" in data:
+        if not _is_bool(data["enabled"]):
+            errors.append("enabled must be boolean")
+        else:
+            cleaned["enabled"] = bool(data["enabled"])
+
+    # endpoint
+    if "endpoint" in data:
+        if not isinstance(data["endpoint"], str) or not data["endpoint"].strip():
+            errors.append("endpoint must be a non-empty string")
+        else:
+            cleaned["endpoint"] = data["endpoint"].strip()
+
+    # auth
+    if "auth_mode" in data:
+        if data["auth_mode"] is None:
+            cleaned["auth_mode"] = None
+        elif not isinstance(data["auth_mode"], str) or data["auth_mode"] not in ALLOWED_AUTH_MODES:
+            errors.append(f"auth_mode must be one of {sorted(list(ALLOWED_AUTH_MODES))} or null")
+        else:
+            cleaned["auth_mode"] = data["auth_mode"]
+
+    if "auth_username" in data:
+        if data["auth_username"] is None:
+            cleaned["auth_username"] = None
+        elif not isinstance(data["auth_username"], str):
+            errors.append("auth_username must be string or null")
+        else:
+            cleaned["auth_username"] = data["auth_username"]
+
+    if "auth_password" in data:
+        if data["auth_password"] is None:
+            cleaned["auth_password"] = None
+        elif not isinstance(data["auth_password"], str):
+            errors.append("auth_password must be string or null")
+        else:
+            cleaned["auth_password"] = data["auth_password"]
+
+    # poll_interval_s
+    if "poll_interval_s" in data:
+        v = data["poll_interval_s"]
+        if not _is_int(v):
+            errors.append("poll_interval_s must be an integer")
+        elif v < 1 or v > 3600:
+            errors.append("poll_interval_s must be between 1 and 3600")
+        else:
+            cleaned["poll_interval_s"] = v
+
+    # timeout_ms
+    if "timeout_ms" in data:
+        v = data["timeout_ms"]
+        if not _is_int(v):
+            errors.append("timeout_ms must be an integer")
+        elif v < 100 or v > 60000:
+            errors.append("timeout_ms must be between 100 and 60000")
+        else:
+            cleaned["timeout_ms"] = v
+
+    # tags
+    if "tags" in data:
+        v = data["tags"]
+        if v is None:
+            cleaned["tags"] = []
+        elif isinstance(v, list) and all(isinstance(x, str) for x in v):
+            cleaned["tags"] = v
+        else:
+            errors.append("tags must be a list of strings")
+
+    # notes
+    if "notes" in data:
+        v = data["notes"]
+        if v is None:
+            cleaned["notes"] = None
+        elif not isinstance(v, str):
+            errors.append("notes must be a string or null")
+        else:
+            cleaned["notes"] = v
+
+    # Cross-field: endpoint scheme depends on type
+    t = cleaned.get("type") if mode in {"create", "put"} else data.get("type")
+    e = cleaned.get("endpoint") if mode in {"create", "put"} else data.get("endpoint")
+
+    if ("type" in data or mode in {"create", "put"}) and ("endpoint" in data or mode in {"create", "put"}):
+        # Determine device_type used for validation
+        device_type = cleaned.get("type") if "type" in cleaned else data.get("type")
+        endpoint = cleaned.get("endpoint") if "endpoint" in cleaned else data.get("endpoint")
+        if isinstance(device_type, str) and isinstance(endpoint, str):
+            err = _validate_endpoint(device_type, endpoint)
+            if err:
+                errors.append(err)
+
+    return LegacyResult(cleaned=cleaned, errors=errors)
+
+
+# ---- workload ----
+def _payloads(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        kind = rnd.random()
+        p: Dict[str, Any] = {
+            "name": f"cam-{i}",
+            "type": "camera_ip_snapshot" if i % 3 else "camera_rtsp",
+            "endpoint": f"http://10.0.{i % 256}.{i % 7}/snap.jpg" if i % 3 else f"rtsp://10.0.{i % 256}.1/stream",
+            "poll_interval_s": rnd.choice([5, 30, 60, 300]),
+            "tags": [f"site-{i % 20}"],
+        }
+        if kind < 0.15:  # invalid in various ways
+            p[rnd.choice(["poll_interval_s", "timeout_ms", "enabled", "name", "bogus"])] = rnd.choice([0, "x", None, 10**6])
+        elif kind < 0.3:
+            p["auth_mode"] = rnd.choice(["basic", "digest", None])
+            p["auth_username"] = "u"
+            p["auth_password"] = "p"
+        out.append(p)
+    return out
+
+
+def _patches(n: int):
+    return [{"poll_interval_s": 30} if i % 2 else {"type": "camera_rtsp", "endpoint": "http://x/snap.jpg"} for i in range(n)]
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payloads", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workloads = {"create": _payloads(args.payloads), "patch": _patches(args.payloads)}
+
+    for mode, items in workloads.items():
+        for item in items:
+            old = legacy_validate_device_payload(item, mode=mode)
+            new = validate_device_payload(item, mode=mode)
+            assert old.cleaned == new.cleaned and sorted(old.errors) == sorted(new.errors), (item, old, new)
+
+    print(f"{'mode':<8} {'variant':<16} {'us/payload':>10} {'speedup':>8}")
+    for mode, items in workloads.items():
+        legacy = _best(lambda: [legacy_validate_device_payload(p, mode=mode) for p in items], args.repeat)
+        single = _best(lambda: [validate_device_payload(p, mode=mode) for p in items], args.repeat)
+        batch = _best(lambda: validate_device_payloads(items, mode=mode), args.repeat)
+        for name, t in (("legacy if-chain", legacy), ("schema", single), ("schema batch", batch)):
+            print(f"{mode:<8} {name:<16} {t * 1e6 / len(items):>10.2f} {legacy / t:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Local fake snapshot camera for tests and benchmarks.
+
+Serves a fixed JPEG-ish body over HTTP/1.1 keep-alive and counts TCP connections,
+requests and auth challenges so connection reuse can be asserted.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FRAME = b"\xff\xd8\xff\xe0" + b"fakecam" * 64 + b"\xff\xd9"
+REALM = "fakecam"
+
+
+def _md5(s: str) -> str:
+    return hashlib.md5(s.encode("utf-8")).hexdigest()
+
+
+def _parse_digest(header: str) -> dict:
+    out = {}
+    for part in header[len("Digest "):].split(","):
+        if "=" in part:
+            k, v = part.strip().split("=", 1)
+            out[k] = v.strip('"')
+    return out
+
+
+class FakeCamera:
+    def __init__(
+        self,
+        *,
+        auth_mode: str = "none",
+        username: str = "u",
+        password: str = "p",
+        frame: bytes = FRAME,
+        delay_s: float = 0.0,
+    ):
+        self.auth_mode = auth_mode
+        self.username = username
+        self.password = password
+        self.frame = frame
+        self.delay_s = delay_s  # simulated capture latency per snapshot
+        self.nonce = uuid.uuid4().hex
+        self.connections = 0
+        self.requests = 0
+        self.challenges = 0
+        self._lock = threading.Lock()
+
+        cam = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with cam._lock:
+                    cam.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with cam._lock:
+                    cam.requests += 1
+                if not cam._authorized(self.headers.get("Authorization", ""), self.path):
+                    with cam._lock:
+                        cam.challenges += 1
+                    self.send_response(401)
+                    if cam.auth_mode == "digest":
+                        self.send_header(
+                            "WWW-Authenticate",
+                            f'Digest realm="{REALM}", nonce="{cam.nonce}", qop="auth", algorithm=MD5',
+                        )
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if cam.delay_s:
+                    time.sleep(cam.delay_s)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(cam.frame)))
+                self.end_headers()
+                self.wfile.write(cam.frame)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/snap.jpg"
+
+    def _authorized(self, header: str, path: str) -> bool:
+        if self.auth_mode == "none":
+            return True
+        if self.auth_mode == "basic":
+            token = base64.b64encode(f"{self.username}:{self.password}".encode()).decode()
+            return header == f"Basic {token}"
+        if self.auth_mode == "bearer":
+            return header == f"Bearer {self.password}"
+        if self.auth_mode == "digest":
+            if not header.startswith("Digest "):
+                return False
+            d = _parse_digest(header)
+            if d.get("nonce") != self.nonce or d.get("username") != self.username:
+                return False
+            ha1 = _md5(f"{self.username}:{REALM}:{self.password}")
+            ha2 = _md5(f"GET:{d.get('uri', path)}")
+            expected = _md5(f"{ha1}:{d['nonce']}:{d.get('nc')}:{d.get('cnonce')}:{d.get('qop')}:{ha2}")
+            return d.get("response") == expected
+        return False
+
+    def __enter__(self) -> "FakeCamera":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
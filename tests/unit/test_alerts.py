@@ -0,0 +1,228 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import event
+
+from himalia_api import create_app
+from himalia_api.alerts import AlertEngine, TimerWheel
+from himalia_api.db import get_engine, session_scope
+from himalia_api.models import epoch_ms
+from himalia_api.poller import PollResult
+from himalia_api.poller.ingest import write_batch
+from himalia_api.stream import Broker
+
+T0 = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _headers():
+    return {"X-API-Key": "test-api-key"}
+
+
+def _device(client, name, tags=None):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg", "tags": tags or []},
+        headers=_headers(),
+    )
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def _rule(client, **body):
+    resp = client.post("/api/v1/alert-rules", json={"name": "r", **body}, headers=_headers())
+    assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()["id"]
+
+
+def _result(device_id, n, value=None, success=True):
+    return PollResult(
+        device_id=device_id,
+        captured_at=T0 + dt.timedelta(seconds=n),
+        success=success,
+        value=value,
+        error=None if success else "timeout",
+    )
+
+
+def _events(client, **params):
+    resp = client.get("/api/v1/alerts/events", query_string=params, headers=_headers())
+    assert resp.status_code == 200
+    return resp.get_json()["items"]
+
+
+def test_rule_validation(client):
+    dev = _device(client, "cam")
+    bad = [
+        {"name": "x", "kind": "threshold", "operator": ">"},
+        {"name": "x", "kind": "threshold", "operator": "=~", "threshold": 1},
+        {"name": "x", "kind": "stale", "stale_s": 10, "streak": 3},
+        {"name": "x", "kind": "error_streak", "streak": 3, "device_id": dev, "tag": "a"},
+        {"name": "x", "kind": "error_streak", "streak": 3, "device_id": "missing"},
+        {"name": "", "kind": "nope"},
+    ]
+    for body in bad:
+        resp = client.post("/api/v1/alert-rules", json=body, headers=_headers())
+        assert resp.status_code == 400, body
+        assert resp.get_json()["error"] == "validation_error"
+
+    rule_id = _rule(client, kind="threshold", operator=">", threshold=50, device_id=dev)
+    resp = client.put(
+        f"/api/v1/alert-rules/{rule_id}", json={"name": "stale", "kind": "stale", "stale_s": 60}, headers=_headers()
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["kind"] == "stale" and body["operator"] is None and body["device_id"] is None
+    assert client.delete(f"/api/v1/alert-rules/{rule_id}", headers=_headers()).status_code == 204
+    assert client.get(f"/api/v1/alert-rules/{rule_id}", headers=_headers()).status_code == 404
+
+
+def test_threshold_rule_fires_and_resolves_on_transitions_only(client):
+    dev = _device(client, "cam")
+    other = _device(client, "other")
+    rule_id = _rule(client, kind="threshold", operator=">", threshold=50, device_id=dev)
+    engine = AlertEngine()
+
+    write_batch([_result(dev, 0, "10"), _result(dev, 1, "60"), _result(other, 1, "99")], alerts=engine)
+    write_batch([_result(dev, 2, "70"), _result(dev, 3, "n/a")], alerts=engine)
+    active = client.get("/api/v1/alerts/active", headers=_headers()).get_json()["items"]
+    assert [(a["rule_id"], a["device_id"], a["value"]) for a in active] == [(rule_id, dev, "60")]
+
+    write_batch([_result(dev, 4, "20")], alerts=engine)
+    assert [e["state"] for e in _events(client)] == ["resolved", "firing"]
+    assert client.get("/api/v1/alerts/active", headers=_headers()).get_json()["count"] == 0
+
+    # A fresh engine (poller restart) picks up firing state from the event log.
+    write_batch([_result(dev, 5, "80")], alerts=engine)
+    write_batch([_result(dev, 6, "90")], alerts=AlertEngine())
+    assert len(_events(client, state="firing")) == 2
+
+
+def test_tag_and_error_streak_rules(client):
+    a = _device(client, "a", tags=["yard"])
+    b = _device(client, "b", tags=["yard", "gate"])
+    c = _device(client, "c", tags=["lobby"])
+    _rule(client, kind="error_streak", streak=2, tag="yard")
+    engine = AlertEngine()
+
+    write_batch([_result(d, 0, success=False) for d in (a, b, c)], alerts=engine)
+    assert _events(client) == []
+    write_batch([_result(d, 1, success=False) for d in (a, b, c)], alerts=engine)
+    assert sorted(e["device_id"] for e in _events(client)) == sorted([a, b])
+
+    write_batch([_result(a, 2, "ok")], alerts=engine)
+    assert [e["state"] for e in _events(client, device_id=a)] == ["resolved", "firing"]
+
+    # Tagging a device later brings it under the rule on the next batch.
+    client.patch(f"/api/v1/devices/{c}", json={"tags": ["yard"]}, headers=_headers())
+    write_batch([_result(c, 2, success=False)], alerts=engine)
+    write_batch([_result(c, 3, success=False)], alerts=engine)
+    assert [e["state"] for e in _events(client, device_id=c)] == ["firing"]
+
+
+def test_stale_rule_fires_from_the_timer_wheel(client):
+    dev = _device(client, "cam")
+    _rule(client, kind="stale", stale_s=30)
+    engine = AlertEngine()
+    write_batch([_result(dev, 0, "1")], alerts=engine)
+    seen = epoch_ms(T0)
+
+    assert engine.tick(seen + 29_000) == 0
+    assert engine.tick(seen + 31_000) == 1
+    assert engine.tick(seen + 120_000) == 0  # already firing
+    write_batch([_result(dev, 200, "2")], alerts=engine)
+    assert [e["state"] for e in _events(client)] == ["resolved", "firing"]
+    assert engine.tick(seen + 225_000) == 0  # rescheduled from the new reading
+    assert engine.tick(seen + 231_000) == 1
+
+
+def test_failed_transaction_leaves_state_untouched(client):
+    dev = _device(client, "cam")
+    _rule(client, kind="threshold", operator=">=", threshold=5, device_id=dev)
+    engine = AlertEngine()
+
+    with pytest.raises(RuntimeError):
+        with engine.transaction() as tx:
+            with session_scope() as s:
+                tx.observe(s, [_result(dev, 0, "9")])
+                raise RuntimeError("database is locked")
+    assert engine.stats()["firing"] == 0 and _events(client) == []
+
+    # The retried batch fires exactly once.
+    write_batch([_result(dev, 0, "9")], alerts=engine)
+    assert engine.stats()["firing"] == 1 and len(_events(client)) == 1
+
+
+def test_no_per_reading_queries(client):
+    ids = [_device(client, f"cam{i}", tags=["t"]) for i in range(20)]
+    _rule(client, kind="threshold", operator=">", threshold=50, tag="t")
+    _rule(client, kind="error_streak", streak=3)
+    engine = AlertEngine()
+    write_batch([_result(d, 0, "1") for d in ids], alerts=engine)  # loads the index
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(get_engine(), "before_cursor_execute", listener)
+    try:
+        write_batch([_result(ids[n % 20], n, str(n % 100)) for n in range(1, 1001)], alerts=engine)
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", listener)
+    assert not any("alert_rules" in sql for sql in statements)
+    assert sum("INSERT INTO alert_events" in sql for sql in statements) == 1
+    assert len(statements) < 15
+    assert engine.stats()["evaluated"] == 1020
+
+
+def test_timer_wheel_orders_and_wraps():
+    wheel = TimerWheel(slot_ms=10, slots=4)
+    wheel.advance(0)
+    wheel.schedule(25, "a")
+    wheel.schedule(95, "b")  # more than one revolution out
+    wheel.schedule(5, "c")
+    assert wheel.advance(20) == ["c"]
+    assert wheel.advance(30) == ["a"]
+    assert wheel.advance(60) == [] and len(wheel) == 1
+    assert wheel.advance(100) == ["b"] and len(wheel) == 0
+
+
+def test_stream_publishes_alert_transitions(client):
+    dev = _device(client, "cam")
+    _rule(client, kind="threshold", operator=">", threshold=1, device_id=dev)
+    broker = Broker()
+    sub = broker.subscribe(device_ids=[dev])
+    write_batch([_result(dev, 0, "5")], alerts=AlertEngine())
+    broker.poll_once()
+    frames = sub.take(timeout=0)
+    broker.unsubscribe(sub)
+    assert any(f.startswith("event: alert\n") and '"state":"firing"' in f for f in frames)
+
+
+def test_stream_publishes_alerts_after_the_newest_events_are_deleted(client):
+    keep = _device(client, "keep")
+    gone = _device(client, "gone")
+    _rule(client, kind="threshold", operator=">", threshold=1)
+    broker = Broker()
+    broker.poll_once()  # starts at the current ids
+    sub = broker.subscribe()
+    engine = AlertEngine()
+    write_batch([_result(keep, 0, "5"), _result(gone, 0, "5")], alerts=engine)
+    broker.poll_once()
+    assert client.delete(f"/api/v1/devices/{gone}", headers=_headers()).status_code == 204
+
+    write_batch([_result(keep, 1, "0")], alerts=engine)
+    broker.poll_once()
+    frames = [f for f in sub.take(timeout=0) if f.startswith("event: alert\n")]
+    broker.unsubscribe(sub)
+    assert len(frames) == 3 and '"state":"resolved"' in frames[-1]
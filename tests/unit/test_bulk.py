@@ -0,0 +1,133 @@
+import io
+import json
+
+import pytest
+
+from himalia_api import create_app
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    app = create_app()
+    return app.test_client()
+
+
+def _headers(**extra):
+    return {"X-API-Key": "test-api-key", **extra}
+
+
+def _device(i, **extra):
+    return {"name": f"Cam {i}", "type": "camera_ip_snapshot", "endpoint": f"http://cam{i}.local/snap.jpg", **extra}
+
+
+def _list(client):
+    return client.get("/api/v1/devices?limit=1000", headers=_headers()).get_json()["items"]
+
+
+def test_json_import_reports_row_errors_and_writes_valid_rows(client):
+    rows = [_device(1), {"name": "bad", "type": "camera_rtsp", "endpoint": "http://x"}, _device(3, tags=["a"])]
+    resp = client.post("/api/v1/devices:bulk", json=rows, headers=_headers())
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert (body["created"], body["updated"], body["failed"]) == (2, 0, 1)
+    assert body["errors"][0]["row"] == 2 and "rtsp" in body["errors"][0]["errors"][0]
+    assert sorted(d["name"] for d in _list(client)) == ["Cam 1", "Cam 3"]
+
+
+def test_atomic_import_writes_nothing_on_error(client):
+    rows = [_device(1), {"name": "", "type": "camera_ip_snapshot", "endpoint": "http://x"}]
+    resp = client.post("/api/v1/devices:bulk?atomic=true", json=rows, headers=_headers())
+    assert resp.status_code == 400
+    assert resp.get_json()["details"][0]["row"] == 2
+    assert _list(client) == []
+
+
+def test_ndjson_upsert_replaces_and_keeps_password(client):
+    created = client.post(
+        "/api/v1/devices", json=_device(1, auth_mode="basic", auth_username="u", auth_password="secret"), headers=_headers()
+    ).get_json()
+
+    body = "\n".join(
+        json.dumps(r)
+        for r in [
+            {"id": created["id"], **_device(1, name="Renamed", auth_mode="basic", auth_username="u")},
+            {"id": "fixed-id-2", **_device(2)},
+        ]
+    )
+    resp = client.post("/api/v1/devices:bulk", data=body, headers=_headers(**{"Content-Type": "application/x-ndjson"}))
+    assert resp.status_code == 200
+    assert resp.get_json()["errors"] == [{"row": 1, "errors": [f"device {created['id']} already exists"]}]
+
+    resp = client.post(
+        "/api/v1/devices:bulk?upsert=true", data=body, headers=_headers(**{"Content-Type": "application/x-ndjson"})
+    )
+    assert resp.get_json() == {"created": 0, "updated": 2, "failed": 0, "errors": []}
+    dev = client.get(f"/api/v1/devices/{created['id']}", headers=_headers()).get_json()
+    assert dev["name"] == "Renamed" and dev["has_auth_password"] is True
+    assert dev["created_at"] == created["created_at"]
+
+
+def test_duplicate_ids_in_upload_are_rejected(client):
+    rows = [{"id": "same", **_device(1)}, {"id": "same", **_device(2)}]
+    body = client.post("/api/v1/devices:bulk", json=rows, headers=_headers()).get_json()
+    assert body["created"] == 1
+    assert body["errors"] == [{"row": 2, "errors": ["duplicate id (also in row 1)"]}]
+
+
+def test_csv_and_xlsx_round_trip(client):
+    csv_body = (
+        "name,type,endpoint,enabled,poll_interval_s,tags\n"
+        "Cam 1,camera_ip_snapshot,http://cam1.local/snap.jpg,false,30,line-1;roof\n"
+        "Cam 2,camera_rtsp,rtsp://cam2.local/stream,,,\n"
+    )
+    resp = client.post("/api/v1/devices:bulk?format=csv", data=csv_body, headers=_headers())
+    assert resp.get_json()["created"] == 2
+    by_name = {d["name"]: d for d in _list(client)}
+    assert by_name["Cam 1"]["enabled"] is False and by_name["Cam 1"]["poll_interval_s"] == 30
+    assert by_name["Cam 1"]["tags"] == ["line-1", "roof"]
+    assert by_name["Cam 2"]["enabled"] is True and by_name["Cam 2"]["poll_interval_s"] == 60
+
+    exported = client.get("/api/v1/devices:export?format=xlsx", headers=_headers())
+    assert exported.status_code == 200
+    assert exported.headers["Content-Disposition"] == "attachment; filename=devices.xlsx"
+
+    from openpyxl import load_workbook
+
+    ws = load_workbook(io.BytesIO(exported.data), read_only=True).worksheets[0]
+    assert len(list(ws.iter_rows(values_only=True))) == 3
+
+    # The unedited export goes straight back in as an upsert.
+    resp = client.post(
+        "/api/v1/devices:bulk?format=xlsx&upsert=true&atomic=true", data=exported.data, headers=_headers()
+    )
+    assert resp.get_json() == {"created": 0, "updated": 2, "failed": 0, "errors": []}
+    assert {d["name"]: d["tags"] for d in _list(client)} == {"Cam 1": ["line-1", "roof"], "Cam 2": []}
+
+
+def test_export_formats_stream_every_device(client):
+    client.post("/api/v1/devices:bulk", json=[_device(i) for i in range(3)], headers=_headers())
+
+    as_json = client.get("/api/v1/devices:export", headers=_headers())
+    assert as_json.mimetype == "application/json" and len(json.loads(as_json.data)) == 3
+    assert "auth_password" not in json.loads(as_json.data)[0]
+
+    as_ndjson = client.get("/api/v1/devices:export?format=ndjson", headers=_headers())
+    assert len(as_ndjson.data.splitlines()) == 3
+
+    as_csv = client.get("/api/v1/devices:export?format=csv", headers=_headers()).data.decode()
+    assert as_csv.splitlines()[0].startswith("id,name,type,enabled") and len(as_csv.splitlines()) == 4
+
+
+def test_bad_requests(client):
+    assert client.post("/api/v1/devices:bulk", data="x", headers=_headers(**{"Content-Type": "text/plain"})).status_code == 400
+    resp = client.post("/api/v1/devices:bulk", data="{", headers=_headers(**{"Content-Type": "application/json"}))
+    assert resp.status_code == 400 and "could not parse json" in resp.get_json()["details"][0]
+    assert client.get("/api/v1/devices:export?format=pdf", headers=_headers()).status_code == 400
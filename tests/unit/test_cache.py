@@ -0,0 +1,126 @@
+import pytest
+
+from himalia_api import create_app
+from himalia_api.cache import ResponseCache
+from himalia_api.models import utcnow
+from himalia_api.poller import PollResult
+from himalia_api.poller.ingest import write_batch
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    app = create_app()
+    return app.test_client()
+
+
+def _headers(**extra):
+    return {"X-API-Key": "test-api-key", **extra}
+
+
+def _create(client, name="Cam"):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg"},
+        headers=_headers(),
+    )
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def _stats(client):
+    return client.get("/api/v1/cache/stats", headers=_headers()).get_json()
+
+
+def test_device_list_served_from_cache_then_304(client):
+    _create(client)
+    first = client.get("/api/v1/devices", headers=_headers())
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    second = client.get("/api/v1/devices", headers=_headers())
+    assert second.data == first.data and second.headers["ETag"] == first.headers["ETag"]
+
+    etag = first.headers["ETag"]
+    third = client.get("/api/v1/devices", headers=_headers(**{"If-None-Match": etag}))
+    assert third.status_code == 304 and third.data == b""
+    assert third.headers["ETag"] == etag
+
+    stats = _stats(client)
+    assert stats["hits"] == 1 and stats["not_modified"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_device_writes_invalidate(client):
+    dev_id = _create(client)
+    etag = client.get(f"/api/v1/devices/{dev_id}", headers=_headers()).headers["ETag"]
+
+    assert client.patch(f"/api/v1/devices/{dev_id}", json={"name": "Renamed"}, headers=_headers()).status_code == 200
+    resp = client.get(f"/api/v1/devices/{dev_id}", headers=_headers(**{"If-None-Match": etag}))
+    assert resp.status_code == 200 and resp.get_json()["name"] == "Renamed"
+    assert resp.headers["ETag"] != etag
+
+    list_etag = client.get("/api/v1/devices", headers=_headers()).headers["ETag"]
+    assert client.delete(f"/api/v1/devices/{dev_id}", headers=_headers()).status_code == 204
+    resp = client.get("/api/v1/devices", headers=_headers(**{"If-None-Match": list_etag}))
+    assert resp.status_code == 200 and resp.get_json()["count"] == 0
+    assert client.get(f"/api/v1/devices/{dev_id}", headers=_headers()).status_code == 404
+
+
+def test_ingestion_invalidates_readings_and_device_status(client):
+    dev_id = _create(client)
+    readings = client.get(f"/api/v1/devices/{dev_id}/readings", headers=_headers())
+    device = client.get(f"/api/v1/devices/{dev_id}", headers=_headers())
+    assert readings.get_json()["count"] == 0
+
+    write_batch([PollResult(device_id=dev_id, captured_at=utcnow(), success=True, value="1")])
+
+    resp = client.get(f"/api/v1/devices/{dev_id}/readings", headers=_headers(**{"If-None-Match": readings.headers["ETag"]}))
+    assert resp.status_code == 200 and resp.get_json()["count"] == 1
+    resp = client.get(f"/api/v1/devices/{dev_id}", headers=_headers(**{"If-None-Match": device.headers["ETag"]}))
+    assert resp.status_code == 200 and resp.get_json()["last_seen_at"] is not None
+
+    again = client.get(f"/api/v1/devices/{dev_id}/readings", headers=_headers(**{"If-None-Match": resp.headers["ETag"]}))
+    assert again.status_code == 200  # different URL, different validator
+    assert client.get(
+        f"/api/v1/devices/{dev_id}/readings", headers=_headers(**{"If-None-Match": again.headers["ETag"]})
+    ).status_code == 304
+
+
+def test_errors_are_not_cached(client):
+    assert client.get("/api/v1/devices/missing", headers=_headers()).status_code == 404
+    assert "ETag" not in client.get("/api/v1/devices/missing", headers=_headers()).headers
+    assert _stats(client)["entries"] == 0
+
+
+def test_lru_bounds_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", "e1", b"1234", "application/json")
+    cache.put("b", "e1", b"1234", "application/json")
+    assert cache.get("a", "e1") is not None  # a is now most recent
+    cache.put("c", "e1", b"1234", "application/json")
+    assert cache.get("b", "e1") is None
+    assert cache.get("a", "e1") is not None and cache.get("c", "e1") is not None
+
+    cache.put("d", "e1", b"12345678", "application/json")  # over max_bytes with the others
+    stats = cache.stats()
+    assert stats["bytes"] <= 10 and stats["entries"] == 1 and stats["evictions"] == 3
+
+    assert cache.get("d", "e2") is None  # stale generation
+    cache.put("big", "e1", b"x" * 11, "application/json")
+    assert cache.get("big", "e1") is None
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("HIMALIA_RESPONSE_CACHE_ENABLED", "false")
+    client = create_app().test_client()
+    resp = client.get("/api/v1/devices", headers=_headers())
+    assert resp.status_code == 200 and "ETag" not in resp.headers
+    assert _stats(client) == {"enabled": False}
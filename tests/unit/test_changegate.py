@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.db import session_scope
+from himalia_api.models import Reading
+from himalia_api.poller import CaptureEngine, Extraction
+from himalia_api.poller.changegate import ChangeGate, parse_roi, thumbnail
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_IMAGE_STORE_ENABLED", "false")
+    monkeypatch.setenv("HIMALIA_SPOOL_DIR", "")
+    yield
+
+
+def _meter(digit_level, noise=0.0, seed=0):
+    """A 96x128 frame: static background, 'display' region in the top-left quarter."""
+    frame = np.full((96, 128), 80.0)
+    frame[10:40, 10:60] = digit_level
+    if noise:
+        frame += np.random.default_rng(seed).normal(0, noise, frame.shape)
+    return frame
+
+
+class _Frames(dict):
+    """Decoder for tests: frame bytes are keys into a table of grayscale arrays."""
+
+    def __call__(self, data):
+        return self[data]
+
+
+def test_thumbnail_is_area_average_of_roi():
+    frame = np.arange(64 * 64, dtype=np.float32).reshape(64, 64)
+    thumb = thumbnail(frame, (0.5, 0.0, 1.0, 0.5), size=8)
+    assert thumb.shape == (8, 8)
+    assert thumb[0, 0] == pytest.approx(frame[0:4, 32:36].mean())
+    assert parse_roi("") == (0.0, 0.0, 1.0, 1.0)
+    with pytest.raises(ValueError):
+        parse_roi("0.5,0,0.4,1")
+
+
+def test_unchanged_frames_reuse_previous_extraction():
+    frames = _Frames({b"a": _meter(200), b"a~": _meter(200, noise=3.0, seed=1), b"b": _meter(20)})
+    calls = []
+
+    def extract(value):
+        calls.append(value)
+        return Extraction(value=value, unit="kWh", confidence=0.9)
+
+    gate = ChangeGate(threshold=3.0, decoder=frames)
+    assert gate.run("m", b"a", lambda: extract("1")).value == "1"
+    assert gate.run("m", b"a~", lambda: extract("2")).value == "1"  # sensor noise only
+    assert gate.run("m", b"b", lambda: extract("3")).value == "3"  # display changed
+    assert calls == ["1", "3"]
+    assert gate.stats() == {"processed": 2, "skipped": 1, "skip_ratio": 0.3333}
+
+
+def test_roi_ignores_changes_elsewhere_and_reference_expires():
+    moved = _meter(200)
+    moved[60:90, 70:120] = 250  # something passes in front of the lower half
+    frames = _Frames({b"a": _meter(200), b"moved": moved})
+    now = [0.0]
+    gate = ChangeGate(roi=(0.0, 0.0, 0.5, 0.5), max_age_s=60, decoder=frames, clock=lambda: now[0])
+    n = iter(range(10))
+
+    first = gate.run("m", b"a", lambda: Extraction(value=str(next(n))))
+    assert gate.run("m", b"moved", lambda: Extraction(value=str(next(n)))) is first
+
+    now[0] = 61.0
+    assert gate.run("m", b"a", lambda: Extraction(value=str(next(n)))).value == "1"
+
+
+def test_failed_extraction_keeps_the_old_reference():
+    frames = _Frames({b"a": _meter(200)})
+    gate = ChangeGate(decoder=frames)
+    gate.run("m", b"a", lambda: Extraction(value="1"))
+
+    def boom():
+        raise RuntimeError("model down")
+
+    gate.forget("m")
+    with pytest.raises(RuntimeError):
+        gate.run("m", b"a", boom)
+    assert gate.run("m", b"a", lambda: Extraction(value="2")).value == "2"
+    assert gate.stats()["processed"] == 2
+
+
+def test_engine_records_gated_values():
+    client = create_app().test_client()
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": "meter", "type": "camera_ip_snapshot", "endpoint": "http://meter.local/snap.jpg"},
+        headers={"X-API-Key": "test-api-key"},
+    )
+    assert resp.status_code == 201
+
+    calls = []
+
+    def extractor(spec, content):
+        calls.append(content)
+        return Extraction(value="42.5", unit="kWh", confidence=0.8)
+
+    engine = CaptureEngine(
+        load_settings(),
+        fetchers={"camera_ip_snapshot": lambda spec: b"frame"},
+        extractor=extractor,
+        change_gate=ChangeGate(decoder=_Frames({b"frame": _meter(200)})),
+    )
+    try:
+        for _ in range(5):
+            engine.run_once()
+        assert engine.stats()["change_gate"]["skipped"] == 4
+    finally:
+        engine.stop()
+
+    assert len(calls) == 1
+    with session_scope() as s:
+        readings = s.execute(select(Reading.value, Reading.unit, Reading.confidence)).all()
+    assert len(readings) == 5
+    assert set(readings) == {("42.5", "kWh", 0.8)}
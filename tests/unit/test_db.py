@@ -0,0 +1,215 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from himalia_api import create_app
+from himalia_api.db import get_engine, get_read_engine
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_pragmas_applied_on_connect():
+    create_app()
+    writer = get_engine()
+
+    assert _pragma(writer, "journal_mode") == "wal"
+    assert _pragma(writer, "synchronous") == 1  # NORMAL
+    assert _pragma(writer, "busy_timeout") == 5000
+    assert _pragma(writer, "temp_store") == 2  # MEMORY
+    assert _pragma(writer, "foreign_keys") == 1
+    assert _pragma(writer, "query_only") == 0
+
+
+def test_pragmas_configurable(monkeypatch):
+    monkeypatch.setenv("HIMALIA_SQLITE_SYNCHRONOUS", "full")
+    monkeypatch.setenv("HIMALIA_SQLITE_BUSY_TIMEOUT_MS", "1234")
+    create_app()
+    assert _pragma(get_engine(), "synchronous") == 2
+    assert _pragma(get_engine(), "busy_timeout") == 1234
+
+
+def test_reader_engine_is_separate_and_read_only():
+    create_app()
+    reader = get_read_engine()
+    assert reader is not get_engine()
+    assert _pragma(reader, "query_only") == 1
+
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM devices")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM devices"))
+
+
+def test_reads_proceed_while_writer_holds_lock():
+    client = create_app().test_client()
+    headers = {"X-API-Key": "test-api-key"}
+
+    with get_engine().connect() as conn:
+        # Hold an open write transaction, as a long ingest batch would.
+        conn.execute(text("BEGIN IMMEDIATE"))
+        conn.execute(text("UPDATE devices SET notes = 'x'"))
+
+        resp = client.get("/api/v1/devices", headers=headers)
+        assert resp.status_code == 200
+        conn.execute(text("ROLLBACK"))
+
+
+def test_typed_reading_columns_are_backfilled_and_indexed(tmp_path):
+    from alembic import command
+    from alembic.config import Config
+
+    from himalia_api.migrate import APP_DIR
+
+    url = f"sqlite:///{tmp_path / 'test.sqlite3'}"
+    cfg = Config(str(APP_DIR / "alembic.ini"))
+    cfg.attributes["db_url"] = url
+    command.upgrade(cfg, "e3a8c6b1d2f4")
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO devices (id, name, type, enabled, endpoint, poll_interval_s, timeout_ms, created_at, updated_at) "
+                "VALUES ('d1', 'cam', 'camera_ip_snapshot', 1, 'http://x', 60, 5000, '2026-01-01', '2026-01-01')"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO readings (device_id, captured_at, value, success) VALUES ('d1', :at, :value, 1)"),
+            [
+                {"at": "2026-01-01 00:00:01.234567", "value": " 42 "},
+                {"at": "2026-01-01 00:00:02.000000", "value": "abc"},
+                {"at": "2026-01-01 00:00:03.000000", "value": "inf"},
+            ],
+        )
+    command.upgrade(cfg, "head")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT captured_ms, value_num FROM readings ORDER BY id")).all()
+        assert rows == [(1767225601234, 42.0), (1767225602000, None), (1767225603000, None)]
+        plan = " ".join(
+            r[-1]
+            for r in conn.execute(
+                text("EXPLAIN QUERY PLAN SELECT id FROM readings WHERE device_id = 'd1' AND captured_ms >= 0 ORDER BY captured_ms")
+            )
+        )
+        assert "ix_readings_device_id_captured_ms" in plan
+        indexes = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE tbl_name = 'readings'"))}
+        assert "ix_readings_device_id_captured_at" not in indexes
+    engine.dispose()
+
+
+def test_typed_reading_backfill_resumes_after_an_interrupted_run(tmp_path):
+    from alembic import command
+    from alembic.config import Config
+
+    from himalia_api.migrate import APP_DIR
+
+    url = f"sqlite:///{tmp_path / 'test.sqlite3'}"
+    cfg = Config(str(APP_DIR / "alembic.ini"))
+    cfg.attributes["db_url"] = url
+    command.upgrade(cfg, "e3a8c6b1d2f4")
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO devices (id, name, type, enabled, endpoint, poll_interval_s, timeout_ms, created_at, updated_at) "
+                "VALUES ('d1', 'cam', 'camera_ip_snapshot', 1, 'http://x', 60, 5000, '2026-01-01', '2026-01-01')"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO readings (device_id, captured_at, value, success) VALUES ('d1', :at, '7', 1)"),
+            [{"at": f"2026-01-01 00:00:0{i}.000000"} for i in range(3)],
+        )
+        # Chunks commit one by one: a run killed mid-backfill leaves the columns and some rows filled.
+        conn.execute(text("ALTER TABLE readings ADD COLUMN captured_ms INTEGER"))
+        conn.execute(text("ALTER TABLE readings ADD COLUMN value_num FLOAT"))
+        conn.execute(text("UPDATE readings SET captured_ms = 1, value_num = 1 WHERE id = 1"))
+    command.upgrade(cfg, "head")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT captured_ms, value_num FROM readings ORDER BY id")).all()
+        assert rows == [(1, 1.0), (1767225601000, 7.0), (1767225602000, 7.0)]
+    engine.dispose()
+
+def test_device_tags_backfilled_from_json(tmp_path):
+    from alembic import command
+    from alembic.config import Config
+
+    from himalia_api.migrate import APP_DIR
+
+    url = f"sqlite:///{tmp_path / 'test.sqlite3'}"
+    cfg = Config(str(APP_DIR / "alembic.ini"))
+    cfg.attributes["db_url"] = url
+    command.upgrade(cfg, "0a6c4e8f2b91")
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO devices (id, name, type, enabled, endpoint, poll_interval_s, timeout_ms, tags, created_at, updated_at) "
+                "VALUES (:id, 'cam', 'camera_ip_snapshot', 1, 'http://x', 60, 5000, :tags, '2026-01-01', '2026-01-01')"
+            ),
+            [{"id": "d1", "tags": '["a", "b", "a"]'}, {"id": "d2", "tags": None}, {"id": "d3", "tags": '["b"]'}],
+        )
+    command.upgrade(cfg, "head")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT tag, device_id FROM device_tags ORDER BY tag, device_id")).all()
+        assert rows == [("a", "d1"), ("b", "d1"), ("b", "d3")]
+        plan = " ".join(
+            r[-1] for r in conn.execute(text("EXPLAIN QUERY PLAN SELECT device_id FROM device_tags WHERE tag = 'b'"))
+        )
+        assert "COVERING INDEX" in plan
+    engine.dispose()
+
+
+def test_readings_rebuilt_with_autoincrement(tmp_path):
+    from alembic import command
+    from alembic.config import Config
+
+    from himalia_api.migrate import APP_DIR
+
+    url = f"sqlite:///{tmp_path / 'test.sqlite3'}"
+    cfg = Config(str(APP_DIR / "alembic.ini"))
+    cfg.attributes["db_url"] = url
+    command.upgrade(cfg, "3e5f7b9c1a64")
+
+    engine = create_engine(url)
+    insert_reading = text(
+        "INSERT INTO readings (device_id, captured_at, captured_ms, success) VALUES ('d1', '2026-01-01', 0, 1)"
+    )
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO devices (id, name, type, enabled, endpoint, poll_interval_s, timeout_ms, created_at, updated_at) "
+                "VALUES ('d1', 'cam', 'camera_ip_snapshot', 1, 'http://x', 60, 5000, '2026-01-01', '2026-01-01')"
+            )
+        )
+        for _ in range(3):
+            conn.execute(insert_reading)
+    command.upgrade(cfg, "head")
+
+    with engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'readings'")).scalar()
+        assert "AUTOINCREMENT" in ddl and "ON DELETE CASCADE" in ddl
+        indexes = dict(
+            conn.execute(text("SELECT name, sql FROM sqlite_master WHERE tbl_name = 'readings' AND type = 'index'")).all()
+        )
+        assert "WHERE image_path IS NOT NULL" in indexes["ix_readings_image_path"]
+        assert {"ix_readings_device_id_captured_ms", "ix_readings_captured_ms"} <= set(indexes)
+        conn.execute(text("DELETE FROM readings WHERE id = 3"))
+        conn.execute(insert_reading)
+        assert conn.execute(text("SELECT max(id) FROM readings")).scalar() == 4
+    engine.dispose()
@@ -136,3 +136,84 @@ def test_patch_updates_only_specified_fields(client):
     assert body["enabled"] is False
     assert body["poll_interval_s"] == 120
     assert body["timeout_ms"] == 5000
+
+
+def test_list_devices_paginates_filters_and_projects(client):
+    ids = []
+    for i in range(7):
+        resp = client.post(
+            "/api/v1/devices",
+            json={
+                "name": f"Cam {i}",
+                "type": "camera_rtsp" if i % 3 == 0 else "camera_ip_snapshot",
+                "endpoint": "rtsp://example.local/s" if i % 3 == 0 else "http://example.local/snap.jpg",
+                "enabled": i != 4,
+                "tags": ["boiler-room"] if i % 2 == 0 else ["line1"],
+            },
+            headers=_headers(),
+        )
+        ids.append(resp.get_json()["id"])
+
+    # Keyset pages in creation order
+    seen, url = [], "/api/v1/devices?limit=3"
+    while url:
+        body = client.get(url, headers=_headers()).get_json()
+        seen.extend(d["id"] for d in body["items"])
+        url = f"/api/v1/devices?limit=3&cursor={body['next_cursor']}" if body["next_cursor"] else None
+    assert seen == ids
+
+    def names(query):
+        resp = client.get(f"/api/v1/devices?{query}", headers=_headers())
+        assert resp.status_code == 200
+        return [d["name"] for d in resp.get_json()["items"]]
+
+    assert names("type=camera_rtsp") == ["Cam 0", "Cam 3", "Cam 6"]
+    assert names("enabled=false") == ["Cam 4"]
+    assert names("tag=boiler-room&type=camera_ip_snapshot") == ["Cam 2", "Cam 4"]
+    assert names("has_error=true") == []
+    assert len(names("has_error=false")) == 7
+
+    proj = client.get("/api/v1/devices?fields=name,has_auth_password&limit=1", headers=_headers()).get_json()
+    assert proj["items"] == [{"name": "Cam 0", "has_auth_password": False}]
+
+    bad = client.get("/api/v1/devices?fields=name,secret&enabled=maybe", headers=_headers())
+    assert bad.status_code == 400
+    assert len(bad.get_json()["details"]) == 2
+
+
+def test_tag_index_follows_every_write_path(client):
+    def create(name, tags):
+        body = {"name": name, "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg", "tags": tags}
+        return client.post("/api/v1/devices", json=body, headers=_headers()).get_json()["id"]
+
+    a = create("A", ["boiler-room", "floor-1"])
+    b = create("B", ["boiler-room"])
+    c = create("C", ["floor-1", "floor-1"])
+
+    def names(query):
+        resp = client.get(f"/api/v1/devices?{query}", headers=_headers())
+        assert resp.status_code == 200
+        return sorted(d["name"] for d in resp.get_json()["items"])
+
+    assert names("tag=boiler-room&tag=floor-1") == ["A"]
+    assert names("tag=boiler-room,floor-1&tag_mode=any") == ["A", "B", "C"]
+    assert names("tag=floor-1") == ["A", "C"]
+
+    client.patch(f"/api/v1/devices/{b}", json={"tags": ["floor-1", "boiler-room"]}, headers=_headers())
+    client.put(
+        f"/api/v1/devices/{a}",
+        json={"name": "A", "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg"},
+        headers=_headers(),
+    )
+    client.delete(f"/api/v1/devices/{c}", headers=_headers())
+    assert names("tag=floor-1") == ["B"]
+    assert names("tag=boiler-room&tag=floor-1") == ["B"]
+
+    rows = [
+        {"id": a, "name": "A", "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg", "tags": ["floor-1"]},
+        {"name": "D", "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg", "tags": ["floor-1"]},
+    ]
+    assert client.post("/api/v1/devices:bulk?upsert=true", json=rows, headers=_headers()).status_code == 200
+    assert names("tag=floor-1") == ["A", "B", "D"]
+
+    assert client.get("/api/v1/devices?tag=x&tag_mode=some", headers=_headers()).status_code == 400
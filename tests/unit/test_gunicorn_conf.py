@@ -0,0 +1,72 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from himalia_api import create_app
+from himalia_api.db import get_read_engine
+
+CONF = Path(__file__).resolve().parents[2] / "app" / "gunicorn.conf.py"
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+def _load_conf():
+    spec = importlib.util.spec_from_file_location("himalia_gunicorn_conf", CONF)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_defaults_preload_threads_and_recycling(monkeypatch):
+    monkeypatch.delenv("HIMALIA_MIGRATIONS_ON_STARTUP", raising=False)
+    conf = _load_conf()
+    assert conf.preload_app is True
+    assert conf.worker_class == "gthread" and conf.threads == 4
+    assert 1 <= conf.workers <= 8
+    assert conf.max_requests == 1000 and conf.max_requests_jitter == 100
+    assert "HIMALIA_MIGRATIONS_ON_STARTUP" not in os.environ
+
+
+def test_env_overrides(monkeypatch):
+    monkeypatch.setenv("HIMALIA_API_WORKERS", "3")
+    monkeypatch.setenv("HIMALIA_API_WORKER_CLASS", "sync")
+    monkeypatch.setenv("HIMALIA_API_MAX_REQUESTS", "0")
+    monkeypatch.setenv("HIMALIA_API_PRELOAD", "false")
+    monkeypatch.setenv("HIMALIA_MIGRATIONS_ON_STARTUP", "true")
+    conf = _load_conf()
+    assert (conf.workers, conf.worker_class, conf.threads) == (3, "sync", 1)
+    assert conf.max_requests == 0 and conf.max_requests_jitter == 0
+    # Without preload every worker would migrate; the master does it once instead.
+    assert os.environ["HIMALIA_MIGRATIONS_ON_STARTUP"] == "false"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_worker_gets_fresh_sqlite_pool():
+    client = create_app().test_client()
+    with get_read_engine().connect() as conn:  # the master now holds a pooled connection
+        conn.execute(text("SELECT 1"))
+    conf = _load_conf()
+
+    pid = os.fork()
+    if pid == 0:  # child: behave like a gunicorn worker
+        code = 1
+        try:
+            conf.post_fork(None, None)
+            resp = client.get("/api/v1/devices", headers={"X-API-Key": "test-api-key"})
+            code = 0 if resp.status_code == 200 else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    # The parent's pool is untouched by the child's dispose(close=False).
+    assert client.get("/api/v1/devices", headers={"X-API-Key": "test-api-key"}).status_code == 200
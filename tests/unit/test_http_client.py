@@ -0,0 +1,94 @@
+import dataclasses
+import threading
+import time
+
+import pytest
+import requests
+
+from fakecam import FRAME, FakeCamera
+from himalia_api.poller import DeviceSpec
+from himalia_api.poller.http import SnapshotClient
+
+
+def _spec(url, auth_mode="none", username=None, password=None, device_id="d1"):
+    return DeviceSpec(
+        id=device_id,
+        type="camera_ip_snapshot",
+        endpoint=url,
+        auth_mode=auth_mode,
+        auth_username=username,
+        auth_password=password,
+        poll_interval_s=1,
+        timeout_ms=2000,
+    )
+
+
+@pytest.mark.parametrize("auth_mode", ["none", "basic", "bearer", "digest"])
+def test_reuses_one_connection_for_repeated_polls(auth_mode):
+    client = SnapshotClient()
+    with FakeCamera(auth_mode=auth_mode) as cam:
+        spec = _spec(cam.url, auth_mode=auth_mode, username=cam.username, password=cam.password)
+        try:
+            for _ in range(10):
+                assert client.fetch(spec) == FRAME
+        finally:
+            client.close()
+
+    assert cam.connections == 1
+    # Digest pays one 401 challenge; later polls reuse the cached nonce.
+    assert cam.challenges == (1 if auth_mode == "digest" else 0)
+
+
+def test_bad_credentials_raise():
+    client = SnapshotClient()
+    with FakeCamera(auth_mode="basic") as cam:
+        spec = _spec(cam.url, auth_mode="basic", username="u", password="wrong")
+        try:
+            with pytest.raises(requests.HTTPError):
+                client.fetch(spec)
+        finally:
+            client.close()
+
+
+def test_devices_on_same_host_share_a_bounded_pool():
+    client = SnapshotClient(max_per_host=2)
+    with FakeCamera() as cam:
+        specs = [_spec(cam.url, device_id=f"d{i}") for i in range(6)]
+        errors = []
+
+        def worker(spec):
+            try:
+                for _ in range(5):
+                    client.fetch(spec)
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in specs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client.close()
+
+    assert not errors
+    assert cam.requests == 30
+    assert cam.connections <= 2
+    assert client.host_count() == 0
+
+
+def test_slot_wait_and_request_share_one_deadline():
+    client = SnapshotClient(max_per_host=1)
+    with FakeCamera(delay_s=0.4) as cam:
+        spec = dataclasses.replace(_spec(cam.url), timeout_ms=500)
+        first = threading.Thread(target=client.fetch, args=(_spec(cam.url, device_id="d0"),))
+        first.start()
+        time.sleep(0.05)
+        t0 = time.monotonic()
+        try:
+            # ~0.35s waiting for the host slot leaves too little for a 0.4s snapshot.
+            with pytest.raises(requests.Timeout):
+                client.fetch(spec)
+            assert time.monotonic() - t0 < 0.9
+        finally:
+            first.join()
+            client.close()
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from himalia_api.imagestore import ImageStore, dhash
+
+JPEG = b"\xff\xd8\xff\xe0" + b"frame-1" * 50
+
+
+def _files(root):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file())
+
+
+def test_identical_frames_are_stored_once(tmp_path):
+    store = ImageStore(str(tmp_path))
+
+    first = store.put(JPEG, device_id="a")
+    second = store.put(JPEG, device_id="b")
+    other = store.put(JPEG + b"!", device_id="a")
+
+    assert first.path == second.path
+    assert first.written and not second.written
+    assert first.path == f"{first.sha256[:2]}/{first.sha256[2:4]}/{first.sha256}.jpg"
+    assert (tmp_path / first.path).read_bytes() == JPEG
+    assert other.path != first.path
+    assert _files(tmp_path) == sorted([first.path, other.path])  # no temp files left behind
+    assert store.stats()["deduplicated"] == 1
+    assert store.stats()["bytes_saved"] == len(JPEG)
+
+
+def test_resolve_stays_inside_root(tmp_path):
+    store = ImageStore(str(tmp_path))
+    assert store.resolve("ab/cd/x.jpg") == tmp_path.resolve() / "ab/cd/x.jpg"
+    assert store.resolve("../outside.jpg") is None
+    assert store.resolve("/etc/passwd") is None
+
+
+def _scene(seed, noise=0.0):
+    rng = np.random.default_rng(seed)
+    base = np.tile(np.linspace(0, 255, 64), (48, 1))
+    base[10:30, 20:40] = 30  # a dark object
+    return base + rng.normal(0, noise, base.shape) if noise else base
+
+
+def test_dhash_tolerates_noise_but_not_scene_changes():
+    a = dhash(_scene(0))
+    assert bin(a ^ dhash(_scene(1, noise=2.0))).count("1") <= 4
+    moved = _scene(0)
+    moved[10:30, 20:40] = 255
+    assert bin(a ^ dhash(moved)).count("1") > 4
+
+
+def test_perceptual_dedupe_skips_unchanged_frames(tmp_path):
+    frames = {b"\xff\xd8\xff1": _scene(0), b"\xff\xd8\xff2": _scene(1, noise=2.0), b"\xff\xd8\xff3": np.fliplr(_scene(0))}
+    store = ImageStore(str(tmp_path), perceptual=True, decoder=frames.__getitem__)
+
+    first = store.put(b"\xff\xd8\xff1", device_id="cam")
+    same = store.put(b"\xff\xd8\xff2", device_id="cam")
+    changed = store.put(b"\xff\xd8\xff3", device_id="cam")
+
+    assert same.path == first.path and not same.written
+    assert changed.written and changed.path != first.path
+    assert store.stats()["unchanged"] == 1
+    assert len(_files(tmp_path)) == 2
+
+    # Another device with the same scene keeps its own reference frame.
+    assert store.put(b"\xff\xd8\xff2", device_id="other").written
+
+
+@pytest.mark.parametrize("payload", [b"\x89PNG\r\n\x1a\nxx", b"raw"])
+def test_extension_follows_content(tmp_path, payload):
+    path = ImageStore(str(tmp_path)).put(payload).path
+    assert path.endswith(".png" if payload.startswith(b"\x89PNG") else ".bin")
+
+
+def test_unchanged_frame_refreshes_the_reused_file(tmp_path):
+    frames = {b"\xff\xd8\xff1": _scene(0), b"\xff\xd8\xff2": _scene(1, noise=2.0)}
+    store = ImageStore(str(tmp_path), perceptual=True, decoder=frames.__getitem__)
+    first = store.put(b"\xff\xd8\xff1", device_id="cam")
+    path = tmp_path / first.path
+    os.utime(path, (1_000_000, 1_000_000))
+
+    # The orphan sweep keeps files by mtime: reusing one must count as a fresh reference.
+    assert not store.put(b"\xff\xd8\xff2", device_id="cam").written
+    assert path.stat().st_mtime > 1_000_000
+
+    path.unlink()  # pruned by retention: the frame is written again
+    assert store.put(b"\xff\xd8\xff2", device_id="cam").written
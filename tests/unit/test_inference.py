@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.db import session_scope
+from himalia_api.models import Reading
+from himalia_api.poller import CaptureEngine, DeviceSpec, PollScheduler
+from himalia_api.poller.inference import InferencePool, InferenceRequest, OllamaBackend, StubBackend
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_IMAGE_STORE_ENABLED", "false")
+    monkeypatch.setenv("HIMALIA_SPOOL_DIR", "")
+    yield
+
+
+def _spec(i=0):
+    return DeviceSpec(
+        id=f"dev{i}",
+        type="camera_ip_snapshot",
+        endpoint="http://cam.local/snap.jpg",
+        auth_mode=None,
+        auth_username=None,
+        auth_password=None,
+        poll_interval_s=10,
+        timeout_ms=1000,
+    )
+
+
+def test_frames_are_grouped_into_batches():
+    backend = StubBackend()
+    pool = InferencePool(backend, max_batch=8, max_wait_ms=300, max_queue=100)
+    results = []
+    for i in range(20):
+        assert pool.submit(_spec(i), f"frame{i}".encode(), lambda ex, err: results.append((ex, err)))
+    pool.start()
+    try:
+        assert pool.flush(timeout=5)
+    finally:
+        pool.stop()
+
+    assert backend.calls == [8, 8, 4]
+    assert len(results) == 20
+    assert all(ex is not None and err is None for ex, err in results)
+    stats = pool.stats()
+    assert stats["batches"] == 3 and stats["avg_batch_size"] == pytest.approx(20 / 3, rel=1e-3)
+
+
+def test_backend_errors_reach_every_callback():
+    class Broken:
+        name = "broken"
+
+        def infer(self, batch):
+            raise ConnectionError("model server down")
+
+    pool = InferencePool(Broken(), max_batch=4, max_wait_ms=0)
+    errors = []
+    pool.start()
+    try:
+        for i in range(3):
+            pool.submit(_spec(i), b"x", lambda ex, err: errors.append(err))
+        assert pool.flush(timeout=5)
+    finally:
+        pool.stop()
+    assert len(errors) == 3 and all(isinstance(e, ConnectionError) for e in errors)
+    assert pool.stats()["errors"] >= 1
+
+
+class _BlockingBackend(StubBackend):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def infer(self, batch):
+        self.release.wait(5)
+        return super().infer(batch)
+
+
+def test_full_queue_rejects_and_defers_polls():
+    client = create_app().test_client()
+    for i in range(3):
+        client.post(
+            "/api/v1/devices",
+            json={"name": f"m{i}", "type": "camera_ip_snapshot", "endpoint": "http://m.local/snap.jpg"},
+            headers={"X-API-Key": "test-api-key"},
+        )
+
+    backend = _BlockingBackend()
+    pool = InferencePool(backend, max_batch=1, max_wait_ms=0, max_queue=1)
+    engine = CaptureEngine(
+        load_settings(),
+        fetchers={"camera_ip_snapshot": lambda spec: b"frame"},
+        scheduler=PollScheduler(jitter=False),
+        inference=pool,
+    )
+    try:
+        engine.sync_devices()
+        engine.start()
+        assert pool.submit(_spec(1), b"a", lambda ex, err: None)  # taken by the (blocked) worker
+        deadline = time.monotonic() + 5
+        while pool.stats()["queued"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.submit(_spec(2), b"b", lambda ex, err: None)  # waits in the queue
+        assert not pool.submit(_spec(3), b"c", lambda ex, err: None)
+        assert pool.saturated()
+
+        assert engine.dispatch_due(now=1e9) == 0  # nothing fetched while extraction is backed up
+        assert engine.stats()["inference"]["deferred_polls"] == 3
+        assert engine.scheduler.next_deadline() > 1e9
+    finally:
+        backend.release.set()
+        engine.stop()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_engine_writes_inferred_values():
+    client = create_app().test_client()
+    for i in range(5):
+        client.post(
+            "/api/v1/devices",
+            json={"name": f"m{i}", "type": "camera_ip_snapshot", "endpoint": "http://m.local/snap.jpg"},
+            headers={"X-API-Key": "test-api-key"},
+        )
+
+    backend = StubBackend(latency_s=0.01)
+    engine = CaptureEngine(
+        load_settings(),
+        fetchers={"camera_ip_snapshot": lambda spec: spec.id.encode()},
+        inference=InferencePool(backend, max_batch=8, max_wait_ms=100),
+    )
+    try:
+        engine.run_once()
+    finally:
+        engine.stop()
+
+    assert sum(backend.calls) == 5 and len(backend.calls) < 5
+    with session_scope() as s:
+        rows = s.execute(select(Reading.value, Reading.confidence, Reading.success)).all()
+    assert len(rows) == 5
+    assert all(value is not None and confidence == 1.0 and success for value, confidence, success in rows)
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class _FakeSession:
+    def __init__(self, readings):
+        self.readings = readings
+        self.requests = []
+
+    def post(self, url, **kwargs):
+        self.requests.append((url, kwargs["json"]))
+        return _FakeResponse({"response": json.dumps({"readings": self.readings})})
+
+
+def test_ollama_backend_sends_one_request_per_batch():
+    session = _FakeSession(
+        [{"value": 12.5, "unit": "kWh", "confidence": 0.93}, {"value": "7", "unit": None, "confidence": 3}]
+    )
+    backend = OllamaBackend("http://ollama:11434/", "llava", session=session)
+    pool = InferencePool(backend)
+
+    out = backend.infer([InferenceRequest(_spec(0), b"a", lambda *_: None), InferenceRequest(_spec(1), b"b", lambda *_: None)])
+
+    assert len(session.requests) == 1
+    url, body = session.requests[0]
+    assert url == "http://ollama:11434/api/generate"
+    assert body["model"] == "llava" and body["format"] == "json" and len(body["images"]) == 2
+    assert (out[0].value, out[0].unit, out[0].confidence) == ("12.5", "kWh", 0.93)
+    assert (out[1].value, out[1].unit, out[1].confidence) == ("7", None, 1.0)
+    assert pool.stats()["backend"] == "ollama"
+
+    with pytest.raises(ValueError):
+        backend.infer([InferenceRequest(_spec(0), b"a", lambda *_: None)])
@@ -0,0 +1,119 @@
+import dataclasses
+import datetime as dt
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+
+from himalia_api import create_app
+from himalia_api.db import get_engine, session_scope
+from himalia_api.models import Device, Reading
+from himalia_api.poller import PollResult
+from himalia_api.poller.ingest import ReadingWriter, write_batch
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_POLLER_STATS_PATH", str(tmp_path / "poller-stats.json"))
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _create(client, name):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg"},
+        headers={"X-API-Key": "test-api-key"},
+    )
+    return resp.get_json()["id"]
+
+
+def _result(device_id, seconds, success=True):
+    at = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(seconds=seconds)
+    return PollResult(
+        device_id=device_id,
+        captured_at=at,
+        success=success,
+        error=None if success else f"boom at {seconds}",
+        source="camera_ip_snapshot",
+    )
+
+
+def _count_commits():
+    commits = []
+    event.listen(get_engine(), "commit", lambda conn: commits.append(1))
+    return commits
+
+
+def test_many_results_commit_in_few_batches(client):
+    ids = [_create(client, f"cam{i}") for i in range(10)]
+    commits = _count_commits()
+
+    writer = ReadingWriter(max_batch=100, max_delay_ms=5000)
+    for n in range(300):
+        writer.submit(_result(ids[n % 10], n))
+    writer.flush()
+
+    assert len(commits) == 3
+    stats = writer.stats()
+    assert stats["rows"] == 300
+    assert stats["batches"] == 3
+    assert stats["max_batch_size"] == 100
+    assert stats["avg_flush_ms"] > 0
+
+    with session_scope() as s:
+        assert s.scalar(select(func.count()).select_from(Reading)) == 300
+
+
+def test_device_status_follows_newest_result_in_batch(client):
+    ok_then_fail = _create(client, "a")
+    fail_then_ok = _create(client, "b")
+
+    writer = ReadingWriter(max_delay_ms=50)
+    writer.start()
+    writer.submit(_result(ok_then_fail, 1, success=True))
+    writer.submit(_result(ok_then_fail, 2, success=False))
+    writer.submit(_result(fail_then_ok, 2, success=True))
+    writer.submit(_result(fail_then_ok, 1, success=False))
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    with session_scope() as s:
+        a = s.get(Device, ok_then_fail)
+        b = s.get(Device, fail_then_ok)
+        assert a.last_error == "boom at 2"
+        assert a.last_seen_at.replace(tzinfo=dt.timezone.utc).second == 1
+        assert b.last_error is None
+        assert b.last_seen_at.replace(tzinfo=dt.timezone.utc).second == 2
+        assert b.last_poll_at.replace(tzinfo=dt.timezone.utc).second == 2
+
+
+def test_extraction_errors_reach_the_device(client):
+    dev = _create(client, "meter")
+    unreadable = dataclasses.replace(_result(dev, 1), error="extraction failed: no digits")
+    write_batch([unreadable])
+    with session_scope() as s:
+        device = s.get(Device, dev)
+        assert device.last_error == "extraction failed: no digits"
+        assert device.last_seen_at == device.last_poll_at  # the capture itself succeeded
+
+    write_batch([_result(dev, 2)])
+    with session_scope() as s:
+        assert s.get(Device, dev).last_error is None
+
+
+def test_poller_stats_endpoint(client, tmp_path):
+    headers = {"X-API-Key": "test-api-key"}
+    assert client.get("/api/v1/poller/stats", headers=headers).status_code == 503
+
+    (tmp_path / "poller-stats.json").write_text(json.dumps({"scheduled": 3, "ingest": {"batches": 1}}))
+    resp = client.get("/api/v1/poller/stats", headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()["ingest"]["batches"] == 1
@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.db import session_scope
+from himalia_api.models import Device, Reading
+from himalia_api.poller import CaptureEngine, PollScheduler
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_IMAGE_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("HIMALIA_SPOOL_DIR", str(tmp_path / "spool"))
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _create(client, name, **extra):
+    payload = {"name": name, "type": "camera_ip_snapshot", "endpoint": f"http://{name}.local/snap.jpg"}
+    payload.update(extra)
+    resp = client.post("/api/v1/devices", json=payload, headers={"X-API-Key": "test-api-key"})
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def test_run_once_records_readings_and_device_status(client, tmp_path):
+    ok_id = _create(client, "ok")
+    bad_id = _create(client, "bad")
+    _create(client, "off", enabled=False)
+
+    def fetch(spec):
+        if spec.id == bad_id:
+            raise ConnectionError("camera unreachable")
+        return b"\xff\xd8jpeg"
+
+    engine = CaptureEngine(load_settings(), fetchers={"camera_ip_snapshot": fetch})
+    try:
+        results = engine.run_once()
+    finally:
+        engine.stop()
+
+    assert {r.device_id for r in results} == {ok_id, bad_id}
+
+    with session_scope() as s:
+        readings = {r.device_id: r for r in s.execute(select(Reading)).scalars()}
+        ok = s.get(Device, ok_id)
+        bad = s.get(Device, bad_id)
+
+        assert readings[ok_id].success is True
+        assert readings[bad_id].success is False
+        assert readings[bad_id].image_path is None
+        assert (tmp_path / "images" / readings[ok_id].image_path).read_bytes() == b"\xff\xd8jpeg"
+        assert "camera unreachable" in readings[bad_id].error
+
+        assert ok.last_poll_at is not None and ok.last_seen_at is not None
+        assert ok.last_error is None
+        assert bad.last_seen_at is None
+        assert "camera unreachable" in bad.last_error
+
+
+def test_fetches_run_concurrently(client):
+    for i in range(8):
+        _create(client, f"cam{i}")
+
+    barrier = threading.Barrier(8, timeout=5)
+
+    def fetch(spec):
+        # Every fetch blocks until all eight are in flight at once.
+        barrier.wait()
+        return b"jpeg"
+
+    engine = CaptureEngine(load_settings(), fetchers={"camera_ip_snapshot": fetch})
+    try:
+        results = engine.run_once()
+    finally:
+        engine.stop()
+
+    assert len(results) == 8
+    assert all(r.success for r in results)
+
+
+def test_dispatch_honors_poll_interval(client):
+    _create(client, "fast", poll_interval_s=5)
+    _create(client, "slow", poll_interval_s=60)
+
+    calls = []
+    now = [1000.0]
+
+    def fetch(spec):
+        calls.append(spec.poll_interval_s)
+        return b"jpeg"
+
+    engine = CaptureEngine(
+        load_settings(),
+        fetchers={"camera_ip_snapshot": fetch},
+        scheduler=PollScheduler(jitter=False),
+        clock=lambda: now[0],
+    )
+    engine.sync_devices()
+    engine.start()
+    try:
+        assert engine.dispatch_due() == 2
+        _drain(engine)
+        now[0] += 5
+        assert engine.dispatch_due() == 1
+        _drain(engine)
+        now[0] += 55
+        assert engine.dispatch_due() == 2
+        _drain(engine)
+    finally:
+        engine.stop()
+
+    assert sorted(calls) == [5, 5, 5, 60, 60]
+
+
+def _drain(engine, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while engine._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_sync_picks_up_api_changes_without_restart(client):
+    headers = {"X-API-Key": "test-api-key"}
+    keep = _create(client, "keep")
+    gone = _create(client, "gone")
+
+    engine = CaptureEngine(load_settings(), fetchers={"camera_ip_snapshot": lambda spec: b"jpeg"})
+    assert engine.sync_devices() == 2
+
+    added = _create(client, "added")
+    assert client.delete(f"/api/v1/devices/{gone}", headers=headers).status_code == 204
+    assert client.patch(f"/api/v1/devices/{keep}", json={"poll_interval_s": 7}, headers=headers).status_code == 200
+
+    assert engine.sync_devices() == 2
+    specs = {spec.id: spec for spec in engine.scheduler.specs()}
+    assert set(specs) == {keep, added}
+    assert specs[keep].poll_interval_s == 7
+
+    assert client.patch(f"/api/v1/devices/{added}", json={"enabled": False}, headers=headers).status_code == 200
+    assert engine.sync_devices() == 1
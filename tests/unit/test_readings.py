@@ -0,0 +1,160 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import insert
+
+from himalia_api import create_app
+from himalia_api.db import session_scope
+from himalia_api.models import Reading
+
+T0 = dt.datetime(2026, 3, 1, 12, 0, 0, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _headers():
+    return {"X-API-Key": "test-api-key"}
+
+
+def _create(client, name):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg"},
+        headers=_headers(),
+    )
+    return resp.get_json()["id"]
+
+
+def _seed(device_id, n, *, start=T0, step_s=60, success=lambda i: True, source="camera_ip_snapshot"):
+    with session_scope() as s:
+        s.execute(
+            insert(Reading),
+            [
+                {
+                    "device_id": device_id,
+                    "captured_at": start + dt.timedelta(seconds=i * step_s),
+                    "value": str(i),
+                    "success": success(i),
+                    "source": source,
+                }
+                for i in range(n)
+            ],
+        )
+
+
+def _all_pages(client, base):
+    items, pages = [], 0
+    url = base
+    while url:
+        resp = client.get(url, headers=_headers())
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/json"
+        body = resp.get_json()
+        assert body["count"] == len(body["items"])
+        items.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        url = f"{base}&cursor={cursor}" if cursor else None
+    return items, pages
+
+
+def test_device_readings_keyset_pages_cover_everything_once(client):
+    dev = _create(client, "a")
+    other = _create(client, "b")
+    _seed(dev, 25)
+    _seed(other, 5)
+    # Same timestamp for several rows: the id tiebreak must keep pages disjoint.
+    _seed(dev, 4, start=T0 + dt.timedelta(hours=2), step_s=0)
+
+    items, pages = _all_pages(client, f"/api/v1/devices/{dev}/readings?limit=7")
+    assert pages == 5
+    assert len(items) == 29
+    assert len({r["id"] for r in items}) == 29
+    assert all(r["device_id"] == dev for r in items)
+    keys = [(r["captured_at"], r["id"]) for r in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_fleet_readings_filters(client):
+    a = _create(client, "a")
+    b = _create(client, "b")
+    _seed(a, 10, success=lambda i: i % 2 == 0)
+    _seed(b, 10, source="manual")
+
+    since = (T0 + dt.timedelta(minutes=3)).isoformat()
+    until = (T0 + dt.timedelta(minutes=8)).isoformat()
+    items, _ = _all_pages(client, f"/api/v1/readings?limit=3&since={since.replace('+', '%2B')}&until={until.replace('+', '%2B')}")
+    assert len(items) == 10
+    assert {r["value"] for r in items} == {"3", "4", "5", "6", "7"}
+
+    resp = client.get("/api/v1/readings?success=false&limit=100", headers=_headers())
+    assert {r["device_id"] for r in resp.get_json()["items"]} == {a}
+    assert resp.get_json()["count"] == 5
+
+    resp = client.get(f"/api/v1/readings?source=manual&device_id={b}&order=asc", headers=_headers())
+    values = [r["value"] for r in resp.get_json()["items"]]
+    assert values == [str(i) for i in range(10)]
+
+
+def test_readings_errors(client):
+    assert client.get("/api/v1/devices/missing/readings", headers=_headers()).status_code == 404
+
+    resp = client.get("/api/v1/readings?limit=0&since=yesterday&cursor=zzz", headers=_headers())
+    assert resp.status_code == 400
+    details = resp.get_json()["details"]
+    assert any("limit" in d for d in details)
+    assert any("since" in d for d in details)
+    assert any("cursor" in d for d in details)
+
+
+def test_fleet_readings_tag_filter(client):
+    def create(name, tags):
+        body = {"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg", "tags": tags}
+        return client.post("/api/v1/devices", json=body, headers=_headers()).get_json()["id"]
+
+    a = create("a", ["boiler-room", "east"])
+    b = create("b", ["boiler-room"])
+    c = create("c", ["east"])
+    for dev in (a, b, c):
+        _seed(dev, 4)
+
+    items, _ = _all_pages(client, "/api/v1/readings?limit=3&tag=boiler-room")
+    assert len(items) == 8 and {r["device_id"] for r in items} == {a, b}
+    keys = [(r["captured_at"], r["id"]) for r in items]
+    assert keys == sorted(keys, reverse=True)
+
+    items, _ = _all_pages(client, "/api/v1/readings?limit=100&tag=boiler-room&tag=east")
+    assert {r["device_id"] for r in items} == {a}
+    items, _ = _all_pages(client, "/api/v1/readings?limit=100&tag=boiler-room&tag=east&tag_mode=any")
+    assert len(items) == 12
+
+
+def test_tag_filtered_readings_follow_a_retag(client):
+    def create(name, tags):
+        body = {"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg", "tags": tags}
+        return client.post("/api/v1/devices", json=body, headers=_headers()).get_json()["id"]
+
+    a = create("a", ["yard"])
+    b = create("b", [])
+    for dev in (a, b):
+        _seed(dev, 2)
+    url = "/api/v1/readings?tag=yard"
+    first = client.get(url, headers=_headers())
+    assert {r["device_id"] for r in first.get_json()["items"]} == {a}
+
+    # Only device_tags changes; the cached body and its ETag must not survive it.
+    client.patch(f"/api/v1/devices/{b}", json={"tags": ["yard"]}, headers=_headers())
+    resp = client.get(url, headers={**_headers(), "If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    assert {r["device_id"] for r in resp.get_json()["items"]} == {a, b}
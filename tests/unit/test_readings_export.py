@@ -0,0 +1,121 @@
+import csv
+import datetime as dt
+import importlib.util
+import io
+
+import pytest
+
+from himalia_api import create_app
+from himalia_api.poller import PollResult
+from himalia_api.poller.ingest import write_batch
+from himalia_api.routes import readings as readings_routes
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    app = create_app()
+    return app.test_client()
+
+
+def _headers():
+    return {"X-API-Key": "test-api-key"}
+
+
+T0 = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def _seed(client):
+    ids = []
+    for name in ("A", "B"):
+        resp = client.post(
+            "/api/v1/devices",
+            json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg"},
+            headers=_headers(),
+        )
+        ids.append(resp.get_json()["id"])
+    a, b = ids
+    values = ["1.5", " 42 ", "abc", None, "inf"]
+    write_batch(
+        [
+            PollResult(
+                device_id=a if i % 2 == 0 else b,
+                captured_at=T0 + dt.timedelta(minutes=i),
+                success=values[i % 5] is not None,
+                value=values[i % 5],
+                error=None if values[i % 5] is not None else "timeout",
+            )
+            for i in range(10)
+        ]
+    )
+    return a, b
+
+
+def _csv_rows(resp):
+    return list(csv.DictReader(io.StringIO(resp.data.decode())))
+
+
+def test_csv_export_parses_values_across_chunks(client, monkeypatch):
+    monkeypatch.setattr(readings_routes, "_EXPORT_CHUNK_ROWS", 3)
+    _seed(client)
+    resp = client.get("/api/v1/readings/export", headers=_headers())
+    assert resp.status_code == 200 and resp.mimetype == "text/csv"
+    assert resp.headers["Content-Disposition"] == "attachment; filename=readings.csv"
+
+    rows = _csv_rows(resp)
+    assert len(rows) == 10
+    assert [r["captured_at"] for r in rows] == sorted(r["captured_at"] for r in rows)
+    assert rows[0]["captured_at"] == "2026-01-01T00:00:00.000000+00:00"
+    assert [r["value_num"] for r in rows[:5]] == ["1.5", "42.0", "", "", ""]
+
+
+def test_device_and_time_filters(client):
+    a, _b = _seed(client)
+    since = (T0 + dt.timedelta(minutes=4)).isoformat()
+    resp = client.get(
+        "/api/v1/readings/export", query_string={"device_id": a, "since": since}, headers=_headers()
+    )
+    rows = _csv_rows(resp)
+    assert {r["device_id"] for r in rows} == {a}
+    assert len(rows) == 3  # minutes 4, 6, 8
+
+    resp = client.get("/api/v1/readings/export?success=false", headers=_headers())
+    assert {r["error"] for r in _csv_rows(resp)} == {"timeout"}
+
+
+def test_xlsx_export(client):
+    _seed(client)
+    resp = client.get("/api/v1/readings/export?format=xlsx", headers=_headers())
+    assert resp.status_code == 200
+
+    from openpyxl import load_workbook
+
+    rows = list(load_workbook(io.BytesIO(resp.data), read_only=True).worksheets[0].iter_rows(values_only=True))
+    header, first = rows[0], dict(zip(rows[0], rows[1]))
+    assert header[:5] == ("id", "device_id", "captured_at", "value", "value_num")
+    assert len(rows) == 11
+    assert first["value_num"] == 1.5 and first["captured_at"] == dt.datetime(2026, 1, 1)
+
+
+def test_parquet_export_or_501(client):
+    _seed(client)
+    resp = client.get("/api/v1/readings/export?format=parquet", headers=_headers())
+    if importlib.util.find_spec("pyarrow") is None:
+        assert resp.status_code == 501 and resp.get_json()["error"] == "format_unavailable"
+        return
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(io.BytesIO(resp.data))
+    assert table.num_rows == 10 and table.column("value_num")[0].as_py() == 1.5
+
+
+def test_bad_format(client):
+    resp = client.get("/api/v1/readings/export?format=json", headers=_headers())
+    assert resp.status_code == 400 and resp.get_json()["error"] == "validation_error"
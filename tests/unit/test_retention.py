@@ -0,0 +1,166 @@
+import datetime as dt
+import os
+import time
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.db import session_scope
+from himalia_api.models import Reading, ReadingRollup
+from himalia_api.retention import run_retention
+from himalia_api.rollups import run_rollups
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_IMAGE_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("HIMALIA_RETENTION_CHUNK_SIZE", "7")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+HEADERS = {"X-API-Key": "test-api-key"}
+NOW = dt.datetime(2026, 6, 1)
+
+
+def _create(client, name="cam"):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg"},
+        headers=HEADERS,
+    )
+    return resp.get_json()["id"]
+
+
+def _image(tmp_path, name, size=100, age_s=7200):
+    path = tmp_path / "images" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age_s
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _add_readings(device_id, days_ago, n=1, image=None, success=True):
+    with session_scope() as s:
+        s.execute(
+            insert(Reading),
+            [
+                {
+                    "device_id": device_id,
+                    "captured_at": NOW - dt.timedelta(days=days_ago, seconds=i),
+                    "value": "1",
+                    "success": success,
+                    "image_path": image,
+                }
+                for i in range(n)
+            ],
+        )
+
+
+def _count(model, *where):
+    with session_scope() as s:
+        return s.scalar(select(func.count()).select_from(model).where(*where))
+
+
+def test_old_readings_rollups_and_images_are_deleted(client, tmp_path):
+    dev = _create(client)
+    old_img = _image(tmp_path, "old.jpg", size=300)
+    shared = _image(tmp_path, "shared.jpg")
+    _add_readings(dev, days_ago=40, n=20)
+    _add_readings(dev, days_ago=40, image="old.jpg")
+    _add_readings(dev, days_ago=40, image=str(shared))
+    _add_readings(dev, days_ago=1, n=5, image="shared.jpg")
+    _add_readings(dev, days_ago=400)
+    run_rollups()
+
+    report = run_retention(load_settings(), now=NOW)
+
+    assert report.readings_deleted == 23
+    assert _count(Reading) == 5
+    assert not old_img.exists()
+    assert shared.exists()  # still referenced by recent readings
+    assert report.image_files_deleted == 1
+    assert report.image_bytes_reclaimed == 300
+    assert report.rollups_deleted == 3  # 1m/1h/1d buckets of the 400-day-old reading
+    assert _count(ReadingRollup, ReadingRollup.bucket_start < NOW - dt.timedelta(days=365)) == 0
+
+    assert run_retention(load_settings(), now=NOW).readings_deleted == 0
+
+
+def test_per_device_override_and_failed_only_images(client, tmp_path):
+    keep = _create(client, "keep")
+    dev = _create(client, "dev")
+    _add_readings(keep, days_ago=40, n=3)
+
+    resp = client.put(
+        f"/api/v1/devices/{dev}/retention",
+        json={"raw_days": 0, "images": "failed", "image_days": 1},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["effective"] == {"raw_days": 0, "rollup_days": 365, "images": "failed", "image_days": 1}
+
+    ok_img = _image(tmp_path, "ok.jpg")
+    bad_img = _image(tmp_path, "bad.jpg")
+    _add_readings(dev, days_ago=100, image="ok.jpg", success=True)
+    _add_readings(dev, days_ago=100, image="bad.jpg", success=False)
+
+    report = run_retention(load_settings(), now=NOW)
+
+    assert _count(Reading, Reading.device_id == keep) == 0
+    assert _count(Reading, Reading.device_id == dev) == 2  # raw_days=0 keeps them
+    assert report.images_detached == 1
+    assert not ok_img.exists()
+    assert bad_img.exists()
+
+    bad = client.put(f"/api/v1/devices/{dev}/retention", json={"images": "some"}, headers=HEADERS)
+    assert bad.status_code == 400
+    assert client.delete(f"/api/v1/devices/{dev}/retention", headers=HEADERS).status_code == 204
+    assert client.get(f"/api/v1/devices/{dev}/retention", headers=HEADERS).get_json()["override"] is None
+
+
+@pytest.mark.parametrize("images", ["failed", "none"])
+def test_zero_image_days_keeps_images_forever(client, tmp_path, images):
+    dev = _create(client)
+    resp = client.put(
+        f"/api/v1/devices/{dev}/retention", json={"images": images, "image_days": 0}, headers=HEADERS
+    )
+    assert resp.status_code == 200
+    ok_img = _image(tmp_path, "ok.jpg")
+    bad_img = _image(tmp_path, "bad.jpg")
+    _add_readings(dev, days_ago=20, image="ok.jpg", success=True)
+    _add_readings(dev, days_ago=20, image="bad.jpg", success=False)
+
+    report = run_retention(load_settings(), now=NOW)
+
+    assert report.images_detached == 0
+    assert _count(Reading, Reading.image_path.is_not(None)) == 2
+    assert ok_img.exists() and bad_img.exists()
+
+def test_orphans_swept_after_grace_and_db_compacted(client, tmp_path):
+    dev = _create(client)
+    orphan = _image(tmp_path, "a/b/orphan.jpg", size=50)
+    fresh = _image(tmp_path, "fresh.jpg", age_s=0)
+    used = _image(tmp_path, "used.jpg")
+    _add_readings(dev, days_ago=0, image="used.jpg")
+    _add_readings(dev, days_ago=60, n=3000)
+
+    report = run_retention(load_settings(), now=NOW)
+
+    assert not orphan.exists()
+    assert fresh.exists()
+    assert used.exists()
+    assert report.orphan_files_deleted == 1
+    assert report.readings_deleted == 3000
+    assert report.db_bytes_reclaimed > 0
+    assert report.db_free_bytes == 0
@@ -0,0 +1,142 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import select
+
+from himalia_api import create_app
+from himalia_api.db import session_scope
+from himalia_api.models import Reading, ReadingRollup
+from himalia_api.rollups import pick_resolution, run_rollups
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+HEADERS = {"X-API-Key": "test-api-key"}
+T0 = dt.datetime(2026, 1, 1)
+
+
+def _create(client):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": "meter", "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg"},
+        headers=HEADERS,
+    )
+    return resp.get_json()["id"]
+
+
+def _add(device_id, seconds, value, success=True):
+    with session_scope() as s:
+        s.add(
+            Reading(
+                device_id=device_id,
+                captured_at=T0 + dt.timedelta(seconds=seconds),
+                value=value,
+                success=success,
+            )
+        )
+
+
+def _rollup(device_id, resolution):
+    with session_scope() as s:
+        return [
+            (r.bucket_start, r.count, r.success_count, r.num_count, r.num_min, r.num_max, r.num_sum)
+            for r in s.scalars(
+                select(ReadingRollup)
+                .where(ReadingRollup.device_id == device_id, ReadingRollup.resolution == resolution)
+                .order_by(ReadingRollup.bucket_start)
+            )
+        ]
+
+
+def test_rollups_are_incremental_and_merge_late_rows(client):
+    dev = _create(client)
+    _add(dev, 0, "10")
+    _add(dev, 30, "20")
+    _add(dev, 59, "n/a")
+    _add(dev, 61, "5", success=False)
+
+    report = run_rollups(chunk_size=2)
+    assert report.readings == 4
+    assert _rollup(dev, "1m") == [
+        (T0, 3, 3, 2, 10.0, 20.0, 30.0),
+        (T0 + dt.timedelta(minutes=1), 1, 0, 1, 5.0, 5.0, 5.0),
+    ]
+    assert _rollup(dev, "1h") == [(T0, 4, 3, 3, 5.0, 20.0, 35.0)]
+
+    # Nothing new: the watermark keeps the job from re-reading old rows.
+    assert run_rollups().readings == 0
+
+    # A late reading in an already rolled-up bucket is merged, not overwritten.
+    _add(dev, 10, "-1")
+    _add(dev, 20, "inf")
+    assert run_rollups().readings == 2
+    assert _rollup(dev, "1m")[0] == (T0, 5, 5, 3, -1.0, 20.0, 29.0)
+    assert _rollup(dev, "1d") == [(T0, 6, 5, 4, -1.0, 20.0, 34.0)]
+
+
+def test_pick_resolution_fits_point_budget():
+    day = dt.timedelta(days=1)
+    assert pick_resolution(T0, T0 + day, 1440) == "1m"
+    assert pick_resolution(T0, T0 + day, 500) == "1h"
+    assert pick_resolution(T0, T0 + 20 * day, 500) == "1h"
+    assert pick_resolution(T0, T0 + 30 * day, 100) == "1d"
+    assert pick_resolution(T0, T0 + 365 * day, 10) == "1d"
+
+
+def test_series_endpoint(client):
+    dev = _create(client)
+    for minute in range(5):
+        _add(dev, minute * 60, str(minute))
+    run_rollups()
+
+    resp = client.get(
+        f"/api/v1/devices/{dev}/series",
+        query_string={"since": "2026-01-01T00:00:00Z", "until": "2026-01-01T01:00:00Z"},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["resolution"] == "1m"
+    assert [p["avg"] for p in body["points"]] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert body["points"][0]["success_rate"] == 1.0
+
+    resp = client.get(
+        f"/api/v1/devices/{dev}/series",
+        query_string={"since": "2026-01-01T00:00:00Z", "until": "2026-01-02T00:00:00Z", "max_points": 24},
+        headers=HEADERS,
+    )
+    body = resp.get_json()
+    assert body["resolution"] == "1h"
+    assert body["points"] == [
+        {"t": "2026-01-01T00:00:00", "count": 5, "success_rate": 1.0, "min": 0.0, "max": 4.0, "avg": 2.0}
+    ]
+
+    bad = client.get(f"/api/v1/devices/{dev}/series?resolution=5m", headers=HEADERS)
+    assert bad.status_code == 400
+    assert client.get("/api/v1/devices/nope/series", headers=HEADERS).status_code == 404
+
+
+def test_readings_after_deleting_the_newest_rows_are_still_rolled_up(client):
+    keep = _create(client)
+    gone = _create(client)
+    _add(keep, 0, "1")
+    _add(gone, 1, "2")
+    _add(gone, 2, "3")
+    assert run_rollups().readings == 3
+
+    # The cascade removes the highest ids; they must not be handed out again.
+    assert client.delete(f"/api/v1/devices/{gone}", headers=HEADERS).status_code == 204
+    _add(keep, 3, "4")
+    assert run_rollups().readings == 1
+    assert _rollup(keep, "1m") == [(T0, 2, 2, 2, 1.0, 4.0, 5.0)]
@@ -0,0 +1,93 @@
+import random
+
+from himalia_api.poller import DeviceSpec, PollScheduler
+
+
+def _spec(device_id, interval=10):
+    return DeviceSpec(
+        id=device_id,
+        type="camera_ip_snapshot",
+        endpoint="http://cam.local/snap.jpg",
+        auth_mode="none",
+        auth_username=None,
+        auth_password=None,
+        poll_interval_s=interval,
+        timeout_ms=1000,
+    )
+
+
+def test_pops_in_deadline_order_and_marks_inflight():
+    sched = PollScheduler(rng=random.Random(1))
+    for i in range(50):
+        sched.upsert(_spec(f"d{i}", interval=10), now=0.0)
+
+    popped = sched.pop_due(now=10.0)
+    assert len(popped) == 50
+    # In flight: nothing is handed out twice until completed.
+    assert sched.pop_due(now=100.0) == []
+    assert sched.next_deadline() is None
+
+
+def test_jitter_spreads_devices_across_the_interval():
+    sched = PollScheduler(rng=random.Random(7))
+    for i in range(100):
+        sched.upsert(_spec(f"d{i}", interval=10), now=0.0)
+
+    # Roughly one tenth become due in each second of the period, not all at t=0.
+    per_second = [len(sched.pop_due(now=float(t))) for t in range(1, 11)]
+    assert sum(per_second) == 100
+    assert max(per_second) < 30
+
+
+def test_success_keeps_phase():
+    sched = PollScheduler(jitter=False)
+    sched.upsert(_spec("a", interval=10), now=100.0)
+
+    assert [s.id for s in sched.pop_due(now=100.0)] == ["a"]
+    assert sched.complete("a", now=101.5, success=True) == 110.0
+    # An overrun poll goes again immediately instead of queueing a backlog.
+    assert [s.id for s in sched.pop_due(now=110.0)] == ["a"]
+    assert sched.complete("a", now=125.0, success=True) == 125.0
+
+
+def test_failures_back_off_exponentially_up_to_cap():
+    sched = PollScheduler(jitter=False, max_backoff_s=60)
+    sched.upsert(_spec("a", interval=5), now=0.0)
+
+    delays = []
+    now = 0.0
+    for _ in range(6):
+        assert sched.pop_due(now=now)
+        due = sched.complete("a", now=now, success=False)
+        delays.append(due - now)
+        now = due
+    assert delays == [10.0, 20.0, 40.0, 60.0, 60.0, 60.0]
+
+    assert sched.pop_due(now=now)
+    assert sched.complete("a", now=now, success=True) == now + 5.0
+    assert sched.failures("a") == 0
+
+
+def test_remove_and_interval_change():
+    sched = PollScheduler(jitter=False)
+    sched.upsert(_spec("a", interval=10), now=0.0)
+    sched.upsert(_spec("b", interval=10), now=0.0)
+
+    sched.remove("a")
+    sched.upsert(_spec("b", interval=30), now=5.0)
+
+    assert "a" not in sched
+    assert sched.pop_due(now=4.0) == []
+    assert [s.poll_interval_s for s in sched.pop_due(now=5.0)] == [30]
+
+
+def test_device_failing_before_a_restart_starts_in_backoff():
+    sched = PollScheduler(jitter=False, max_backoff_s=60)
+    sched.upsert(_spec("ok", interval=5), now=0.0)
+    sched.upsert(_spec("failing", interval=5), now=0.0, failures=1)
+
+    assert [s.id for s in sched.pop_due(now=0.0)] == ["ok"]
+    assert sched.pop_due(now=9.9) == []
+    assert [s.id for s in sched.pop_due(now=10.0)] == ["failing"]
+    # The backoff keeps growing from the carried-over count.
+    assert sched.complete("failing", now=10.0, success=False) == 30.0
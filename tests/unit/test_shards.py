@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy import select
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.db import session_scope
+from himalia_api.models import DeviceLease
+from himalia_api.poller import CaptureEngine
+from himalia_api.poller.shards import HashRing, ShardCoordinator
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_SPOOL_DIR", "")
+    monkeypatch.setenv("HIMALIA_IMAGE_STORE_ENABLED", "false")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _devices(client, n):
+    ids = []
+    for i in range(n):
+        body = {"name": f"cam{i}", "type": "camera_ip_snapshot", "endpoint": f"http://cam{i}.local/snap.jpg"}
+        resp = client.post("/api/v1/devices", json=body, headers={"X-API-Key": "test-api-key"})
+        ids.append(resp.get_json()["id"])
+    return ids
+
+
+class _Clock:
+    def __init__(self):
+        self.ms = 1_000_000
+
+    def __call__(self):
+        return self.ms
+
+
+def _claim(coord, ids, **kw):
+    with session_scope() as s:
+        return coord.claim(s, ids, **kw)
+
+
+def test_ring_is_balanced_and_moves_little_on_join():
+    keys = [f"dev-{i}" for i in range(3000)]
+    three = HashRing(["a", "b", "c"])
+    counts = {w: sum(three.owner(k) == w for k in keys) for w in "abc"}
+    assert all(600 < n < 1400 for n in counts.values())
+
+    four = HashRing(["a", "b", "c", "d"])
+    moved = [k for k in keys if three.owner(k) != four.owner(k)]
+    assert all(four.owner(k) == "d" for k in moved)
+    assert len(moved) < len(keys) / 2
+    assert HashRing([]).owner("x") is None
+
+
+def test_join_rebalances_through_lease_handoff(client):
+    ids = _devices(client, 40)
+    clock = _Clock()
+    a = ShardCoordinator("a", lease_s=30, clock_ms=clock)
+    b = ShardCoordinator("b", lease_s=30, clock_ms=clock)
+
+    assert _claim(a, ids) == set(ids)
+    # b joins: the ring gives it a share, but a still holds those leases.
+    assert _claim(b, ids) == set()
+    clock.ms += 5000
+    owned_a = _claim(a, ids, busy={ids[0]})
+    clock.ms += 5000
+    owned_b = _claim(b, ids)
+    assert owned_a and owned_b and not owned_a & owned_b
+    assert len(owned_a | owned_b) in (len(ids), len(ids) - 1)  # ids[0] may still be held while in flight
+    with session_scope() as s:
+        held = dict(s.execute(select(DeviceLease.device_id, DeviceLease.worker_id)).all())
+    assert all(held[d] == "b" for d in owned_b)
+
+    # A clean exit hands everything over at the next sync.
+    with session_scope() as s:
+        a.leave(s)
+    assert not a.holding()
+    clock.ms += 5000
+    assert _claim(b, ids) == set(ids)
+
+
+def test_dead_worker_devices_move_after_lease_expiry(client):
+    ids = _devices(client, 20)
+    clock = _Clock()
+    a = ShardCoordinator("a", lease_s=30, clock_ms=clock)
+    b = ShardCoordinator("b", lease_s=30, clock_ms=clock)
+    _claim(a, ids)
+    _claim(b, ids)
+    owned_a = _claim(a, ids)
+    owned_b = _claim(b, ids)
+    assert owned_a | owned_b == set(ids)
+
+    # a stops heartbeating; b may not take its devices until the leases lapse.
+    clock.ms += 20_000
+    assert _claim(b, ids) == owned_b
+    assert a.holding()
+    clock.ms += 11_000
+    assert not a.holding()
+    assert _claim(b, ids) == set(ids)
+
+
+def test_sharded_engines_schedule_disjoint_devices(client, monkeypatch):
+    ids = _devices(client, 30)
+    monkeypatch.setenv("HIMALIA_POLLER_SHARDING", "true")
+    fetchers = {"camera_ip_snapshot": lambda spec: b"jpeg"}
+    engines = []
+    for name in ("w1", "w2", "w3"):
+        monkeypatch.setenv("HIMALIA_POLLER_WORKER_ID", name)
+        engines.append(CaptureEngine(load_settings(), fetchers=fetchers))
+
+    for _ in range(2):  # first round: heartbeats; second: leases follow the full ring
+        for e in engines:
+            e.sync_devices()
+    for e in engines:
+        e.sync_devices()
+    scheduled = [{spec.id for spec in e.scheduler.specs()} for e in engines]
+    assert set().union(*scheduled) == set(ids)
+    assert sum(len(s) for s in scheduled) == len(ids)
+    assert all(e.stats()["shard"]["workers"] == 3 for e in engines)
@@ -0,0 +1,134 @@
+import datetime as dt
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from himalia_api import create_app
+from himalia_api.db import session_scope
+from himalia_api.models import Reading, SpoolCheckpoint
+from himalia_api.poller import PollResult
+from himalia_api.poller import ingest
+from himalia_api.poller.ingest import ReadingWriter, write_batch
+from himalia_api.poller.spool import Spool, read_segment
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+@pytest.fixture()
+def client():
+    return create_app().test_client()
+
+
+def _create(client, name):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg"},
+        headers={"X-API-Key": "test-api-key"},
+    )
+    return resp.get_json()["id"]
+
+
+def _result(device_id, n):
+    at = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(seconds=n)
+    return PollResult(device_id=device_id, captured_at=at, success=True, value=str(n), content=b"jpeg")
+
+
+def _count():
+    with session_scope() as s:
+        return s.scalar(select(func.count()).select_from(Reading))
+
+
+def test_records_round_trip_and_torn_tail_is_cut(tmp_path):
+    spool = Spool(tmp_path / "spool", fsync=False)
+    for n in range(3):
+        spool.append(_result("dev", n))
+    spool.seal()
+    [path] = spool.sealed()
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00")  # header of a frame cut short by a crash
+
+    seg = read_segment(path)
+    assert seg.torn and len(seg.results) == 3
+    assert seg.results[2].value == "2" and seg.results[2].content is None
+    assert seg.results[0].captured_at == dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+
+    # Corrupting a byte of the second payload keeps only the first record.
+    data = bytearray(path.read_bytes())
+    data[seg.ends[0] + 10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert len(read_segment(path).results) == 1
+
+
+def test_writer_replays_spool_and_removes_segments(client, tmp_path):
+    ids = [_create(client, f"cam{i}") for i in range(4)]
+    spool = Spool(tmp_path / "spool", segment_bytes=4096, fsync=False)
+    writer = ReadingWriter(max_batch=50, max_delay_ms=50, spool=spool)
+    writer.start()
+    for n in range(200):
+        writer.submit(_result(ids[n % 4], n))
+    assert writer.flush(timeout=10)
+    writer.stop()
+
+    assert _count() == 200
+    assert spool.sealed() == []
+    stats = writer.stats()
+    assert stats["rows"] == 200 and stats["spool"]["bytes"] == 0
+
+
+def test_replay_after_crash_skips_committed_records(client, tmp_path):
+    dev = _create(client, "cam")
+    spool = Spool(tmp_path / "spool", fsync=False)
+    for n in range(10):
+        spool.append(_result(dev, n))
+    spool.seal()
+    seg = read_segment(spool.sealed()[0])
+
+    # The first 4 records were committed, then the process died before unlinking.
+    write_batch(seg.results[:4], checkpoint=(seg.name, seg.ends[3]))
+
+    writer = ReadingWriter(max_batch=3, spool=Spool(tmp_path / "spool", fsync=False))
+    assert writer.drain()
+    assert _count() == 10
+    with session_scope() as s:
+        assert s.scalar(select(SpoolCheckpoint.offset)) == seg.size
+
+
+def test_submit_does_not_wait_for_a_stalled_database(client, tmp_path, monkeypatch):
+    dev = _create(client, "cam")
+    real = ingest.write_batch
+    stalled = {"calls": 0}
+
+    def flaky(batch, **kw):
+        stalled["calls"] += 1
+        if stalled["calls"] <= 2:
+            time.sleep(0.2)
+            raise RuntimeError("database is locked")
+        return real(batch, **kw)
+
+    monkeypatch.setattr(ingest, "write_batch", flaky)
+    writer = ReadingWriter(max_batch=20, max_delay_ms=20, spool=Spool(tmp_path / "spool", fsync=False))
+    writer.start()
+    t0 = time.perf_counter()
+    for n in range(100):
+        writer.submit(_result(dev, n))
+    assert time.perf_counter() - t0 < 0.2
+    assert writer.flush(timeout=10)
+    writer.stop()
+
+    stats = writer.stats()
+    assert _count() == 100
+    assert stats["errors"] == 2 and stats["dropped"] == 0
+
+
+def test_full_spool_drops_instead_of_blocking(tmp_path):
+    spool = Spool(tmp_path / "spool", max_bytes=300, fsync=False)
+    accepted = [spool.append(_result("dev", n)) for n in range(5)]
+    assert accepted[0] and not accepted[-1]
+    assert spool.stats()["dropped"] == accepted.count(False)
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from himalia_api import create_app, migrate
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    yield
+
+
+def test_head_revision_matches_alembic():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(Config(str(APP_DIR / "alembic.ini")))
+    assert migrate.head_revision() == script.get_current_head()
+
+
+def test_ensure_schema_upgrades_once_then_skips(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'fresh.sqlite3'}"
+    assert migrate.current_revision(url) is None
+    assert migrate.ensure_schema(url) is True
+    assert migrate.current_revision(url) == migrate.head_revision()
+
+    def _fail(_url):
+        raise AssertionError("alembic should not run for a database at head")
+
+    monkeypatch.setattr(migrate, "upgrade_head", _fail)
+    assert migrate.ensure_schema(url) is False
+
+
+def test_upgrade_head_leaves_environment_alone(tmp_path):
+    before = os.environ["HIMALIA_DB_URL"]
+    other = f"sqlite:///{tmp_path / 'other.sqlite3'}"
+    migrate.upgrade_head(other)
+    assert os.environ["HIMALIA_DB_URL"] == before
+    assert migrate.current_revision(other) == migrate.head_revision()
+
+
+def test_warm_start_skips_alembic_and_heavy_imports():
+    create_app()  # migrates the test database to head
+
+    probe = (
+        "import json, sys\n"
+        "from himalia_api import create_app\n"
+        "create_app()\n"
+        "heavy = ['alembic', 'pandas', 'openpyxl', 'pyvisa', 'numpy', 'cv2']\n"
+        "print(json.dumps([m for m in heavy if m in sys.modules]))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=APP_DIR, env=dict(os.environ), capture_output=True, text=True, check=True
+    )
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
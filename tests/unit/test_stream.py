@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+from himalia_api import create_app
+from himalia_api.config import load_settings
+from himalia_api.models import utcnow
+from himalia_api.poller import PollResult
+from himalia_api.poller.ingest import write_batch
+from himalia_api.stream import Broker, Event
+
+
+@pytest.fixture(autouse=True)
+def _set_test_env(monkeypatch, tmp_path):
+    db_file = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("HIMALIA_DB_URL", f"sqlite:///{db_file}")
+    monkeypatch.setenv("HIMALIA_API_KEY", "test-api-key")
+    monkeypatch.setenv("HIMALIA_STREAM_POLL_MS", "20")
+    monkeypatch.setenv("HIMALIA_STREAM_KEEPALIVE_S", "1")
+    yield
+
+
+@pytest.fixture()
+def app():
+    return create_app()
+
+
+def _headers():
+    return {"X-API-Key": "test-api-key"}
+
+
+def _device(client, name, tags=None):
+    resp = client.post(
+        "/api/v1/devices",
+        json={"name": name, "type": "camera_ip_snapshot", "endpoint": "http://example.local/snap.jpg", "tags": tags or []},
+        headers=_headers(),
+    )
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def _parse(chunk: str):
+    events = []
+    for block in chunk.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_pushes_matching_readings_and_status(app):
+    client = app.test_client()
+    watched = _device(client, "A")
+    tagged = _device(client, "B", tags=["line-2"])
+    other = _device(client, "C")
+
+    resp = client.get(f"/api/v1/stream?device_id={watched}&tag=line-2", headers=_headers(), buffered=False)
+    assert resp.status_code == 200 and resp.mimetype == "text/event-stream"
+    chunks = iter(resp.response)
+    assert next(chunks).startswith(b"retry:")
+
+    now = utcnow()
+    write_batch(
+        [
+            PollResult(device_id=watched, captured_at=now, success=True, value="1"),
+            PollResult(device_id=tagged, captured_at=now, success=False, error="timeout"),
+            PollResult(device_id=other, captured_at=now, success=True, value="3"),
+        ]
+    )
+
+    events = []
+    while not events:
+        events = _parse(next(chunks).decode())
+    resp.close()
+
+    readings = [data for kind, data in events if kind == "reading"]
+    status = {data["id"]: data for kind, data in events if kind == "device"}
+    assert {r["device_id"] for r in readings} == {watched, tagged}
+    assert set(status) == {watched, tagged}
+    assert status[tagged]["last_error"] == "timeout" and status[watched]["last_seen_at"] is not None
+
+
+def test_slow_subscriber_is_dropped(app):
+    broker = Broker(max_buffer=2)
+    slow = broker.subscribe()
+    fast = broker.subscribe()
+    frames = [Event("d", frozenset(), f"data: {i}\n\n") for i in range(2)]
+
+    broker.publish(frames)
+    assert len(fast.take(timeout=0)) == 2
+    broker.publish(frames)  # slow never drained: 4 > 2
+    assert slow.dropped and not fast.dropped
+    assert slow.take(timeout=0) == []
+
+    stats = broker.stats()
+    assert stats["subscribers"] == 1 and stats["dropped_clients"] == 1
+    broker.unsubscribe(fast)
+
+
+def test_tailer_polls_only_when_readings_change(app):
+    client = app.test_client()
+    dev = _device(client, "A")
+    broker = Broker()
+    broker._watermark = 0
+
+    assert broker.poll_once() == 0
+    assert broker.poll_once() == 0  # generation unchanged: no readings query
+
+    write_batch([PollResult(device_id=dev, captured_at=utcnow(), success=True, value="1")])
+    assert broker.poll_once() == 1
+    assert broker.poll_once() == 0
+
+
+def test_tailer_publishes_readings_after_the_newest_rows_are_deleted(app):
+    client = app.test_client()
+    keep = _device(client, "A")
+    gone = _device(client, "B")
+    broker = Broker()
+    broker._watermark = 0
+    write_batch([PollResult(device_id=d, captured_at=utcnow(), success=True, value="1") for d in (keep, gone, gone)])
+    assert broker.poll_once() == 3
+
+    # Deleting B drops the highest reading ids; the next reading must still sort above the watermark.
+    assert client.delete(f"/api/v1/devices/{gone}", headers=_headers()).status_code == 204
+    write_batch([PollResult(device_id=keep, captured_at=utcnow(), success=True, value="2")])
+    assert broker.poll_once() == 1
+
+
+def test_subscriber_limit(monkeypatch):
+    monkeypatch.setenv("HIMALIA_STREAM_MAX_CLIENTS", "1")
+    client = create_app().test_client()
+    first = client.get("/api/v1/stream", headers=_headers(), buffered=False)
+    assert first.status_code == 200
+    assert client.get("/api/v1/stream", headers=_headers()).status_code == 503
+    first.close()
+    assert client.get("/api/v1/stream/stats", headers=_headers()).get_json()["subscribers"] == 0
+
+
+def test_default_subscriber_limit_leaves_request_threads_free(monkeypatch):
+    monkeypatch.setenv("HIMALIA_API_THREADS", "8")
+    assert load_settings().stream_max_clients == 7
+    monkeypatch.setenv("HIMALIA_API_WORKER_CLASS", "sync")
+    assert load_settings().stream_max_clients == 0
+    monkeypatch.setenv("HIMALIA_STREAM_MAX_CLIENTS", "20")
+    assert load_settings().stream_max_clients == 20
+
+    monkeypatch.delenv("HIMALIA_STREAM_MAX_CLIENTS")
+    monkeypatch.setenv("HIMALIA_API_WORKER_CLASS", "gthread")
+    monkeypatch.setenv("HIMALIA_API_THREADS", "2")
+    client = create_app().test_client()
+    first = client.get("/api/v1/stream", headers=_headers(), buffered=False)
+    assert client.get("/api/v1/stream", headers=_headers()).status_code == 503
+    first.close()
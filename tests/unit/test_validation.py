@@ -0,0 +1,76 @@
+from himalia_api.validation import (
+    DEVICE_SCHEMA,
+    validate_device_payload,
+    validate_device_payloads,
+    validate_endpoint_for_type,
+)
+
+
+def _valid(**extra):
+    return {"name": " Cam ", "type": "camera_ip_snapshot", "endpoint": "http://cam.local/snap.jpg", **extra}
+
+
+def test_create_fills_defaults_and_strips():
+    res = validate_device_payload(_valid(), mode="create")
+    assert res.errors == []
+    assert res.cleaned == {
+        "name": "Cam",
+        "type": "camera_ip_snapshot",
+        "endpoint": "http://cam.local/snap.jpg",
+        "enabled": True,
+        "auth_mode": "none",
+        "auth_username": None,
+        "auth_password": None,
+        "poll_interval_s": 60,
+        "timeout_ms": 5000,
+        "tags": [],
+        "notes": None,
+    }
+    # Defaults are fresh per call, never shared between results.
+    res.cleaned["tags"].append("x")
+    assert validate_device_payload(_valid(), mode="create").cleaned["tags"] == []
+
+
+def test_errors_are_reported_per_field():
+    res = validate_device_payload(
+        {"type": "camera_rtsp", "endpoint": "http://x", "poll_interval_s": 0, "enabled": "yes", "bogus": 1},
+        mode="create",
+    )
+    assert res.errors == [
+        "unknown fields: ['bogus']",
+        "missing required field: name",
+        "enabled must be boolean",
+        "poll_interval_s must be between 1 and 3600",
+        "endpoint scheme must be rtsp for camera_rtsp",
+    ]
+
+
+def test_patch_semantics():
+    assert validate_device_payload({}, mode="patch").errors == ["patch body must include at least one updatable field"]
+    res = validate_device_payload({"tags": None, "timeout_ms": 250}, mode="patch")
+    assert res.errors == [] and res.cleaned == {"tags": [], "timeout_ms": 250}
+    # The type/endpoint pairing is only checked when a patch carries both.
+    assert validate_device_payload({"endpoint": "rtsp://x"}, mode="patch").errors == []
+    assert validate_device_payload({"type": "camera_rtsp", "endpoint": "http://x"}, mode="patch").errors
+    assert validate_endpoint_for_type("camera_rtsp", "http://x") == ["endpoint scheme must be rtsp for camera_rtsp"]
+
+
+def test_batch_returns_one_result_per_item():
+    results = validate_device_payloads([_valid(), "nope", _valid(timeout_ms=5)], mode="create")
+    assert [r.errors for r in results] == [[], ["body must be a JSON object"], ["timeout_ms must be between 100 and 60000"]]
+
+
+def test_json_schema_matches_modes():
+    create = DEVICE_SCHEMA.json_schema(mode="create")
+    assert create["required"] == ["endpoint", "name", "type"]
+    assert create["properties"]["poll_interval_s"] == {
+        "description": "Seconds between captures",
+        "type": "integer",
+        "minimum": 1,
+        "maximum": 3600,
+        "default": 60,
+    }
+    assert create["additionalProperties"] is False
+    patch = DEVICE_SCHEMA.json_schema(mode="patch")
+    assert "required" not in patch and patch["minProperties"] == 1
+    assert "default" not in patch["properties"]["enabled"]